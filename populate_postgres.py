@@ -60,8 +60,9 @@ if __name__ == '__main__':
                         tsid=filename.strip('.npy')
                         print(tsid)
                         ts = SMTimeSeries.from_db(tsid, fsm)
-                        mean=ts.mean()
-                        std=ts.std()
+                        summary=ts.summary()
+                        mean=summary.mean
+                        std=summary.std
                         level=random
                         blarg = random.random()
                         level = random.choice(["A", "B", "C", "D", "E", "F"])
@@ -11,6 +11,7 @@ setup(
     name='timeseries',
     version='0.1',
     packages=['timeseries'],
+    python_requires='>=3.7',
     author='Sophie Hilgard;Ryan Lapcevic;Anthony Soroka;Yamini Bansal; Ariel Herbert-Voss',
     author_email='rlapcevic@g.harvard.edu',
     url='',  
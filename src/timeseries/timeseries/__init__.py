@@ -1,3 +1,9 @@
 from .timeseries import *
 from .storagemanager import *
 from .smtimeseries import *
+from .batch import TimeSeriesBatch
+from .streamstats import RunningStats, WindowStats, EWStats, P2Quantile, QuantileSketch
+from .sink import StreamSink, SinkStats
+from .matching import StreamMatcher, Match
+from .asyncstream import AsyncStreamTimeSeries
+from .streamjoin import StreamJoin
@@ -0,0 +1,157 @@
+import numbers
+import numpy as np
+
+from .alignment import _sorted
+
+AGGREGATES = ('mean', 'sum', 'min', 'max', 'std', 'count', 'first', 'last')
+
+def resample(times, data, width, agg='mean', origin=None):
+    '''Aggregates data points into consecutive time buckets of equal width.
+
+    Bucket boundaries are found in one pass over the sorted time points and every
+    aggregate is computed with `ufunc.reduceat`, so no Python-level loop runs per bucket.
+
+    Args:
+        `times`, `data` (array_like): The time and data points.
+        `width` (numbers.Real): The positive width of each bucket.
+        `agg` (str): One of 'mean', 'sum', 'min', 'max', 'std' (sample standard
+            deviation), 'count', 'first' or 'last'.
+        `origin` (numbers.Real): The start of a bucket. Defaults to the first time point.
+
+    Returns:
+        tuple: The `(bucket_times, values)` ndarrays, where each bucket is labelled
+            with its start time. Buckets without data points are omitted.
+
+    Raises:
+        ValueError: `width` is not positive or `agg` is not recognized.'''
+
+    _check_agg(agg)
+    if not isinstance(width, numbers.Real) or not width > 0:
+        raise ValueError('`width` must be a positive real number')
+    times, data = _sorted(times, data)
+    if len(times) == 0:
+        return times, data
+    if origin is None:
+        origin = times[0]
+
+    buckets = np.floor((times - origin) / width)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+    counts = ends - starts
+    bucket_times = origin + buckets[starts] * width
+
+    if agg == 'count':
+        return bucket_times, counts.astype(float)
+    if agg == 'first':
+        return bucket_times, data[starts]
+    if agg == 'last':
+        return bucket_times, data[ends - 1]
+    if agg == 'min':
+        return bucket_times, np.minimum.reduceat(data, starts)
+    if agg == 'max':
+        return bucket_times, np.maximum.reduceat(data, starts)
+    sums = np.add.reduceat(data, starts)
+    if agg == 'sum':
+        return bucket_times, sums
+    means = sums / counts
+    if agg == 'mean':
+        return bucket_times, means
+    dev = data - np.repeat(means, counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = np.add.reduceat(dev * dev, starts) / (counts - 1)
+    return bucket_times, np.where(counts > 1, np.sqrt(var), np.nan)
+
+def rolling(times, data, window, agg='mean'):
+    '''Aggregates each run of `window` consecutive data points.
+
+    Sums, means and standard deviations are computed from blockwise prefix and suffix
+    sums, and minima and maxima from blockwise prefix and suffix extrema (van
+    Herk/Gil-Werman), so the cost is linear in the number of points regardless of the
+    window length, and the rounding error does not grow with the length of the series.
+
+    Args:
+        `times`, `data` (array_like): The time and data points.
+        `window` (int): The positive number of points in each window.
+        `agg` (str): One of 'mean', 'sum', 'min', 'max', 'std' (sample standard
+            deviation), 'count', 'first' or 'last'.
+
+    Returns:
+        tuple: The `(times, values)` ndarrays, where each window is labelled with the
+            time of its last point. There are `len(times) - window + 1` windows.
+
+    Raises:
+        ValueError: `window` is not a positive integer or `agg` is not recognized.'''
+
+    _check_agg(agg)
+    if not isinstance(window, numbers.Integral) or window < 1:
+        raise ValueError('`window` must be a positive integer')
+    times, data = _sorted(times, data)
+    n = len(times) - window + 1
+    if n <= 0:
+        return times[:0], data[:0]
+    end_times = times[window - 1:]
+
+    if agg == 'count':
+        return end_times, np.full(n, float(window))
+    if agg == 'first':
+        return end_times, data[:n]
+    if agg == 'last':
+        return end_times, data[window - 1:]
+    if agg in ('min', 'max'):
+        return end_times, _rolling_extreme(data, window, np.minimum if agg == 'min' else np.maximum)
+
+    sums, deviations = _rolling_moments(data, window)
+    if agg == 'sum':
+        return end_times, sums
+    if agg == 'mean':
+        return end_times, sums / window
+    if window == 1:
+        return end_times, np.full(n, np.nan)
+    return end_times, np.sqrt(deviations / (window - 1))
+
+def _check_agg(agg):
+    if agg not in AGGREGATES:
+        raise ValueError('`agg` must be one of {}'.format(', '.join(AGGREGATES)))
+
+def _rolling_moments(data, window):
+    # The sum and the sum of squared deviations from the mean of every window. Like the
+    # extrema, each window combines a suffix of one block of `window` points with a prefix
+    # of the next. The cumulative sums restart in every block, centered on its mean, so
+    # their rounding error is bounded by the spread of two neighbouring blocks rather
+    # than by the magnitude or trend of the whole series.
+    n = len(data)
+    blocks = -(-n // window)
+    padded = np.pad(np.asarray(data, dtype=float), (0, blocks * window - n), mode='edge').reshape(blocks, window)
+    centers = padded.mean(axis=1)
+    x = padded - centers[:, np.newaxis]
+    prefix, prefix_sq = np.cumsum(x, axis=1), np.cumsum(x * x, axis=1)
+    suffix = np.cumsum(x[:, ::-1], axis=1)[:, ::-1]
+    suffix_sq = np.cumsum((x * x)[:, ::-1], axis=1)[:, ::-1]
+
+    start = np.arange(n - window + 1)
+    block, offset = start // window, start % window
+    nxt = np.minimum(block + 1, blocks - 1)
+    # The window starting at offset r of a block ends with the first r points of the next
+    split = offset > 0
+    head, head_sq = suffix[block, offset], suffix_sq[block, offset]
+    tail = np.where(split, prefix[nxt, offset - 1], 0.0)
+    tail_sq = np.where(split, prefix_sq[nxt, offset - 1], 0.0)
+    # Re-center the tail on the first block's mean before combining
+    shift = np.where(split, centers[nxt] - centers[block], 0.0)
+    total = head + tail + offset * shift
+    squares = head_sq + tail_sq + 2 * shift * tail + offset * shift * shift
+    return total + window * centers[block], np.maximum(squares - total * total / window, 0)
+
+def _rolling_extreme(data, window, ufunc):
+    # Each window spans the end of one block of `window` points and the start of the
+    # next, so its extreme combines a suffix extreme of one with a prefix extreme of the other.
+    n = len(data)
+    blocks = -(-n // window)
+    fill = np.inf if ufunc is np.minimum else -np.inf
+    padded = np.full(blocks * window, fill)
+    padded[:n] = data
+    padded = padded.reshape(blocks, window)
+    prefix = ufunc.accumulate(padded, axis=1).ravel()
+    suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    count = n - window + 1
+    return ufunc(suffix[:count], prefix[window - 1:window - 1 + count])
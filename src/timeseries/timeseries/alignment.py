@@ -0,0 +1,96 @@
+import numbers
+import numpy as np
+
+ALIGN_HOWS = ('inner', 'outer', 'asof')
+FILL_POLICIES = ('nan', 'previous', 'linear')
+
+def align(times1, data1, times2, data2, how='inner', fill='nan', tolerance=None):
+    '''Aligns two series sampled at different time points onto common time points.
+
+    Both sides are matched by binary search over their sorted time points, so no
+    Python-level loop runs over the data.
+
+    Args:
+        `times1`, `data1` (array_like): The time and data points of the left series.
+        `times2`, `data2` (array_like): The time and data points of the right series.
+        `how` (str):
+            'inner' keeps only the time points present in both series.
+            'outer' keeps the union of the time points and fills the gaps of each side.
+            'asof' keeps the left time points and matches each with the last right point
+            at or before it, no more than `tolerance` earlier.
+        `fill` (str or numbers.Real): How gaps are filled: 'nan', 'previous' (the last
+            earlier value, or NaN before the first), 'linear' (interpolated between the
+            neighbouring values, or NaN outside the series), or a constant.
+        `tolerance` (numbers.Real): For 'asof', the largest allowed time difference. Left
+            points with no right point that recent are NaN, or the constant `fill`; the
+            'previous' and 'linear' policies would fill them from older points.
+
+    Returns:
+        tuple: The aligned `(times, values1, values2)` ndarrays.
+
+    Raises:
+        ValueError: `how` or `fill` is not recognized.'''
+
+    if how not in ALIGN_HOWS:
+        raise ValueError('`how` must be one of {}'.format(', '.join(ALIGN_HOWS)))
+    if not isinstance(fill, numbers.Real) and fill not in FILL_POLICIES:
+        raise ValueError('`fill` must be a real number or one of {}'.format(', '.join(FILL_POLICIES)))
+    times1, data1 = _sorted(times1, data1)
+    times2, data2 = _sorted(times2, data2)
+
+    if how == 'inner':
+        idx = np.searchsorted(times2, times1)
+        found = _found(times2, times1, idx)
+        return times1[found], data1[found], data2[idx[found]]
+
+    if how == 'asof':
+        idx = np.searchsorted(times2, times1, side='right') - 1
+        found = idx >= 0
+        if tolerance is not None and len(times2):
+            found &= times1 - times2[np.maximum(idx, 0)] <= tolerance
+        if tolerance is not None and not isinstance(fill, numbers.Real):
+            fill = 'nan'
+        values = _fill(times2, data2, times1, fill)
+        values[found] = data2[idx[found]]
+        return times1, data1, values
+
+    times = np.union1d(times1, times2)
+    return times, _reindex(times1, data1, times, fill), _reindex(times2, data2, times, fill)
+
+def _sorted(times, data):
+    # Float arrays ordered by time; sorted input is not copied.
+    times = np.asarray(times, dtype=float)
+    data = np.asarray(data, dtype=float)
+    if len(times) > 1 and not (np.diff(times) > 0).all():
+        order = np.argsort(times, kind='mergesort')
+        times, data = times[order], data[order]
+    return times, data
+
+def _found(times, pts, idx):
+    # Whether each of `pts` is present in `times`, given its insertion index `idx`
+    inside = idx < len(times)
+    return inside & (times[np.minimum(idx, len(times) - 1)] == pts) if len(times) else inside
+
+def _reindex(times, data, pts, fill):
+    # Values of the series at `pts`: exact matches where present, filled elsewhere
+    idx = np.searchsorted(times, pts)
+    found = _found(times, pts, idx)
+    values = _fill(times, data, pts, fill)
+    values[found] = data[idx[found]]
+    return values
+
+def _fill(times, data, pts, fill):
+    # Values to use at `pts` where the series has no point of its own
+    if isinstance(fill, numbers.Real):
+        return np.full(len(pts), float(fill))
+    values = np.full(len(pts), np.nan)
+    if fill == 'nan' or len(times) == 0:
+        return values
+    if fill == 'previous':
+        idx = np.searchsorted(times, pts, side='right') - 1
+        after = idx >= 0
+        values[after] = data[idx[after]]
+        return values
+    inside = (pts >= times[0]) & (pts <= times[-1])
+    values[inside] = np.interp(pts[inside], times, data)
+    return values
@@ -0,0 +1,203 @@
+import asyncio
+import datetime
+import math
+
+from .interfaces import StreamTimeSeriesInterface
+from .streamstats import RunningStats, P2Quantile
+
+# Queue markers for the end of a stream and for an exception raised by its source
+_END = object()
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+class AsyncStreamTimeSeries(StreamTimeSeriesInterface):
+    '''A stream time series whose values come from an asynchronous source.
+
+    The source may be an async iterable (e.g. an async generator reading a socket) or a
+    plain iterable. Like SimulatedTimeSeries it may yield values or (time, value) tuples,
+    and values are stamped with the integer Unix time when they are produced.
+
+    The stream is consumed with `async for`, `iteritems`, `itertimes` or `produce`. Every
+    read awaits the source, so one event loop can multiplex many streams. Several
+    consumers can read the same stream through `subscribe`. Each subscriber has a
+    bounded queue, and the source is only read once every queue has room, so a slow
+    consumer applies backpressure instead of letting the queues grow.'''
+
+    __slots__ = ('_items', '_queues', '_pump', '_maxsize')
+
+    def __init__(self, source, maxsize=1024, blocking=False):
+        '''Inits an AsyncStreamTimeSeries over an async iterable or an iterable.
+
+            Args:
+                `source`: An async iterable or iterable of values or (time, value) tuples.
+                `maxsize` (int): The capacity of each subscriber's queue.
+                `blocking` (bool): For a plain iterable whose `next` blocks (e.g. a file tail
+                                   or a sensor poll), read it in the event loop's default
+                                   executor so the loop keeps running.
+
+            Raises:
+                TypeError: `source` is not iterable.
+                ValueError: `maxsize` is not positive.'''
+
+        if maxsize < 1:
+            raise ValueError('`maxsize` must be positive')
+        if hasattr(source, '__aiter__'):
+            items = source.__aiter__()
+        else:
+            try:
+                items = _from_iterable(iter(source), blocking)
+            except TypeError:
+                raise TypeError('Parameter `source` must be an iterable or async iterable.')
+        self._items = _stamped(items)
+        self._queues = []
+        self._pump = None
+        self._maxsize = maxsize
+
+    def __iter__(self):
+        raise TypeError('AsyncStreamTimeSeries must be iterated with `async for`.')
+
+    def __aiter__(self):
+        '''Returns an async iterator over the values of the stream.'''
+        return self._values()
+
+    async def _values(self):
+        async for time, value in self._items:
+            yield value
+
+    def iteritems(self):
+        '''Returns an async iterator over the (time, value) tuples of the stream.'''
+        return self._items
+
+    async def itertimes(self):
+        '''An async iterator over the times of the stream.'''
+        async for time, value in self._items:
+            yield time
+
+    async def produce(self, chunk=1):
+        '''Awaits up to chunk (time, value) tuples.
+
+        Args:
+            chunk (int): the number of tuples to produce
+
+        Returns:
+            list: list of (time, value) tuples, shorter than `chunk` only at the end of the stream.'''
+
+        values = []
+        for i in range(chunk):
+            try:
+                values.append(await self._items.__anext__())
+            except StopAsyncIteration:
+                break
+        return values
+
+    def subscribe(self, maxsize=None):
+        '''Creates a consumer of this stream with its own bounded queue.
+
+        Subscribers should be created before any of them is read: the source is read
+        from the moment the first subscriber is, and each value reaches the subscribers
+        that exist at that time. The stream should then only be read through subscribers.
+
+        Args:
+            maxsize (int): The capacity of the subscriber's queue. Defaults to the stream's.
+
+        Returns:
+            AsyncStreamTimeSeries: A stream of the (time, value) tuples of this stream.'''
+
+        queue = asyncio.Queue(self._maxsize if maxsize is None else maxsize)
+        self._queues.append(queue)
+        return AsyncStreamTimeSeries(self._drain(queue), self._maxsize)
+
+    async def _drain(self, queue):
+        # Yields the items a subscriber's queue receives from the pump
+        if self._pump is None:
+            self._pump = asyncio.ensure_future(self._fan_out())
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    async def _fan_out(self):
+        # Copies each item to every subscriber, waiting while any queue is full
+        try:
+            async for item in self._items:
+                for queue in self._queues:
+                    await queue.put(item)
+        except Exception as error:
+            end = _Failure(error)
+        else:
+            end = _END
+        for queue in self._queues:
+            await queue.put(end)
+
+    def online_stats(self, accumulator, stat='mean', chunk=None):
+        '''Streams a statistic of the values produced so far (see `SimulatedTimeSeries.online_stats`).
+
+        Returns:
+            AsyncStreamTimeSeries: A stream of (time, statistic) tuples.'''
+
+        async def gen():
+            count = 0
+            async for time, value in self._items:
+                accumulator.update(value)
+                yield (time, getattr(accumulator, stat))
+                count += 1
+                if count == chunk:
+                    return
+        return AsyncStreamTimeSeries(gen(), self._maxsize)
+
+    def online_mean(self, chunk=None):
+        '''Online mean of the first `chunk` values, or of all of them if `chunk` is None.'''
+        return self.online_stats(RunningStats(), 'mean', chunk)
+
+    def online_std(self, chunk=None):
+        '''Online standard deviation of the first `chunk` values, or of all of them if `chunk` is None.'''
+        async def gen():
+            async for time, std in self.online_stats(RunningStats(), 'std', chunk).iteritems():
+                # A single value has no spread
+                yield (time, 0 if math.isnan(std) else std)
+        return AsyncStreamTimeSeries(gen(), self._maxsize)
+
+    def online_quantile(self, q, chunk=None, sketch=None):
+        '''Online estimate of the `q`-quantile (see `SimulatedTimeSeries.online_quantile`).'''
+        if sketch is None:
+            sketch = P2Quantile(q)
+        async def gen():
+            count = 0
+            async for time, value in self._items:
+                sketch.update(value)
+                yield (time, sketch.quantile(q))
+                count += 1
+                if count == chunk:
+                    return
+        return AsyncStreamTimeSeries(gen(), self._maxsize)
+
+    def __repr__(self):
+        return '{}([{}])'.format(type(self).__name__, self._items)
+
+async def _from_iterable(iterator, blocking):
+    # Adapts an iterator, reading it in an executor if its `next` blocks
+    if not blocking:
+        for item in iterator:
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+async def _stamped(items):
+    # (time, value) tuples, stamping values that arrive without a time
+    async for item in items:
+        if type(item) == tuple:
+            yield item
+        else:
+            yield (int(datetime.datetime.now().timestamp()), item)
@@ -0,0 +1,208 @@
+import numbers
+import numpy as np
+
+from .interfaces import SizedContainerTimeSeriesInterface, _as_real_array, _check_times, summarize
+from .interpolation import interp
+from .timeseries import ArrayTimeSeries
+
+class TimeSeriesBatch:
+    '''A batch of time series sharing one time grid.
+
+    The batch stores a single time vector and an (N, M) data matrix holding one series
+    per row, so arithmetic, statistics and interpolation apply to all rows at once.
+    Rows are exposed as read-only ArrayTimeSeries views of the matrix.'''
+
+    __slots__ = ('_times', '_data', '_summary', '_shared')
+
+    def __init__(self, time_points, data, dtype=None):
+        '''Creates a batch from a time grid and a data matrix.
+
+            Args:
+                `time_points` (sequence): An increasing sequence of M time points.
+                `data` (array_like): An (N, M) matrix of data points, one series per row.
+                                     A single sequence of M data points is treated as one row.
+                `dtype` (numpy floating dtype): The dtype of the data matrix, float64 by default.
+
+            Returns:
+                TimeSeriesBatch: A batch of N time series.
+
+            Raises:
+                ValueError: The time points are invalid, or the data is not a real matrix
+                            with one column per time point.'''
+
+        times = np.asarray(_as_real_array(time_points, 'time_points'), dtype=float)
+        _check_times(times, monotonic=True)
+        original = data
+        data = np.asarray(data)
+        if data.dtype.kind not in 'biuf':
+            raise ValueError('`data` must be real numbers')
+        data = np.atleast_2d(np.asarray(data, dtype=float if dtype is None else dtype))
+        if data.ndim != 2 or data.shape[1] != len(times):
+            raise ValueError('`data` must have one column per time point.')
+        # Read-only views keep the caller's arrays writable
+        self._times = times.view()
+        self._data = data.view()
+        self._times.flags.writeable = False
+        self._data.flags.writeable = False
+        self._summary = None
+        # A matrix shared with the caller may still change, so its statistics are not memoized
+        self._shared = isinstance(original, np.ndarray) and np.may_share_memory(data, original)
+
+    @classmethod
+    def from_series(cls, series, grid=None):
+        '''Stacks time series into a batch.
+
+            Args:
+                `series` (iterable of SizedContainerTimeSeriesInterface): The time series.
+                `grid` (sequence): If supplied, every series is linearly interpolated onto it.
+                                   Otherwise all series must have the same time points.
+
+            Returns:
+                TimeSeriesBatch: A batch with one row per series.
+
+            Raises:
+                ValueError: No grid was given and the time points differ.'''
+
+        series = list(series)
+        if grid is not None:
+            grid = np.asarray(grid, dtype=float)
+            rows = [interp(s._times_array(), s._data_array(), grid) for s in series]
+            return cls(grid, np.array(rows).reshape(len(series), len(grid)))
+        if not series:
+            raise ValueError('A grid is required to create an empty batch.')
+        first = series[0]
+        for s in series[1:]:
+            if not first._same_times(s):
+                raise ValueError('All time series must have the same time points.')
+        return cls(first._times_array(), np.array([s._data_array() for s in series]))
+
+    def __len__(self):
+        '''The number of time series in the batch.'''
+        return self._data.shape[0]
+
+    @property
+    def shape(self):
+        '''The (series, time points) shape of the data matrix.'''
+        return self._data.shape
+
+    def __sizeof__(self):
+        '''Returns the size in bytes of the batch, including its time vector and data matrix.'''
+        return object.__sizeof__(self) + self._times.nbytes + self._data.nbytes
+
+    def itertimes(self):
+        '''Returns an iterator over the shared time points.'''
+        return iter(self._times)
+
+    def __iter__(self):
+        '''Returns an iterator over the rows as ArrayTimeSeries views.'''
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, key):
+        '''Returns row `key` as an ArrayTimeSeries view, or a batch of the selected rows
+        for a slice or an index array.'''
+
+        if isinstance(key, numbers.Integral):
+            return ArrayTimeSeries._from_arrays(self._times, self._data[key])
+        return self._with_data(self._data[key])
+
+    def __repr__(self):
+        return '{}(series={}, points={})'.format(type(self).__name__, *self.shape)
+
+    def _with_data(self, data):
+        # Batches produced from this one share its (read-only) time vector
+        batch = type(self).__new__(type(self))
+        batch._times = self._times
+        batch._data = np.atleast_2d(data).view()
+        batch._data.flags.writeable = False
+        batch._summary = None
+        batch._shared = self._shared and np.may_share_memory(batch._data, self._data)
+        return batch
+
+    def _operand(self, other):
+        '''Returns the array combined with the data matrix for a binary operator.
+        Batches combine row by row; a single time series combines with every row.
+
+        Raises:
+            ValueError: `other` does not share the time grid or has a different number of rows.
+            NotImplementedError: `other` is not a real number, batch or time series.'''
+
+        if isinstance(other, numbers.Real):
+            return other
+        if isinstance(other, TimeSeriesBatch):
+            if not np.array_equal(self._times, other._times):
+                raise ValueError('Both batches must have the same time points.')
+            if len(other) != len(self):
+                raise ValueError('Both batches must have the same number of series.')
+            return other._data
+        if isinstance(other, SizedContainerTimeSeriesInterface):
+            if len(other) != len(self._times) or not np.array_equal(self._times, other._times_array()):
+                raise ValueError('The time series must have the same time points as the batch.')
+            return other._data_array()
+        raise NotImplementedError
+
+    def __neg__(self):
+        return self._with_data(np.negative(self._data))
+
+    def __add__(self, other):
+        return self._with_data(np.add(self._data, self._operand(other)))
+
+    def __sub__(self, other):
+        return self._with_data(np.subtract(self._data, self._operand(other)))
+
+    def __mul__(self, other):
+        return self._with_data(np.multiply(self._data, self._operand(other)))
+
+    def __truediv__(self, other):
+        return self._with_data(np.true_divide(self._data, self._operand(other)))
+
+    def __radd__(self, other):
+        return self._with_data(np.add(self._operand(other), self._data))
+
+    def __rsub__(self, other):
+        return self._with_data(np.subtract(self._operand(other), self._data))
+
+    def __rmul__(self, other):
+        return self._with_data(np.multiply(self._operand(other), self._data))
+
+    def __rtruediv__(self, other):
+        return self._with_data(np.true_divide(self._operand(other), self._data))
+
+    def summary(self):
+        '''Computes the summary statistics of every series. The result is memoized unless
+        the data matrix is shared with the array the batch was created from.
+
+            Returns:
+                Summary: Statistics whose fields are arrays with one entry per series.'''
+
+        if self._summary is not None:
+            return self._summary
+        summary = summarize(self._data)
+        if not self._shared:
+            self._summary = summary
+        return summary
+
+    def mean(self):
+        '''Returns an array of the mean of each series.'''
+        return self.summary().mean
+
+    def std(self):
+        '''Returns an array of the sample standard deviation of each series.'''
+        return self.summary().std
+
+    def standardize(self):
+        '''Returns a batch in which every series has mean 0 and standard deviation 1.'''
+        summary = self.summary()
+        return self._with_data((self._data - summary.mean[:, np.newaxis]) / summary.std[:, np.newaxis])
+
+    def interpolate(self, pts, kind='linear'):
+        '''Resamples every series onto new time points (see `interpolation.interp`).
+
+            Args:
+                `pts` (sequence): An increasing sequence of time points.
+                `kind` (str): 'linear', 'nearest' or 'previous'.
+
+            Returns:
+                TimeSeriesBatch: A batch on the new time points.'''
+
+        pts = np.asarray(_as_real_array(pts, 'pts'), dtype=float)
+        return type(self)(pts, interp(self._times, self._data, pts, kind))
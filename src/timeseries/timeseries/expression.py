@@ -0,0 +1,215 @@
+import numbers
+import operator
+import numpy as np
+
+from .helpers import LazyOperation
+
+# The ufunc evaluating each operator of a fused expression
+UFUNCS = {operator.add: np.add, operator.sub: np.subtract, operator.mul: np.multiply,
+          operator.truediv: np.true_divide, operator.neg: np.negative}
+
+# Number of points evaluated per block by default
+CHUNK_SIZE = 1 << 16
+
+def _leaf(ts):
+    """Returns the time series wrapped by a leaf of an expression"""
+    return ts
+
+class LazyTimeSeries(LazyOperation):
+    """An arithmetic expression over time series sharing one time grid, built with the
+    `+`, `-`, `*` and `/` operators on `SizedContainerTimeSeriesInterface.lazy`.
+
+    Nothing is computed while the expression is built. `eval` checks once that all time
+    series share their time points, then evaluates the whole expression in a single pass
+    over blocks of the data points, writing every intermediate result into a small
+    preallocated buffer with `out=` ufunc calls. Only the final series is allocated.
+
+    Because the nodes are LazyOperations, expressions also work as arguments of other
+    lazy functions, which evaluate them with ordinary time series arithmetic."""
+
+    @classmethod
+    def leaf(cls, ts):
+        """Returns an expression evaluating to the time series `ts`"""
+        return cls(_leaf, ts)
+
+    @staticmethod
+    def _wrap(value):
+        # An operand of an expression: a real number or a LazyTimeSeries, or None if unsupported
+        if isinstance(value, (numbers.Real, LazyTimeSeries)):
+            return value
+        lazy = getattr(value, 'lazy', None)
+        return lazy if isinstance(lazy, LazyTimeSeries) else None
+
+    def _binary(self, op, left, right):
+        left, right = self._wrap(left), self._wrap(right)
+        if left is None or right is None:
+            return NotImplemented
+        return LazyTimeSeries(op, left, right)
+
+    def __add__(self, other):
+        return self._binary(operator.add, self, other)
+
+    def __sub__(self, other):
+        return self._binary(operator.sub, self, other)
+
+    def __mul__(self, other):
+        return self._binary(operator.mul, self, other)
+
+    def __truediv__(self, other):
+        return self._binary(operator.truediv, self, other)
+
+    def __radd__(self, other):
+        return self._binary(operator.add, other, self)
+
+    def __rsub__(self, other):
+        return self._binary(operator.sub, other, self)
+
+    def __rmul__(self, other):
+        return self._binary(operator.mul, other, self)
+
+    def __rtruediv__(self, other):
+        return self._binary(operator.truediv, other, self)
+
+    def __neg__(self):
+        return LazyTimeSeries(operator.neg, self)
+
+    def __pos__(self):
+        return self
+
+    def eval(self, executor=None, timings=None, chunk_size=CHUNK_SIZE):
+        """Evaluates the expression in a single fused pass.
+
+        With an `executor` or `timings`, the expression is instead evaluated node by node
+        with ordinary time series arithmetic by `LazyOperation.eval`, which schedules
+        independent nodes on the executor and records their timings.
+
+        Args:
+            `executor` (concurrent.futures.Executor): An optional thread or process pool.
+            `timings` (list): If supplied, filled with a NodeTiming for every distinct node.
+            `chunk_size` (int): The number of points evaluated per block. Each intermediate
+                result needs one buffer of this many points, reused across blocks.
+
+        Returns:
+            SizedContainerTimeSeriesInterface: A new time series of the class of the first
+                time series in the expression, on the shared time points. An expression
+                consisting of a single time series returns that time series.
+
+        Raises:
+            ValueError: The time series do not all have the same time points, or
+                `chunk_size` is not positive."""
+
+        if executor is not None or timings is not None:
+            return super().eval(executor, timings)
+        if self._function is _leaf:
+            return self._args[0]
+        if chunk_size < 1:
+            raise ValueError('`chunk_size` must be positive')
+        leaves, program, buffers, count = self._compile()
+        series = list(leaves.values())
+        first = series[0]
+        for ts in series[1:]:
+            if not first._same_times(ts):
+                raise ValueError('All time series must have the same time points.')
+        arrays = {i: ts._data_array() for i, ts in leaves.items()}
+        dtype = np.result_type(*arrays.values(), np.float32)
+        n = len(first)
+        out = np.empty(n, dtype=dtype)
+        scratch = np.empty((count, min(chunk_size, max(n, 1))), dtype=dtype)
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            self._run(program, buffers, {i: array[lo:hi] for i, array in arrays.items()}, scratch, out[lo:hi])
+        return first._with_data(out)
+
+    def eval_into(self, sm, ident, chunk_size=CHUNK_SIZE):
+        """Evaluates the expression block by block, streaming the operands from their storage
+        and writing each block of the result through a storage manager as it is computed.
+
+        Operands that are SMTimeSeries are read with their storage manager's `iter_blocks`,
+        and the result is written with `sm.store_blocks`, so with FileStorageManagers the
+        memory used is proportional to `chunk_size` rather than to the length of the series.
+        The time points are compared block by block as they are read.
+
+        Args:
+            `sm` (StorageManagerInterface): The storage manager to store the result with.
+            `ident` (int or string): The identifier to store the result under. It may be
+                the identifier of an operand.
+            `chunk_size` (int): The number of points evaluated per block.
+
+        Returns:
+            SMTimeSeries: The stored result.
+
+        Raises:
+            ValueError: The time series do not all have the same time points, or
+                `chunk_size` is not positive."""
+
+        from .smtimeseries import SMTimeSeries
+
+        if chunk_size < 1:
+            raise ValueError('`chunk_size` must be positive')
+        leaves, program, buffers, count = self._compile()
+        n = len(next(iter(leaves.values())))
+        for ts in leaves.values():
+            if len(ts) != n:
+                raise ValueError('All time series must have the same time points.')
+        root = max(leaves) if not program else program[-1][0]
+        scratch = np.empty((count, min(chunk_size, max(n, 1))))
+        out = np.empty(min(chunk_size, max(n, 1)))
+
+        def blocks():
+            streams = [ts.iter_blocks(chunk_size) for ts in leaves.values()]
+            for pieces in zip(*streams):
+                times = pieces[0][0]
+                for other_times, _ in pieces[1:]:
+                    if not np.array_equal(times, other_times):
+                        raise ValueError('All time series must have the same time points.')
+                results = {i: data for i, (_, data) in zip(leaves, pieces)}
+                self._run(program, buffers, results, scratch, out[:len(times)])
+                yield times, results[root]
+
+        sm.store_blocks(ident, blocks(), n)
+        return SMTimeSeries(ident=ident, sm=sm)
+
+    def _compile(self):
+        """Plans the fused evaluation of the expression.
+
+        Returns:
+            tuple: A dict mapping the step index of each distinct leaf to its time series; the
+                program, a list of `(step index, ufunc, operands)` for the other steps in
+                topological order; a dict mapping the step index of each intermediate result
+                to its scratch buffer; and the number of scratch buffers."""
+
+        steps, slots = self._plan()
+        leaves = {i: node._args[0] for i, node in enumerate(steps) if node._function is _leaf}
+
+        # Assign each intermediate result a block buffer, reusing buffers whose
+        # value has been consumed by its last reader.
+        last_use = {}
+        for i, node in enumerate(steps):
+            for child in node._children():
+                last_use[slots[id(child)]] = i
+        buffers, free, program, count = {}, [], [], 0
+        for i, node in enumerate(steps):
+            if i in leaves:
+                continue
+            operands = [('slot', slots[id(a)]) if isinstance(a, LazyOperation) else ('value', a)
+                        for a in node._args]
+            for slot in {value for kind, value in operands if kind == 'slot'}:
+                if last_use[slot] == i and slot in buffers:
+                    free.append(buffers[slot])
+            if i < len(steps) - 1:
+                if not free:
+                    free.append(count)
+                    count += 1
+                buffers[i] = free.pop()
+            program.append((i, UFUNCS[node._function], operands))
+        return leaves, program, buffers, count
+
+    @staticmethod
+    def _run(program, buffers, blocks, scratch, out):
+        """Evaluates the program on one block, given the blocks of the leaves in `blocks`.
+        The root writes into `out`; every step's result is added to `blocks`."""
+
+        for i, ufunc, operands in program:
+            args = [blocks[value] if kind == 'slot' else value for kind, value in operands]
+            dest = out if i not in buffers else scratch[buffers[i], :len(out)]
+            blocks[i] = ufunc(*args, out=dest)
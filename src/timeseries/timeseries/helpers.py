@@ -1,34 +1,303 @@
-class LazyOperation:
-    def __init__(self, function, *args, **kwargs):
-        """Inits a LazyOperation that stores the provided function and arguments"""
-        self._function = function
-        self._args = args
-        self._kwargs = kwargs
-
-    def eval(self):
-        """Recursively evaluates all of the lazy arguments"""
-        new_args = [a.eval() if isinstance(a, LazyOperation) else a for a in self._args]
-        new_kwargs = {k: v.eval() if isinstance(v, LazyOperation) else v for k, v in self._kwargs}
-        return self._function(*new_args, **new_kwargs)
-
-
-def lazy(function):
-    """A decorator to create a lazy version of a function. Stores the function
-    and arguments in a thunk for later evaluation"""
-
-    def create_thunk(*args, **kwargs):
-        return LazyOperation(function, *args, **kwargs)
-
-    return create_thunk
-
-
-@lazy
-def lazy_add(a, b):
-    """Lazy addition. Stores arguments and function for later evaluation"""
-    return a + b
-
-
-@lazy
-def lazy_mul(a, b):
-    """Lazy multiplication. Stores arguments and function for later evaluation"""
-    return a * b
+import collections
+import functools
+import sys
+import concurrent.futures
+import time
+
+
+class NodeTiming(collections.namedtuple('NodeTiming', ['node', 'start', 'end', 'inputs'])):
+    """The wall-clock interval, in `time.perf_counter` seconds, in which a LazyOperation node
+    was evaluated, and the indices of the timings of the nodes it read"""
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        """The time spent evaluating the node"""
+        return self.end - self.start
+
+
+def critical_path(timings):
+    """Finds the chain of dependent nodes with the largest total duration, which bounds
+    how fast the graph can be evaluated however many workers are available.
+
+    Args:
+        `timings` (list of NodeTiming): The timings recorded by `LazyOperation.eval`.
+
+    Returns:
+        list: The NodeTimings along the critical path, dependencies first."""
+
+    if not timings:
+        return []
+    # Longest total duration of a chain ending at each node, and its previous node
+    totals, previous = [], []
+    for timing in timings:
+        best = max(timing.inputs, key=lambda i: totals[i], default=None)
+        totals.append(timing.duration + (totals[best] if best is not None else 0.0))
+        previous.append(best)
+    i = max(range(len(timings)), key=lambda i: totals[i])
+    path = []
+    while i is not None:
+        path.append(timings[i])
+        i = previous[i]
+    return path[::-1]
+
+
+def _timed_call(function, args, kwargs):
+    """Calls `function`, returning its result with the start and end times of the call"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, start, time.perf_counter()
+
+
+class LazyOperation:
+    """A deferred function call whose arguments may themselves be LazyOperations.
+
+    The operations reachable from an instance form a directed acyclic graph. `eval`
+    walks it iteratively in topological order, so deep graphs do not exhaust the
+    stack, and evaluates identical nodes (the same function applied to the same
+    arguments) only once."""
+
+    # Estimated relative cost of evaluating one node; subclasses may refine it
+    cost = 1
+
+    def __init__(self, function, *args, **kwargs):
+        """Inits a LazyOperation that stores the provided function and arguments"""
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+
+    def _children(self):
+        """Returns the LazyOperation arguments of this node"""
+        return [a for a in self._args + tuple(self._kwargs.values()) if isinstance(a, LazyOperation)]
+
+    def nodes(self):
+        """Returns the distinct nodes of the graph in topological order, dependencies first.
+        Of several identical nodes only the first is listed."""
+        return self._plan()[0]
+
+    @property
+    def node_count(self):
+        """The number of distinct nodes that `eval` evaluates"""
+        return len(self.nodes())
+
+    @property
+    def estimated_cost(self):
+        """The total estimated cost of the distinct nodes that `eval` evaluates"""
+        return sum(node.cost for node in self.nodes())
+
+    def eval(self, executor=None, timings=None):
+        """Evaluates the graph, dependencies first.
+
+        Each distinct node is evaluated once. Its result is cached for the duration of
+        the call and released as soon as the last node depending on it has been evaluated.
+        Without an executor the nodes run one after another in topological order. With one,
+        every node whose inputs are ready is submitted to it at once, so independent
+        branches run concurrently.
+
+        Args:
+            `executor` (concurrent.futures.Executor): An optional thread or process pool.
+                A process pool requires picklable functions and arguments; functions
+                decorated with `lazy` are picklable if they are defined at module level.
+            `timings` (list): If supplied, its contents are replaced by a NodeTiming for every
+                distinct node, in topological order (see `critical_path`).
+
+        Returns:
+            The result of the root node."""
+
+        steps, slots = self._plan()
+        inputs = [sorted({slots[id(child)] for child in node._children()}) for node in steps]
+        # The number of nodes still to read each result, after which it can be released
+        readers = [0] * len(steps)
+        for slot_inputs in inputs:
+            for slot in slot_inputs:
+                readers[slot] += 1
+        results = [None] * len(steps)
+        times = [None] * len(steps)
+
+        def finish(i, result, start, end):
+            results[i] = result
+            times[i] = (start, end)
+            for slot in inputs[i]:
+                readers[slot] -= 1
+                if not readers[slot]:
+                    results[slot] = None
+
+        if executor is None:
+            for i, node in enumerate(steps):
+                finish(i, *_timed_call(node._function, *node._resolve(results, slots)))
+        else:
+            waiting = [len(slot_inputs) for slot_inputs in inputs]
+            consumers = [[] for node in steps]
+            for i, slot_inputs in enumerate(inputs):
+                for slot in slot_inputs:
+                    consumers[slot].append(i)
+            ready = [i for i, count in enumerate(waiting) if not count]
+            pending = {}
+            try:
+                while ready or pending:
+                    for i in ready:
+                        future = executor.submit(_timed_call, steps[i]._function, *steps[i]._resolve(results, slots))
+                        pending[future] = i
+                    ready = []
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        i = pending.pop(future)
+                        finish(i, *future.result())
+                        for consumer in consumers[i]:
+                            waiting[consumer] -= 1
+                            if not waiting[consumer]:
+                                ready.append(consumer)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        if timings is not None:
+            timings[:] = [NodeTiming(node, start, end, tuple(inputs[i]))
+                          for i, (node, (start, end)) in enumerate(zip(steps, times))]
+        return results[slots[id(self)]]
+
+    def _resolve(self, results, slots):
+        """Returns the positional and keyword arguments with LazyOperations replaced by their results"""
+        args = [results[slots[id(a)]] if isinstance(a, LazyOperation) else a for a in self._args]
+        kwargs = {k: results[slots[id(v)]] if isinstance(v, LazyOperation) else v
+                  for k, v in self._kwargs.items()}
+        return args, kwargs
+
+    def _plan(self):
+        """Orders the graph for evaluation and merges identical nodes.
+
+        Returns:
+            tuple: The list of distinct nodes in topological order, and a dict mapping the id
+                of every node in the graph to the index of the node computing its value."""
+
+        steps, slots, signatures = [], {}, {}
+        for node in _postorder(self):
+            signature = (_key(node._function, slots),
+                         tuple(_key(a, slots) for a in node._args),
+                         tuple(sorted((k, _key(v, slots)) for k, v in node._kwargs.items())))
+            slot = signatures.get(signature)
+            if slot is None:
+                slot = signatures[signature] = len(steps)
+                steps.append(node)
+            slots[id(node)] = slot
+        return steps, slots
+
+
+def _postorder(root):
+    """Lists the nodes reachable from `root` once each, every node after its arguments"""
+    order, seen = [], set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif id(node) not in seen:
+            seen.add(id(node))
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node._children()) if id(child) not in seen)
+    return order
+
+
+# Types whose equal values are interchangeable as arguments, so nodes taking them may merge
+_EXACT_TYPES = (int, bool, str, bytes, type(None))
+
+
+def _key(value, slots):
+    """Identifies an argument for merging identical nodes: a LazyOperation by the node
+    computing its value, a scalar or tuple of scalars by its exact value (see `_exact`),
+    and anything else by identity"""
+    if isinstance(value, LazyOperation):
+        return ('node', slots[id(value)])
+    exact = _exact(value)
+    return ('object', id(value)) if exact is None else ('value', exact)
+
+
+def _exact(value):
+    """A key equal only for interchangeable scalars: floats by their exact bits, so that
+    0.0 and -0.0 stay distinct, ints, bools, strings and None by type and value, and
+    tuples by the keys of their items. None for any other value."""
+    kind = type(value)
+    if kind is float:
+        return (kind, value.hex())
+    if kind is complex:
+        return (kind, value.real.hex(), value.imag.hex())
+    if kind in _EXACT_TYPES:
+        return (kind, value)
+    if kind is tuple:
+        items = tuple(_exact(item) for item in value)
+        return None if None in items else (kind, items)
+    return None
+
+
+def lazy(function):
+    """A decorator to create a lazy version of a function. Stores the function
+    and arguments in a thunk for later evaluation"""
+    return _LazyFunction(function)
+
+
+def _global(module, qualname):
+    """Returns the object named `qualname` in the imported module `module`, or None"""
+    value = sys.modules.get(module)
+    for name in qualname.split('.'):
+        value = getattr(value, name, None)
+    return value
+
+
+class _LazyFunction:
+    """The lazy version of a function returned by `lazy`: calling it creates a LazyOperation.
+
+    The wrapped function is left untouched. The nodes created by the wrapper call a
+    `_LazyCall` instead of the function itself, which process pools can pickle by
+    reference to the decorated name even though that name now refers to the wrapper."""
+
+    def __init__(self, function):
+        functools.update_wrapper(self, function)
+        self._call = _LazyCall(function, self)
+
+    def __call__(self, *args, **kwargs):
+        return LazyOperation(self._call, *args, **kwargs)
+
+    def __get__(self, instance, owner=None):
+        # Decorated methods bind like the functions they wrap
+        return self if instance is None else functools.partial(self, instance)
+
+    def __reduce__(self):
+        if _global(getattr(self, '__module__', None), getattr(self, '__qualname__', '')) is self:
+            return self.__qualname__
+        return (_LazyFunction, (self.__wrapped__,))
+
+    def __repr__(self):
+        return '<lazy {!r}>'.format(self.__wrapped__)
+
+
+class _LazyCall:
+    """Calls the function wrapped by a _LazyFunction; the function stored in its nodes"""
+
+    __slots__ = ('_function', '_wrapper')
+
+    def __init__(self, function, wrapper):
+        self._function = function
+        self._wrapper = wrapper
+
+    def __call__(self, *args, **kwargs):
+        return self._function(*args, **kwargs)
+
+    def __reduce__(self):
+        # By reference to a decorated module-level name, or else as the function itself
+        wrapper = self._wrapper
+        if _global(getattr(wrapper, '__module__', None), getattr(wrapper, '__qualname__', '')) is wrapper:
+            return (getattr, (wrapper, '_call'))
+        return (_LazyCall, (self._function, None))
+
+
+@lazy
+def lazy_add(a, b):
+    """Lazy addition. Stores arguments and function for later evaluation"""
+    return a + b
+
+
+@lazy
+def lazy_mul(a, b):
+    """Lazy multiplication. Stores arguments and function for later evaluation"""
+    return a * b
@@ -5,10 +5,104 @@ import numpy as np
 import numbers
 import math
 import json
+import collections
+import operator
+
+from .interpolation import interp
+from .expression import LazyTimeSeries
+from . import alignment
+from . import aggregation
+from . import serialization
+
+# NumPy functions whose result keeps the time points of a time series argument
+_ELEMENTWISE_FUNCTIONS = frozenset((np.clip, np.round, np.around, np.fix, np.nan_to_num,
+                                    np.real_if_close, np.copy, np.where, np.cumsum, np.cumprod))
+
+def _as_real_array(values, name):
+    '''Converts a sequence of real numbers to a one-dimensional numeric ndarray.
+
+    Arrays that already have a boolean, integer or floating point dtype are returned
+    as-is. Sequences that NumPy can only store as objects (e.g. `fractions.Fraction`)
+    are checked element by element and converted to floats.
+
+    Raises:
+        ValueError: An element of `values` is not a real number.'''
+
+    if not isinstance(values, (np.ndarray, list, tuple, range)):
+        values = list(values)
+    try:
+        arr = np.asarray(values)
+    except (TypeError, ValueError):
+        arr = np.empty(len(values), dtype=object)
+        arr[:] = values
+    if arr.dtype.kind == 'O':
+        for value in arr.flat:
+            if not isinstance(value, numbers.Real):
+                raise ValueError('`%s` must be real numbers' % name)
+        arr = arr.astype(float)
+    elif arr.dtype.kind not in 'biuf':
+        raise ValueError('`%s` must be real numbers' % name)
+    if arr.ndim != 1:
+        raise ValueError('`%s` must be one-dimensional' % name)
+    return arr
+
+def _check_times(times, monotonic=False):
+    '''Checks that a numeric array of time points is finite and free of duplicates.
+
+    Raises:
+        ValueError: A time point is not finite or is duplicated, or (with `monotonic`)
+            the time points are not increasing.'''
+
+    # Raise exception if a time value is infinite or NaN
+    if times.dtype.kind == 'f' and not np.isfinite(times).all():
+        raise ValueError('`time_points` must be finite')
+
+    # Sorted time points are checked for duplicates in linear time
+    if len(times) > 1 and not (np.diff(times) > 0).all():
+        if len(np.unique(times)) != len(times):
+            raise ValueError('`time_points` must not contain duplicates')
+        if monotonic:
+            raise ValueError('`time_points` must be increasing')
+
+class Summary(collections.namedtuple('Summary', ['count', 'sum', 'mean', 'var', 'min', 'max', 'norm'])):
+    '''Summary statistics of the data points of a time series. `var` is the sample variance.'''
+
+    __slots__ = ()
+
+    @property
+    def std(self):
+        '''The sample standard deviation.'''
+        return np.sqrt(self.var)
+
+def summarize(data):
+    '''Computes summary statistics of a sequence of data points, or of each row of a matrix.
+    The variance is computed from deviations about the mean for numerical stability.
+
+    Args:
+        `data` (array_like): The data points, or a matrix with one series per row.
+
+    Returns:
+        Summary: The statistics (arrays with one entry per row for a matrix);
+            those undefined for too few points are NaN.'''
+
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    nan = np.full(data.shape[:-1], math.nan)[()]
+    if n == 0:
+        zero = np.zeros(data.shape[:-1])[()]
+        return Summary(0, zero, nan, nan, nan, nan, zero)
+    total = data.sum(axis=-1)
+    mean = total / n
+    dev = data - np.expand_dims(mean, -1)
+    var = (dev * dev).sum(axis=-1) / (n - 1) if n > 1 else nan
+    norm = np.sqrt((data * data).sum(axis=-1))
+    return Summary(n, total, mean, var, data.min(axis=-1), data.max(axis=-1), norm)
 
 class TimeSeriesInterface(abc.ABC):
     '''A series of data points associated with time points.'''
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def __iter__(self):
        '''Iterate over data in TimeSeries'''
@@ -25,6 +119,8 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
 
     The interface preserves information but not type: ints may be converted to floats.'''
 
+    __slots__ = ()
+
     def __init__(self, time_points, data_points):
         '''Constructor for SizedContainerTimeSeriesInterface.
 
@@ -34,32 +130,48 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
             `data_points` (`sequence` of `numbers.Real`): 
                 A sequence of data points. Must have same length as `time_points`.'''
 
+        self._times, self._data = self._validate(time_points, data_points)
+
+    @staticmethod
+    def _validate(time_points, data_points, monotonic=False):
+        '''Validates a pair of time and data sequences with a single array conversion each.
+
+        Sequences NumPy can convert to a numeric array are checked with vectorized
+        operations; ndarrays with a numeric dtype are used without copying. Only
+        sequences NumPy stores as objects fall back to a Python-level type check.
+
+        Args:
+            `time_points` (`sequence` of `numbers.Real`): The time points to validate.
+            `data_points` (`sequence` of `numbers.Real`): The data points to validate.
+            `monotonic` (bool): If True, `time_points` must be strictly increasing.
+
+        Returns:
+            tuple: The `(times, data)` numeric ndarrays.
+
+        Raises:
+            TypeError: A parameter is not a sequence.
+            ValueError: The sequences differ in length, contain values that are not real
+                numbers, contain non-finite or duplicate time points, or (with `monotonic`)
+                time points that are not increasing.'''
+
         # Raise an exception if any parameter is not a sequence.
         params = {'time_points': time_points,
                   'data_points': data_points}
+        arrays = {}
         for p in params:
             try:
                 iter(params[p])
-            except:
+            except TypeError:
                 raise TypeError('Parameter `%s` must be a sequence type.' % p)
+            arrays[p] = _as_real_array(params[p], p)
+        times, data = arrays['time_points'], arrays['data_points']
 
         # Raise an exception if `time_points` and `data_points` are not the same length
-        if len(list(time_points)) != len(list(data_points)):
+        if len(times) != len(data):
             raise ValueError('Parameters `time_points` and `data_points` must have the same length.')
 
-        # Raise exception if a time value is not a real number
-        for time in iter(time_points):
-            if not isinstance(time, numbers.Real):
-                raise ValueError('`time_points` must be real numbers')
-
-        # Raise exception if a data value is not a real number
-        for data in iter(data_points):
-            if not isinstance(data, numbers.Real):
-                raise ValueError('`data_points` must be real numbers')
-
-        # Raise exception if there is a duplicate time value
-        if len(np.unique(list(time_points))) !=len(list(time_points)):
-            raise ValueError('`time_points` must not contain duplicates')
+        _check_times(times, monotonic)
+        return times, data
 
     @abc.abstractmethod
     def __sizeof__(self):
@@ -83,6 +195,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
             raise ValueError('`value` must be a real number')
         else:
             self._data[key] = value
+            self._summary = None
 
     def __repr__(self):
         '''Returns a string containing all information about the instance relevant to a technical user.
@@ -97,50 +210,191 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
             hex(id(self)),
             str(self))
 
+    # Number of points shown by str() and repr() before the output is truncated
+    _str_max_rows = 20
+
     def __str__(self):
         '''Returns a succint interpretation of the SizedContainerTimeSeriesInterface.
+        Series longer than `_str_max_rows` points show only their first and last points
+        followed by their length and time range.
 
         Returns:
             str: An informal description of the object.'''
 
-        format_str = '{}([{}])'
-        row_str = '[{},{}]'
-        add_str = ''
-        for pts in self.iteritems():
-            add_str += row_str.format(pts[0], pts[1]) + '\n'
+        return self.to_string(self._str_max_rows)
+
+    def to_string(self, max_rows=None):
+        '''Formats the time series as one `[time,value]` row per point, in linear time.
+
+        Args:
+            max_rows (int): The maximum number of rows to show. Longer series show half of
+                the rows from each end, then their length and time range. None shows all rows.
+
+        Returns:
+            str: The formatted time series.'''
+
+        format_str = '{}([{}]{})'
+        row_str = '[{},{}]\n'
+        times, data = self._times_array(), self._data_array()
+        if max_rows is None or len(self) <= max_rows:
+            rows = map(row_str.format, times, data)
+            fields = ''
+        else:
+            head = max(max_rows // 2, 1)
+            rows = list(map(row_str.format, times[:head], data[:head]))
+            rows.append('...\n')
+            rows.extend(map(row_str.format, times[-head:], data[-head:]))
+            fields = ', length={}, start={}, stop={}'.format(len(self), times.min(), times.max())
         class_name = type(self).__name__
-        return format_str.format(class_name, add_str)
+        return format_str.format(class_name, ''.join(rows), fields)
 
-    def interpolate(self, pts):
+    def interpolate(self, pts, kind='linear'):
         '''Generates new interpolated values for a TimeSeries given unseen times.
         Uses stationary boundary conditions: if a new time point is smaller than the
         first existing time point, returns the first value; likewise for larger time points.
 
         Args:
-            pts: a list of time values to create interpolated points for
+            pts: a list of time values to create interpolated points for, or a
+                two-dimensional batch of such lists
+            kind (str): 'linear', 'nearest' or 'previous' (see `interpolation.interp`)
+
+        Returns:
+            A new SizedContainerTimeSeriesInterface (of the same type, see `_with_points`) with the provided times and their interpolated values,
+            or a list of them if `pts` is a batch.'''
+
+        if not isinstance(pts, (np.ndarray, list, tuple, range)):
+            pts = list(pts)
+        pts = np.asarray(pts, dtype=float)
+        values = interp(self._times_array(), self._data_array(), pts, kind)
+        if pts.ndim == 2:
+            return [self._with_points(p, v) for p, v in zip(pts, values)]
+        return self._with_points(pts, values)
+
+    def resample(self, bucket_width, agg='mean', origin=None):
+        '''Aggregates the data points into consecutive time buckets of width `bucket_width`.
+
+        Args:
+            bucket_width (numbers.Real): The positive width of each bucket.
+            agg (str): 'mean', 'sum', 'min', 'max', 'std', 'count', 'first' or 'last'.
+            origin (numbers.Real): The start of a bucket. Defaults to the first time point.
+
+        Returns:
+            A new SizedContainerTimeSeriesInterface (of the same type, see `_with_points`) with one point per nonempty
+            bucket, at the bucket's start time (see `aggregation.resample`).'''
+
+        return self._with_points(*aggregation.resample(self._times_array(), self._data_array(), bucket_width, agg, origin))
+
+    def rolling(self, window, agg='mean'):
+        '''Aggregates every run of `window` consecutive data points.
+
+        Args:
+            window (int): The positive number of points in each window.
+            agg (str): 'mean', 'sum', 'min', 'max', 'std', 'count', 'first' or 'last'.
 
         Returns:
-            A new SizedContainerTimeSeriesInterface (of the same type) with the provided times and their interpolated values.'''
-
-        inter_pts = []
-        ts = list(pts)
-        data = list(iter(self))
-        for t in ts:
-            # Get the two time points bounding `pts`
-            times = sorted(enumerate(self.itertimes()), key = lambda x: abs(x[1] - t))[:2]
-            i1, t1 = times[0]
-            i2, t2 = times[1]
-            if t <= t1: 
-                inter_pts.append(data[i1])
-            elif t >= t2:
-                inter_pts.append(data[i2])
+            A new SizedContainerTimeSeriesInterface (of the same type, see `_with_points`) with one point per window,
+            at the time of the window's last point (see `aggregation.rolling`).'''
+
+        return self._with_points(*aggregation.rolling(self._times_array(), self._data_array(), window, agg))
+
+    def iter_blocks(self, block_size):
+        '''Generates the time and data points in consecutive blocks.
+
+        Args:
+            block_size (int): The maximum number of points per block.
+
+        Returns:
+            iterable: An iterator over `(times, data)` ndarray pairs.'''
+
+        times, data = self._times_array(), self._data_array()
+        for start in range(0, len(times), block_size):
+            yield times[start:start + block_size], data[start:start + block_size]
+
+    def _times_array(self):
+        '''Returns the time points as an ndarray. Subclasses may return a view of their storage.'''
+        return np.fromiter(self.itertimes(), dtype=float, count=len(self))
+
+    def _data_array(self):
+        '''Returns the data points as an ndarray. Subclasses may return a view of their storage.'''
+        return np.fromiter(iter(self), dtype=float, count=len(self))
+
+    def __array__(self, dtype=None, copy=None):
+        '''Returns the data points for NumPy, e.g. for `np.asarray(ts)`.
+
+        Array-backed time series return a read-only view of their valid data points, so
+        nothing is copied; the view cannot be used to bypass copy-on-write or memoization.
+
+        Args:
+            `dtype` (numpy dtype): The requested dtype, the data dtype by default.
+            `copy` (bool): True to always copy, False to raise if a copy is needed.
+
+        Returns:
+            ndarray: The data points.
+
+        Raises:
+            ValueError: `copy` is False and the data points must be copied or converted.'''
+
+        data = self._data_array()
+        if dtype is not None and np.dtype(dtype) != data.dtype:
+            if copy is False:
+                raise ValueError('The data points cannot be converted to {} without a copy.'.format(dtype))
+            return data.astype(dtype)
+        if copy:
+            return data.copy()
+        view = data.view()
+        view.flags.writeable = False
+        return view
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        '''Applies a NumPy ufunc elementwise, e.g. `np.sqrt(ts)` or `np.float64(2) * ts`.
+
+        Operands may be real numbers and time series with the same time points. The
+        result is a time series of the instance's class sharing its time points, or a
+        tuple of them for ufuncs with several outputs. Reductions, `out=` and array
+        operands are not supported and raise TypeError.
+
+        Raises:
+            ValueError: A time series operand has different time points.'''
+
+        if method != '__call__' or 'out' in kwargs:
+            return NotImplemented
+        args = []
+        for value in inputs:
+            if isinstance(value, SizedContainerTimeSeriesInterface):
+                if not self._same_times(value):
+                    raise ValueError('Both time series must have the same time points.')
+                args.append(value._data_array())
+            elif isinstance(value, numbers.Real) or (isinstance(value, np.ndarray) and value.ndim == 0):
+                args.append(value)
             else:
-                dt = t2 - t1
-                dy = data[i2] - data[i1]
-                m = dy / dt
-                y = m * (t - t1) + data[i1]
-                inter_pts.append(y)
-        return type(self)(ts, inter_pts)
+                return NotImplemented
+        result = getattr(ufunc, method)(*args, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(self._with_data(data) for data in result)
+        return self._with_data(result)
+
+    def __array_function__(self, func, types, args, kwargs):
+        '''Applies a NumPy function, e.g. `np.mean(ts)`, `np.dot(ts1, ts2)` or `np.fft.fft(ts)`.
+
+        Time series arguments, including those in list or tuple arguments, are passed as
+        their data points (see `__array__`). Functions that map each data point to a new
+        value, such as `np.clip` and `np.round`, return a time series sharing the time
+        points of the first time series argument; other functions return their usual result.'''
+
+        first = []
+        def convert(value):
+            if isinstance(value, SizedContainerTimeSeriesInterface):
+                first.append(value)
+                return value.__array__()
+            if isinstance(value, (list, tuple)):
+                return type(value)(convert(item) for item in value)
+            return value
+        args = [convert(value) for value in args]
+        kwargs = {key: convert(value) for key, value in kwargs.items()}
+        result = func(*args, **kwargs)
+        if first and func in _ELEMENTWISE_FUNCTIONS and isinstance(result, np.ndarray) and result.shape == (len(first[0]),):
+            return first[0]._with_data(result)
+        return result
 
     def __abs__(self):
         '''Calculates the two-norm of the value vector of the time series.
@@ -148,7 +402,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
         Returns:
             float: The two-norm of the value vector of the time series.'''
 
-        return math.sqrt(sum(x**2 for x in self))
+        return self.summary().norm
 
     def __bool__(self):
         '''Determines whether the value vector is of length zero.
@@ -158,6 +412,25 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
 
         return bool(abs(self))
 
+    def summary(self):
+        '''Computes the count, sum, mean, sample variance, extrema and two-norm of the data points
+        with vectorized reductions. The result is memoized until the data points are modified.
+
+        Returns:
+            Summary: The summary statistics of the data points.'''
+
+        summary = getattr(self, '_summary', None)
+        if summary is None:
+            summary = summarize(self._data_array())
+            if self._memoizable():
+                self._summary = summary
+        return summary
+
+    def _memoizable(self):
+        '''Determines whether derived values may be memoized, i.e. whether every modification of
+        the data points goes through methods that invalidate them.'''
+        return True
+
     def _check_time_values(function):
         '''Verifies that the RHS of an instance function is either a numbers.Real or
            a SizedContainerTimeSeriesInterface with identical time values.
@@ -175,25 +448,60 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
                 return function(self, rhs)
             elif not isinstance(rhs, SizedContainerTimeSeriesInterface):
                 raise NotImplementedError
-            elif len(self) != len(rhs) or not all(t1 == t2 for t1, t2 in zip(self.itertimes(), rhs.itertimes())):
+            elif not self._same_times(rhs):
                 raise ValueError('Both time series must have the same time points.')
             return function(self, rhs)
         return _check_time_values_helper
 
+    def _same_times(self, other):
+        '''Determines whether `other` has the same time points as the instance.
+        Time arrays that share a buffer are recognized without comparing their elements.
+
+        Returns:
+            bool: True if both time series have identical time points.'''
+
+        if self is other:
+            return True
+        if len(self) != len(other):
+            return False
+        t1, t2 = self._times_array(), other._times_array()
+        if t1.__array_interface__['data'][0] == t2.__array_interface__['data'][0] and t1.strides == t2.strides:
+            return True
+        return np.array_equal(t1, t2)
+
+    def _with_data(self, data):
+        '''Returns a new time series of the same class with the instance's time points and `data`.
+        Subclasses override this to share their time points instead of revalidating them.'''
+
+        return type(self)(self._times_array(), data)
+
+    def _with_points(self, times, data):
+        '''Returns a new time series for new time points and `data`, of the same class by default.
+        Subclasses whose storage cannot represent arbitrary time points override this.'''
+
+        return type(self)(times, data)
+
+    @staticmethod
+    def _operand(other):
+        # The data points of a time series operand, or a real number unchanged.
+        if isinstance(other, numbers.Real):
+            return other
+        return other._data_array()
+
     def __neg__(self):
         '''Returns a new time series of the same class with the negation of each data point.
           
            Returns:
                SizedContainerTimeSeriesInterface: A new instance whose data points are the negation of `self`'s.'''
 
-        return type(self)(list(self.itertimes()), [-x for x in iter(self)])
+        return self._with_data(np.negative(self._data_array()))
 
     def __pos__(self):
         '''Returns a new time series with identical data points.
            
            Returns:
                SizedContainerTimeSeriesInterface: A copy of the instance.'''
-        return type(self)(list(self.itertimes()), list(iter(self)))
+        return self._with_data(self._data_array().copy())
 
     @_check_time_values
     def __eq__(self, other):
@@ -209,10 +517,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
             bool: True if all (time,value) tuples of the two TimeSeries are the same, or if all
             values of the TimeSeries are equal to the real number. False otherwise.'''
 
-        if isinstance(other, numbers.Real):
-            return (all(x == numbers.Real for x in iter(self)))
-        else:
-            return (all(x == y for x, y in zip(iter(self), iter(other))))
+        return bool(np.all(self._data_array() == self._operand(other)))
 
     @_check_time_values
     def __add__(self, other):
@@ -228,10 +533,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
                 A new time series with the same times and either an elementwise addition
                 with the real number or elementwise addition between the values of the other time series.'''
 
-        if isinstance(other, numbers.Real):
-            return type(self)(list(self.itertimes()), [x + other for x in iter(self)])
-        else:
-            return type(self)(list(self.itertimes()), [x + y for x, y in zip(iter(self), iter(other))])
+        return self._with_data(np.add(self._data_array(), self._operand(other)))
 
     @_check_time_values
     def __sub__(self, other):
@@ -247,10 +549,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
                 A new time series with the same times and either an elementwise addition
                 with the real number or elementwise addition between the values of the other time series.'''
 
-        if isinstance(other, numbers.Real):
-            return type(self)(list(self.itertimes()), [x - other for x in iter(self)])
-        else:
-            return type(self)(list(self.itertimes()), [x - y for x, y in zip(iter(self), iter(other))])
+        return self._with_data(np.subtract(self._data_array(), self._operand(other)))
 
     @_check_time_values
     def __mul__(self, other):
@@ -266,10 +565,81 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
                 A new time series with the same times and either an elementwise multiplication
                 with the real number or elementwise multiplication between the values of the other time series.'''
 
-        if isinstance(other, numbers.Real):
-            return type(self)(list(self.itertimes()), [x * other for x in iter(self)])
-        else:
-            return type(self)(list(self.itertimes()), [x * y for x, y in zip(iter(self), iter(other))])
+        return self._with_data(np.multiply(self._data_array(), self._operand(other)))
+
+    @_check_time_values
+    def __truediv__(self, other):
+        '''Either divides elementwise by another time series, or divides each data point value by a real number.
+
+        Args:
+            `other` (numbers.Real or SizedContainerTimeSeriesInterface): 
+                Either a real number or another time series. 
+                If using another time series, it must have the same time values.
+
+        Returns:
+            SizedContainerTimeSeriesInterface subclass: 
+                A new time series with the same times and either an elementwise division
+                by the real number or elementwise division by the values of the other time series.'''
+
+        return self._with_data(np.true_divide(self._data_array(), self._operand(other)))
+
+    @_check_time_values
+    def __radd__(self, other):
+        '''Adds a real number on the left to each data point.'''
+        return self._with_data(np.add(self._operand(other), self._data_array()))
+
+    @_check_time_values
+    def __rsub__(self, other):
+        '''Subtracts each data point from a real number on the left.'''
+        return self._with_data(np.subtract(self._operand(other), self._data_array()))
+
+    @_check_time_values
+    def __rmul__(self, other):
+        '''Multiplies a real number on the left by each data point.'''
+        return self._with_data(np.multiply(self._operand(other), self._data_array()))
+
+    @_check_time_values
+    def __rtruediv__(self, other):
+        '''Divides a real number on the left by each data point.'''
+        return self._with_data(np.true_divide(self._operand(other), self._data_array()))
+
+    def add(self, other, align=None, fill='nan', tolerance=None):
+        '''Adds a real number or another time series, optionally aligning their time points first.
+
+        Args:
+            `other` (numbers.Real or SizedContainerTimeSeriesInterface): The right operand.
+            `align` (str): None requires identical time points, as the `+` operator does.
+                Otherwise 'inner', 'outer' or 'asof' (see `alignment.align`).
+            `fill` (str or numbers.Real): The fill policy for gaps left by the alignment.
+            `tolerance` (numbers.Real): The largest time difference matched by 'asof'.
+
+        Returns:
+            SizedContainerTimeSeriesInterface subclass: A new time series on the aligned time points.'''
+
+        return self._combine(other, operator.add, np.add, align, fill, tolerance)
+
+    def sub(self, other, align=None, fill='nan', tolerance=None):
+        '''Subtracts a real number or another time series, optionally aligning their time points first (see `add`).'''
+        return self._combine(other, operator.sub, np.subtract, align, fill, tolerance)
+
+    def mul(self, other, align=None, fill='nan', tolerance=None):
+        '''Multiplies by a real number or another time series, optionally aligning their time points first (see `add`).'''
+        return self._combine(other, operator.mul, np.multiply, align, fill, tolerance)
+
+    def div(self, other, align=None, fill='nan', tolerance=None):
+        '''Divides by a real number or another time series, optionally aligning their time points first (see `add`).'''
+        return self._combine(other, operator.truediv, np.true_divide, align, fill, tolerance)
+
+    def _combine(self, other, op, ufunc, align, fill, tolerance):
+        # Applies the operator directly, or the ufunc to the aligned data points.
+        if align is None or isinstance(other, numbers.Real):
+            return op(self, other)
+        if not isinstance(other, SizedContainerTimeSeriesInterface):
+            raise NotImplementedError
+        times, values, other_values = alignment.align(self._times_array(), self._data_array(),
+                                                      other._times_array(), other._data_array(),
+                                                      align, fill, tolerance)
+        return self._with_points(times, ufunc(values, other_values))
 
     def mean(self):
         '''Returns the mean of all data points in the time series.
@@ -277,7 +647,7 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
         Returns:
             float: the mean of all data points in the time series.'''
 
-        return np.mean(list(iter(self)))
+        return self.summary().mean
 
     def iteritems(self):
         '''Returns an iterator over tuples of the time series' time and data points.
@@ -289,12 +659,14 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
 
     @property
     def lazy(self):
-        '''Returns a new instance of LazyOperation.
+        '''Returns a lazy expression evaluating to the time series.
+        Combining it with `+`, `-`, `*` and `/` builds an expression that `eval` computes
+        in one fused pass (see `expression.LazyTimeSeries`).
 
         Returns:
-            LazyOperation: a wrapper around a function not evaluated until called.'''
+            LazyTimeSeries: a wrapper around the time series not evaluated until called.'''
 
-        return LazyOperation(lambda x: x, self)
+        return LazyTimeSeries.leaf(self)
 
     def std(self):
         '''Computes the standard deviation of the time series.
@@ -302,22 +674,75 @@ class SizedContainerTimeSeriesInterface(TimeSeriesInterface):
         Returns:
             float: The standard deviation of the time series.'''
 
-        s = 0
-        mean = self.mean()
-        for i in iter(self):
-            s += (mean - i)**2
-        return math.sqrt(s / (len(self) - 1))
+        return self.summary().std
 
     def to_json(self):
-        ret = {}
-        ret['time_points'] = list(self.itertimes())
-        ret['data_points'] = list(iter(self))
-        return json.dumps(ret)
-    
+        '''Returns the JSON object `{"time_points": [...], "data_points": [...]}` as a string.'''
+        return ''.join(self.iter_json())
+
+    def iter_json(self, chunk_size=4096):
+        '''Generates the JSON encoding of `to_json` incrementally, so that at most `chunk_size`
+        points are converted to Python objects at a time.
+
+        Args:
+            chunk_size (int): The number of points encoded per chunk.
+
+        Returns:
+            iterable: An iterator over consecutive pieces of the JSON string.'''
+
+        for key, values in (('time_points', self._times_array()), ('data_points', self._data_array())):
+            yield ('{' if key == 'time_points' else ', ') + json.dumps(key) + ': ['
+            for start in range(0, len(values), chunk_size):
+                if start:
+                    yield ', '
+                yield json.dumps(values[start:start + chunk_size].tolist())[1:-1]
+            yield ']'
+        yield '}'
+
+    def write_json(self, fp, chunk_size=4096):
+        '''Streams the JSON encoding of `to_json` to a file or socket without building it in memory.
+
+        Args:
+            fp: A text file-like object with a `write` method, or a socket with `sendall`,
+                which is sent the UTF-8 encoded chunks.
+            chunk_size (int): The number of points encoded per chunk.'''
+
+        if hasattr(fp, 'write'):
+            for chunk in self.iter_json(chunk_size):
+                fp.write(chunk)
+        else:
+            for chunk in self.iter_json(chunk_size):
+                fp.sendall(chunk.encode('utf-8'))
+
+    def to_bytes(self):
+        '''Encodes the time series in the versioned binary format of `serialization.encode`.
+
+        Returns:
+            bytes: A header followed by the raw little-endian time and data buffers.'''
+
+        return serialization.encode(self._times_array(), self._data_array())
+
+    @classmethod
+    def from_bytes(cls, buf, **kwargs):
+        '''Creates a time series from bytes produced by `to_bytes`.
+        The buffers are read with `np.frombuffer`, so array-backed classes do not copy them.
+
+        Args:
+            `buf` (bytes-like): The encoded time series.
+            `kwargs`: Additional arguments for the constructor, e.g. `ident` for SMTimeSeries.
+
+        Returns:
+            SizedContainerTimeSeriesInterface subclass: The decoded time series.'''
+
+        times, data = serialization.decode(buf)
+        return cls(times, data, **kwargs)
+
 class StreamTimeSeriesInterface(TimeSeriesInterface):
     '''Creates an interface for a Timeseries with no internal storage that
     yields data based on a generator '''
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def produce(self)->tuple:
         '''Generate (time, value) tuples'''
@@ -328,4 +753,8 @@ class StreamTimeSeriesInterface(TimeSeriesInterface):
 
     @abc.abstractmethod
     def online_mean(self, chunk=1):
-        "Online mean"
\ No newline at end of file
+        "Online mean"
+
+    @abc.abstractmethod
+    def online_quantile(self, q, chunk=None, sketch=None):
+        "Online estimate of the q-quantile, in bounded memory"
\ No newline at end of file
@@ -0,0 +1,121 @@
+import numpy as np
+
+INTERPOLATION_KINDS = ('linear', 'nearest', 'previous')
+
+def interp(times, data, pts, kind='linear'):
+    '''Interpolates data sampled at `times` onto the query times `pts`.
+
+    Bounding time points are located by binary search, so a query grid of length m
+    against n samples costs O((n + m) log n). Boundary conditions are stationary:
+    query times before the first time point take the first value, and query times
+    after the last time point take the last value.
+
+    Args:
+        `times` (array_like): The n time points. Unsorted times are sorted first.
+        `data` (array_like): Either n data points, or a (k, n) matrix holding k series
+            sampled at `times`.
+        `pts` (array_like): Either m query times, or a (j, m) batch of query grids.
+            A batch used with a (k, n) `data` matrix must have j == k; row i of `pts`
+            is then the query grid of series i.
+        `kind` (str): 'linear' interpolates between the bounding points, 'nearest'
+            takes the closest point (the earlier one on ties), and 'previous' takes
+            the last point at or before each query time.
+
+    Returns:
+        ndarray: The interpolated values, with shape (m,), (j, m) or (k, m).
+
+    Raises:
+        ValueError: `kind` is not recognized, there are no time points, or the
+            shapes of `times`, `data` and `pts` are incompatible.'''
+
+    if kind not in INTERPOLATION_KINDS:
+        raise ValueError('`kind` must be one of {}'.format(', '.join(INTERPOLATION_KINDS)))
+    times = np.asarray(times, dtype=float)
+    data = np.asarray(data, dtype=float)
+    pts = np.asarray(pts, dtype=float)
+    n = len(times)
+    if n == 0:
+        raise ValueError('Cannot interpolate without time points.')
+    if data.ndim not in (1, 2) or data.shape[-1] != n:
+        raise ValueError('`data` must have the same number of columns as `times`.')
+    if pts.ndim > 2:
+        raise ValueError('`pts` must be a grid or a two-dimensional batch of grids.')
+    rowwise = data.ndim == 2 and pts.ndim == 2
+    if rowwise and pts.shape[0] != data.shape[0]:
+        raise ValueError('A batch of grids needs one grid per series.')
+
+    if n > 1 and not (np.diff(times) > 0).all():
+        order = np.argsort(times, kind='mergesort')
+        times = times[order]
+        data = data[..., order]
+
+    # Indices of the time points bounding each query time, clamped to the ends
+    hi = np.searchsorted(times, pts, side='right')
+    lo = np.clip(hi - 1, 0, n - 1)
+    hi = np.clip(hi, 0, n - 1)
+    t_lo = times[lo]
+    t_hi = times[hi]
+
+    if kind == 'nearest':
+        lo = np.where(t_hi - pts < pts - t_lo, hi, lo)
+    if kind != 'linear':
+        return _gather(data, lo, rowwise)
+
+    d_lo = _gather(data, lo, rowwise)
+    d_hi = _gather(data, hi, rowwise)
+    dt = np.where(hi > lo, t_hi - t_lo, 1.0)
+    return (d_hi - d_lo) / dt * (pts - t_lo) + d_lo
+
+def _gather(data, idx, rowwise):
+    # Selects columns `idx` from a series or from each row of a matrix.
+    if rowwise:
+        return np.take_along_axis(data, idx, axis=1)
+    return data[..., idx]
+
+def interp_regular(start, step, data, pts, kind='linear'):
+    '''Interpolates data sampled at the regular time points `start + step * i` onto `pts`.
+
+    The bounding time points of each query time are computed arithmetically rather than
+    by binary search, so the cost is O(m) for m query times. Results and boundary
+    conditions match those of `interp`.
+
+    Args:
+        `start` (numbers.Real): The first time point.
+        `step` (numbers.Real): The positive spacing of the time points.
+        `data` (array_like): Either n data points or a (k, n) matrix of k series.
+        `pts` (array_like): The m query times.
+        `kind` (str): 'linear', 'nearest' or 'previous' (see `interp`).
+
+    Returns:
+        ndarray: The interpolated values, with shape (m,) or (k, m).
+
+    Raises:
+        ValueError: `kind` is not recognized or there are no data points.'''
+
+    if kind not in INTERPOLATION_KINDS:
+        raise ValueError('`kind` must be one of {}'.format(', '.join(INTERPOLATION_KINDS)))
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    if n == 0:
+        raise ValueError('Cannot interpolate without time points.')
+    pos = regular_positions(start, step, pts)
+
+    if kind == 'nearest':
+        # Ties go to the earlier point, as in `interp`
+        return data[..., np.clip(np.ceil(pos - 0.5), 0, n - 1).astype(np.intp)]
+    lo = np.clip(np.floor(pos), 0, n - 1).astype(np.intp)
+    if kind == 'previous':
+        return data[..., lo]
+    hi = np.minimum(lo + 1, n - 1)
+    frac = np.clip(pos - lo, 0.0, 1.0)
+    d_lo = data[..., lo]
+    return d_lo + (data[..., hi] - d_lo) * frac
+
+def regular_positions(start, step, pts):
+    '''Returns the fractional indices of the time points `pts` on the axis `start + step * i`.
+    Positions within rounding error of an integer are snapped to it, so time points
+    computed from the same axis map to their exact indices.'''
+
+    pos = (np.asarray(pts, dtype=float) - start) / step
+    nearest = np.rint(pos)
+    return np.where(np.abs(pos - nearest) <= 1e-9 * np.maximum(np.abs(nearest), 1), nearest, pos)
@@ -0,0 +1,157 @@
+import collections
+import numpy as np
+
+from .interfaces import _as_real_array
+from .sink import _chunks
+
+Match = collections.namedtuple('Match', ['ident', 'time', 'corr'])
+Match.__doc__ = '''A window of a stream that correlates with a reference series: the reference
+identifier, the time of the last point of the window and the standardized correlation.'''
+
+class StreamMatcher:
+    '''Matches the recent points of a stream against reference series.
+
+    For every reference of length m, the matcher computes the standardized (Pearson)
+    correlation between the reference and the window of the last m points of the stream,
+    at every point, and reports the windows whose correlation reaches a threshold.
+
+    Points are processed in blocks. The sliding dot products of a block against all the
+    references are computed by one FFT convolution over the block and the preceding
+    history, and the window means and deviations come from prefix sums. With blocks as
+    long as the longest reference, the cost per point is O(log m) rather than the O(m) of
+    correlating each window anew; smaller blocks trade that cost for lower latency.'''
+
+    __slots__ = ('_idents', '_refs', '_lengths', '_threshold', '_block', '_history', '_seen', '_spectra')
+
+    def __init__(self, references, threshold=0.9, block=None):
+        '''Creates a matcher.
+
+            Args:
+                `references` (mapping): Maps identifiers to reference time series or
+                                        sequences of data points.
+                `threshold` (float): The smallest correlation reported as a match.
+                `block` (int): The number of points processed at a time by `match`,
+                               by default the length of the longest reference.
+
+            Raises:
+                ValueError: There are no references, or a reference has fewer than two
+                            points or constant data points.'''
+
+        if not references:
+            raise ValueError('At least one reference series is required.')
+        self._idents = list(references)
+        refs = []
+        for ident in self._idents:
+            ref = references[ident]
+            data = ref._data_array() if hasattr(ref, '_data_array') else _as_real_array(ref, 'references')
+            data = np.asarray(data, dtype=float)
+            std = data.std() if len(data) > 1 else 0.0
+            if not std > 0:
+                raise ValueError('Reference {!r} must have at least two distinct data points.'.format(ident))
+            refs.append((data - data.mean()) / std)
+        self._refs = refs
+        self._lengths = np.array([len(ref) for ref in refs])
+        self._threshold = threshold
+        self._block = int(self._lengths.max()) if block is None else block
+        if self._block < 1:
+            raise ValueError('`block` must be positive')
+        self._history = np.zeros(self._lengths.max() - 1)
+        self._seen = 0
+        self._spectra = {}
+
+    @classmethod
+    def from_storage(cls, sm, idents, threshold=0.9, block=None):
+        '''Creates a matcher against series stored with a storage manager.
+
+            Args:
+                `sm` (StorageManagerInterface): The storage manager holding the references.
+                `idents` (iterable): The identifiers of the references.
+
+            Returns:
+                StreamMatcher: A matcher (see `__init__` for the other arguments).'''
+
+        return cls({ident: sm.get(ident) for ident in idents}, threshold, block)
+
+    @property
+    def threshold(self):
+        '''The smallest correlation reported as a match.'''
+        return self._threshold
+
+    def _spectrum(self, n):
+        # The FFTs of the reversed references, zero-padded to n points, one per row
+        if n not in self._spectra:
+            padded = np.zeros((len(self._refs), n))
+            for row, ref in zip(padded, self._refs):
+                row[:len(ref)] = ref[::-1]
+            self._spectra[n] = np.fft.rfft(padded)
+        return self._spectra[n]
+
+    def correlate(self, values):
+        '''Advances the stream by a block of points and correlates its windows.
+
+            Args:
+                `values` (array_like): The next data points of the stream.
+
+            Returns:
+                ndarray: An (references, points) matrix of the correlation of each reference
+                    with the window ending at each point. Entries are NaN when fewer points
+                    than the reference length have been seen or the window is constant.'''
+
+        values = np.asarray(values, dtype=float)
+        count = len(values)
+        if not count:
+            return np.empty((len(self._refs), 0))
+        history = len(self._history)
+        raw = np.concatenate((self._history, values))
+        # Correlation is invariant to shifting the window, and shifting by the mean of the
+        # points seen keeps the prefix sums of squares accurate.
+        segment = raw - raw[max(history - self._seen, 0):].mean()
+        n = 1 << max(len(segment) - 1, 1).bit_length()
+        dots = np.fft.irfft(self._spectrum(n) * np.fft.rfft(segment, n), n)[:, history:history + count]
+
+        sums = np.concatenate(([0.0], np.cumsum(segment)))
+        squares = np.concatenate(([0.0], np.cumsum(segment * segment)))
+        ends = np.arange(history + 1, history + count + 1)
+        starts = ends - self._lengths[:, np.newaxis]
+        m = self._lengths[:, np.newaxis]
+        mean = (sums[ends] - sums[starts]) / m
+        var = (squares[ends] - squares[starts]) / m - mean * mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = dots / (m * np.sqrt(var))
+        seen = self._seen + np.arange(1, count + 1)
+        corr[(seen < m) | ~(var > 1e-12 * (squares[ends] - squares[starts]) / m)] = np.nan
+
+        self._history = raw[len(raw) - history:]
+        self._seen += count
+        return corr
+
+    def update(self, times, values):
+        '''Advances the stream by a block of points and returns the matches it completes.
+
+            Args:
+                `times`, `values` (array_like): The next time and data points of the stream.
+
+            Returns:
+                list: The Match of every reference and window whose correlation reaches the
+                    threshold, in time order.'''
+
+        times = np.asarray(times, dtype=float)
+        corr = self.correlate(values)
+        with np.errstate(invalid='ignore'):
+            rows, cols = np.nonzero(corr >= self._threshold)
+        order = np.lexsort((rows, cols))
+        return [Match(self._idents[rows[i]], float(times[cols[i]]), float(corr[rows[i], cols[i]])) for i in order]
+
+    def match(self, stream, limit=None):
+        '''Reads a stream block by block, yielding the matches as each block is processed.
+
+            Args:
+                `stream` (StreamTimeSeriesInterface): The stream to match. Streams with
+                    `produce_arrays` (e.g. SimulatedTimeSeries) are read in vectorized blocks.
+                `limit` (int): The maximum number of points to read, or None for no limit.
+
+            Returns:
+                generator: The Match tuples.'''
+
+        for times, values in _chunks(stream, self._block, limit):
+            yield from self.update(times, values)
@@ -0,0 +1,122 @@
+import struct
+import numpy as np
+
+# Binary time series encoding, version 1. All fields are little-endian.
+#
+#   offset  size  field
+#        0     4  magic b'TSBN'
+#        4     1  version
+#        5     1  flags (see FLAG_REGULAR; other bits reserved, 0)
+#        6     1  data dtype code (see DTYPES)
+#        7     1  padding
+#        8     8  number of points n (uint64)
+#       16   8*n  time points (float64), or with FLAG_REGULAR the
+#                 16-byte (start, step) pair of float64 instead
+#         item*n  data points
+MAGIC = b'TSBN'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBxQ')
+AXIS = struct.Struct('<dd')
+FLAG_REGULAR = 0x01
+TIME_DTYPE = np.dtype('<f8')
+DTYPES = {0: np.dtype('<f8'), 1: np.dtype('<f4')}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+def encode(times, data):
+    '''Encodes time and data points as bytes.
+
+    Args:
+        `times` (array_like): The time points, stored as float64.
+        `data` (array_like): The data points, stored as float32 if they already are,
+            and as float64 otherwise.
+
+    Returns:
+        bytes: The versioned binary encoding.'''
+
+    times = np.ascontiguousarray(times, dtype=TIME_DTYPE)
+    return _pack(0, times.data, data)
+
+def encode_regular(start, step, data):
+    '''Encodes the data points of a series sampled at `start + step * i` as bytes.
+    Only the start and step of the time axis are stored, not a time column.
+
+    Args:
+        `start` (numbers.Real): The first time point.
+        `step` (numbers.Real): The spacing of the time points.
+        `data` (array_like): The data points, stored as in `encode`.
+
+    Returns:
+        bytes: The versioned binary encoding.'''
+
+    return _pack(FLAG_REGULAR, AXIS.pack(start, step), data)
+
+def _pack(flags, axis, data):
+    # The header, the encoded time axis and the data points
+    data = np.asarray(data)
+    dtype = data.dtype.newbyteorder('<')
+    if dtype not in DTYPE_CODES:
+        dtype = DTYPES[0]
+    data = np.ascontiguousarray(data, dtype=dtype)
+    header = HEADER.pack(MAGIC, VERSION, flags, DTYPE_CODES[dtype], len(data))
+    return b''.join((header, axis, data.data))
+
+def decode(buf):
+    '''Decodes time and data points from bytes produced by `encode`.
+
+    The returned arrays are views of `buf` created with `np.frombuffer`, so nothing is
+    copied; they are read-only when `buf` is immutable. The time points of a regular
+    encoding (see `encode_regular`) are computed from its start and step.
+
+    Args:
+        `buf` (bytes-like): The encoded time series.
+
+    Returns:
+        tuple: The `(times, data)` ndarrays.
+
+    Raises:
+        ValueError: `buf` is not a supported encoding or is truncated.'''
+
+    flags, length, dtype = _unpack(buf)
+    if flags & FLAG_REGULAR:
+        start, step = AXIS.unpack_from(buf, HEADER.size)
+        times = start + step * np.arange(length)
+        offset = HEADER.size + AXIS.size
+    else:
+        times = np.frombuffer(buf, dtype=TIME_DTYPE, count=length, offset=HEADER.size)
+        offset = HEADER.size + length * TIME_DTYPE.itemsize
+    data = np.frombuffer(buf, dtype=dtype, count=length, offset=offset)
+    return times, data
+
+def decode_regular(buf):
+    '''Decodes the time axis and data points from bytes produced by `encode_regular`.
+
+    Args:
+        `buf` (bytes-like): The encoded time series.
+
+    Returns:
+        tuple: The `start` and `step` floats and the `data` ndarray, a view of `buf`.
+
+    Raises:
+        ValueError: `buf` is not a supported regular encoding or is truncated.'''
+
+    flags, length, dtype = _unpack(buf)
+    if not flags & FLAG_REGULAR:
+        raise ValueError('Buffer does not hold a regularly sampled time series.')
+    start, step = AXIS.unpack_from(buf, HEADER.size)
+    data = np.frombuffer(buf, dtype=dtype, count=length, offset=HEADER.size + AXIS.size)
+    return start, step, data
+
+def _unpack(buf):
+    # Checks the header and the buffer length, returning the flags, length and data dtype
+    if len(buf) < HEADER.size:
+        raise ValueError('Buffer is too short to hold a time series header.')
+    magic, version, flags, code, length = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError('Buffer does not hold an encoded time series.')
+    if version != VERSION or code not in DTYPES:
+        raise ValueError('Unsupported time series encoding version {}.'.format(version))
+    dtype = DTYPES[code]
+    axis = AXIS.size if flags & FLAG_REGULAR else length * TIME_DTYPE.itemsize
+    if len(buf) < HEADER.size + axis + length * dtype.itemsize:
+        raise ValueError('Buffer is too short for {} time series points.'.format(length))
+    return flags, length, dtype
@@ -0,0 +1,194 @@
+import collections
+import itertools
+import math
+import time
+import numpy as np
+
+from .timeseries import STAMP_STEP
+
+class SinkStats(collections.namedtuple('SinkStats', ['points', 'flushes', 'seconds', 'rejected'])):
+    '''Ingest statistics of a StreamSink: the points written, the number of flushes, the
+    seconds spent draining streams and the points dropped by flushes that failed because
+    the storage manager rejected them.'''
+
+    __slots__ = ()
+
+    @property
+    def throughput(self):
+        '''The points written per second of draining, or NaN before any draining.'''
+        return self.points / self.seconds if self.seconds > 0 else float('nan')
+
+class StreamSink:
+    '''Records a stream time series into a storage manager under one identifier.
+
+    Points are read from the stream in chunks and buffered. The buffer is appended to the
+    stored time series with the storage manager's `append` once it holds `flush_size`
+    points or `flush_interval` seconds have passed since the last flush. With a
+    FileStorageManager each flush writes only the new points, so long-running feeds are
+    recorded in memory bounded by `flush_size` and the chunk size.
+
+    The stream's time points must be increasing across the whole recording. Points that
+    `produce_arrays` stamps are stamped after the last point the sink has written, so
+    successive streams drained by one sink follow each other.'''
+
+    def __init__(self, sm, ident, chunk=1024, flush_size=65536, flush_interval=1.0, clock=time.monotonic):
+        '''Creates a sink.
+
+            Args:
+                `sm` (StorageManagerInterface): The storage manager to append to.
+                `ident` (int or string): The identifier of the recorded time series.
+                `chunk` (int): The number of points read from the stream at a time.
+                `flush_size` (int): The number of buffered points that triggers a flush.
+                `flush_interval` (float): The seconds since the last flush that trigger a flush,
+                                          or None to flush on size only.
+                `clock` (callable): The time source in seconds, `time.monotonic` by default.
+
+            Raises:
+                ValueError: `chunk` or `flush_size` is not positive.'''
+
+        if chunk < 1 or flush_size < 1:
+            raise ValueError('`chunk` and `flush_size` must be positive')
+        self._sm = sm
+        self._ident = ident
+        self._chunk = chunk
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._buffer = []
+        self._buffered = 0
+        # The latest time point written, which stamped streams are stamped after
+        self._last = -math.inf
+        self._last_flush = clock()
+        self._stats = SinkStats(0, 0, 0.0, 0)
+
+    @property
+    def stats(self):
+        '''The SinkStats of the points flushed so far.'''
+        return self._stats
+
+    def write(self, times, values):
+        '''Buffers points, flushing if a threshold is reached.
+
+            Args:
+                `times`, `values` (array_like): The time and data points to record.'''
+
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if len(times):
+            self._buffer.append((times, values))
+            self._buffered += len(times)
+            self._last = max(self._last, times.max())
+        if self._buffered >= self._flush_size or (
+                self._flush_interval is not None and self._clock() - self._last_flush >= self._flush_interval):
+            self.flush()
+
+    def flush(self):
+        '''Appends the buffered points to the stored time series.
+
+            Raises:
+                ValueError: The storage manager rejected the points (e.g. their times do not
+                            follow the stored ones). They are dropped and counted in
+                            `stats.rejected` before the error is re-raised, so the buffer is
+                            empty and the caller may catch the error and keep writing.'''
+
+        self._last_flush = self._clock()
+        if not self._buffer:
+            return
+        times = np.concatenate([t for t, v in self._buffer])
+        values = np.concatenate([v for t, v in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        try:
+            self._sm.append(self._ident, times, values)
+        except Exception:
+            self._stats = self._stats._replace(rejected=self._stats.rejected + len(times))
+            raise
+        self._stats = self._stats._replace(points=self._stats.points + len(times),
+                                           flushes=self._stats.flushes + 1)
+
+    def drain(self, stream, limit=None):
+        '''Records points from a stream until it is exhausted or `limit` points have been read,
+        then flushes.
+
+            Args:
+                `stream` (StreamTimeSeriesInterface): The stream to record. Streams with
+                    `produce_arrays` (e.g. SimulatedTimeSeries) are read in vectorized chunks.
+                `limit` (int): The maximum number of points to read, or None for no limit.
+
+            Returns:
+                SinkStats: The statistics of all points recorded by the sink.
+
+            Raises:
+                ValueError: A flush failed (see `flush`). Draining stops at the failure, and
+                            the rest of the stream is left unread.'''
+
+        start = self._clock()
+        try:
+            for times, values in _chunks(stream, self._chunk, limit, self._last):
+                self.write(times, values)
+        finally:
+            # A failed flush has already dropped the buffer, so this only flushes
+            # points read before the stream itself failed.
+            try:
+                self.flush()
+            finally:
+                self._stats = self._stats._replace(seconds=self._stats.seconds + self._clock() - start)
+        return self._stats
+
+    async def drain_async(self, stream, limit=None):
+        '''Records points from an AsyncStreamTimeSeries as `drain` does, awaiting each chunk.
+
+            Returns:
+                SinkStats: The statistics of all points recorded by the sink.
+
+            Raises:
+                ValueError: A flush failed, which stops draining as in `drain`.'''
+
+        start = self._clock()
+        count = 0
+        try:
+            while limit is None or count < limit:
+                size = self._chunk if limit is None else min(self._chunk, limit - count)
+                items = await stream.produce(size)
+                if items:
+                    points = np.array(items, dtype=float).reshape(len(items), 2)
+                    self.write(points[:, 0], points[:, 1])
+                    count += len(items)
+                if len(items) < size:
+                    break
+        finally:
+            # A failed flush has already dropped the buffer, so this only flushes
+            # points read before the stream itself failed.
+            try:
+                self.flush()
+            finally:
+                self._stats = self._stats._replace(seconds=self._stats.seconds + self._clock() - start)
+        return self._stats
+
+    def close(self):
+        '''Flushes the buffered points.'''
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _chunks(stream, chunk, limit, after=-math.inf):
+    # (times, values) arrays of up to `chunk` points from a stream. Values stamped by
+    # `produce_arrays` are STAMP_STEP apart, start after `after` and increase across chunks.
+    count = 0
+    items = stream.iteritems() if not hasattr(stream, 'produce_arrays') else None
+    while limit is None or count < limit:
+        size = chunk if limit is None else min(chunk, limit - count)
+        if items is None:
+            times, values = stream.produce_arrays(size, STAMP_STEP, after)
+        else:
+            points = np.array(list(itertools.islice(items, size)), dtype=float).reshape(-1, 2)
+            times, values = points[:, 0], points[:, 1]
+        if len(times):
+            yield times, values
+        count += len(times)
+        if len(times) < size:
+            return
@@ -5,7 +5,9 @@ from .interfaces import *
 from .storagemanager import *
 
 class SMTimeSeries(SizedContainerTimeSeriesInterface):
-    
+
+    __slots__ = ('_ident', '_sm')
+
     _fsm = None
 
     def __init__(self, time_points=None, data_points=None, ident=None, sm=None):
@@ -73,6 +75,21 @@ class SMTimeSeries(SizedContainerTimeSeriesInterface):
         '''Returns an iterator over the TimeSeries times'''
         return self._sm.get(self._ident).itertimes()
 
+    def _times_array(self):
+        return self._sm.get(self._ident)._times_array()
+
+    def _data_array(self):
+        return self._sm.get(self._ident)._data_array()
+
+    def iter_blocks(self, block_size):
+        '''Generates the time and data points in consecutive blocks read from the storage manager,
+        which for a FileStorageManager holds only one block in memory at a time.'''
+        return self._sm.iter_blocks(self._ident, block_size)
+
+    def summary(self):
+        '''Returns the summary statistics memoized on the stored time series.'''
+        return self._sm.get(self._ident).summary()
+
     def __sizeof__(self):
         '''Returns the size in bytes of the time series storage.'''
         return sys.getsizeof(self._sm.get(self._ident))
\ No newline at end of file
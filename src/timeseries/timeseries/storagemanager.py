@@ -2,9 +2,10 @@ import abc
 import numpy as np
 import os, os.path
 import sys
+import struct
 
 from .interfaces import SizedContainerTimeSeriesInterface
-from .timeseries import ArrayTimeSeries
+from .timeseries import ArrayTimeSeries, RegularTimeSeries
 
 class StorageManagerInterface(abc.ABC):
     '''An interface for managing persistent storage of time series under an identifier.'''
@@ -21,9 +22,45 @@ class StorageManagerInterface(abc.ABC):
     def get(ident) -> SizedContainerTimeSeriesInterface:
         '''Return time series associated with id `ident`.'''
 
+    def iter_blocks(self, ident, block_size):
+        '''Generates consecutive `(times, data)` blocks of at most `block_size` points of the time
+        series associated with id `ident`. Storage managers that can read part of a stored
+        time series override this to avoid loading all of it.'''
+
+        ts = self.get(ident)
+        times, data = ts._times_array(), ts._data_array()
+        for start in range(0, len(times), block_size):
+            yield times[start:start + block_size], data[start:start + block_size]
+
+    def store_blocks(self, ident, blocks, length):
+        '''Store the time series made of consecutive `(times, data)` blocks under id `ident`.
+        Each block is consumed before the next is requested, so producers may reuse their buffers.
+        Storage managers that can write part of a time series override this to avoid
+        holding all of it in memory.'''
+
+        pieces = [(np.array(times, dtype=float), np.array(data, dtype=float)) for times, data in blocks]
+        times = np.concatenate([times for times, data in pieces] or [np.empty(0)])
+        data = np.concatenate([data for times, data in pieces] or [np.empty(0)])
+        self.store(ident, ArrayTimeSeries(times, data))
+
+    def append(self, ident, time_points, data_points):
+        '''Append points after the last time point of the time series associated with id `ident`,
+        creating it if necessary. Storage managers that can extend a stored time series in
+        place override this to avoid rewriting it.'''
+
+        try:
+            ts = self.get(ident)
+            times, data = ts._times_array(), ts._data_array()
+        except KeyError:
+            times, data = np.empty(0), np.empty(0)
+        ats = ArrayTimeSeries(times, data)
+        ats.extend(time_points, data_points)
+        self.store(ident, ats)
+
 class FileStorageManager(StorageManagerInterface):
     '''Manages time series storage. 
     Underlying on-disk representation for a time series is a single npy file containing an array containing two arrays, one for data, the other for time points. 
+    A RegularTimeSeries is stored without a time column, as a single record holding its start, its step and its data points, which keep their dtype.
     The user executing the script must have r/w permissions for the storage directory.'''
     
     def __init__(self, path='/tmp/smdata', max_cache_size=4.0):
@@ -58,14 +95,31 @@ class FileStorageManager(StorageManagerInterface):
              `ts`(SizedContainerTimeSeriesInterface): The time series to store.'''
         
         fname = '{}/{}.npy'.format(self._storage, str(ident))
-        times = np.array(list(ts.itertimes()))
-        data = np.array(list(iter(ts)))
-        dstore = np.array([times, data])
+        if isinstance(ts, RegularTimeSeries):
+            data = ts._data_array()
+            dstore = np.empty((), dtype=[('start', '<f8'), ('step', '<f8'), ('data', data.dtype, (len(data),))])
+            dstore['start'], dstore['step'], dstore['data'] = ts.start, ts.step, data
+        else:
+            dstore = np.array([ts._times_array(), ts._data_array()], dtype=float)
         np.save(fname, dstore)
+        # A series adopting the caller's arrays is cached as the stored copy instead,
+        # so that later changes to those arrays cannot make the cache differ from disk
+        if getattr(ts, '_adopted', False):
+            ts = self._series(dstore)
         self._cache_store(ident, ts)
 
+    @staticmethod
+    def _series(dstore):
+        '''Builds the time series held by an array in the on-disk layout, without copying it.
+        The series owns `dstore`, so it must not be shared with the caller.'''
+
+        if dstore.ndim == 0:
+            return RegularTimeSeries._from_axis(float(dstore['start']), float(dstore['step']), dstore['data'])
+        return ArrayTimeSeries._from_arrays(dstore[0], dstore[1])
+
     def size(self, ident):
         '''Returns the length of the time series stored under the identifier `ident.`
+        Time series that are not cached are measured from their file header without being loaded.
 
         Args:
            `ident` (string): The identifier for the time series.
@@ -73,7 +127,86 @@ class FileStorageManager(StorageManagerInterface):
         Raises:
             KeyError: No time series is stored under identifier `ident`.'''
         
-        return len(self.get(ident))
+        if ident in self._cache:
+            return len(self._cache[ident])
+        dstore = self._map(ident)
+        return dstore.dtype['data'].shape[0] if dstore.ndim == 0 else dstore.shape[1]
+
+    def _map(self, ident):
+        '''Memory-maps the file storing the time series under `ident`, reading none of its points.
+
+        Raises:
+            KeyError: No time series was found under identifier `ident`.'''
+
+        try:
+            return np.load('{}/{}.npy'.format(self._storage, ident), mmap_mode='r')
+        except (OSError, ValueError):
+            raise KeyError('No time series was found associated with id `{}`'.format(ident))
+
+    def iter_blocks(self, ident, block_size):
+        '''Generates consecutive `(times, data)` blocks of at most `block_size` points of the time
+        series stored under `ident`. Uncached time series are read through a memory map,
+        so only one block at a time is held in memory.
+
+        Args:
+            `ident` (string): The identifier for the time series.
+            `block_size` (int): The maximum number of points per block.
+
+        Raises:
+            KeyError: No time series was found under identifier `ident`.'''
+
+        if ident in self._cache:
+            yield from super().iter_blocks(ident, block_size)
+            return
+        dstore = self._map(ident)
+        if dstore.ndim == 0:
+            start, step, points = float(dstore['start']), float(dstore['step']), dstore['data']
+            for lo in range(0, len(points), block_size):
+                data = np.array(points[lo:lo + block_size])
+                yield start + step * np.arange(lo, lo + len(data)), data
+        else:
+            for lo in range(0, dstore.shape[1], block_size):
+                yield np.array(dstore[0, lo:lo + block_size]), np.array(dstore[1, lo:lo + block_size])
+
+    def store_blocks(self, ident, blocks, length):
+        '''Stores the time series made of consecutive `(times, data)` blocks under an identifier,
+        writing each block to disk through a memory map as it arrives.
+        The file is replaced only once every block has been written, so `blocks` may be read
+        from the time series being replaced.
+
+        Args:
+            `ident` (string): The identifier for the time series.
+            `blocks` (iterable): Consecutive `(times, data)` pairs of arrays.
+            `length` (int): The total number of points in the blocks.
+
+        Raises:
+            ValueError: The blocks do not hold exactly `length` points.'''
+
+        fname = '{}/{}.npy'.format(self._storage, str(ident))
+        if not length:
+            self.store(ident, ArrayTimeSeries([], []))
+            return
+        partial = fname + '.part'
+        try:
+            dstore = np.lib.format.open_memmap(partial, mode='w+', dtype=float, shape=(2, length))
+            end = 0
+            for times, data in blocks:
+                if end + len(times) > length:
+                    raise ValueError('The blocks hold more than {} points.'.format(length))
+                dstore[0, end:end + len(times)] = times
+                dstore[1, end:end + len(times)] = data
+                end += len(times)
+            if end != length:
+                raise ValueError('The blocks hold {} points rather than {}.'.format(end, length))
+            dstore.flush()
+            del dstore
+            os.replace(partial, fname)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        self._cache_discard(ident)
+        self._cache_discard(str(ident))
 
     def get(self, ident):
         '''Returns the time series stored under the identifier `ident`.
@@ -91,8 +224,8 @@ class FileStorageManager(StorageManagerInterface):
         except:
             try:
                 fname = '{}/{}.npy'.format(self._storage, ident)
-                dstore = np.load(fname)
-                ats = ArrayTimeSeries(dstore[0], dstore[1])
+                # The loaded arrays are owned by the series, so its summary is memoized
+                ats = self._series(np.load(fname))
                 self._cache_store(ident, ats)
             # Raise an exception if identifier not recognized
             except:
@@ -137,6 +270,98 @@ class FileStorageManager(StorageManagerInterface):
         self._cache_order.append(ident)
         
   
+    # Size of the .npy header written by `append`, fixed so that it can be rewritten in place
+    _APPEND_HEADER_SIZE = 128
+
+    def append(self, ident, time_points, data_points):
+        '''Appends points after the last time point of the time series stored under `ident`,
+        creating it if necessary, in time proportional to the number of new points.
+
+        Appended time series are stored as a Fortran-ordered (2, n) array, in which each
+        time point is followed by its data point, behind a header of fixed size. New points
+        are written at the end of the file and only the header is rewritten. A time series
+        stored in another layout is converted once, on its first append, into a new file
+        that replaces the old one only once it has been written.
+
+        Args:
+            `ident` (string): The identifier for the time series.
+            `time_points` (sequence): An increasing sequence of time points, all greater than the
+                                      last stored time point.
+            `data_points` (sequence): A sequence of data points. Must have length equal to `time_points.`
+
+        Raises:
+            ValueError: The new points are invalid or do not come after the last time point.'''
+
+        times, data = ArrayTimeSeries._validate(time_points, data_points, monotonic=True)
+        fname = '{}/{}.npy'.format(self._storage, str(ident))
+        length = self._appendable_length(fname)
+        if length is None:
+            try:
+                ts = self.get(ident)
+                old = (ts._times_array(), ts._data_array())
+            except KeyError:
+                old = (np.empty(0), np.empty(0))
+            # The converted copy replaces the stored series only once it is complete
+            partial = fname + '.part'
+            try:
+                with open(partial, 'wb') as f:
+                    f.write(self._append_header(0))
+                self._append_points(partial, 0, *old)
+                os.replace(partial, fname)
+            except BaseException:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+            length = len(old[0])
+        if len(times):
+            if length:
+                with open(fname, 'rb') as f:
+                    f.seek(self._APPEND_HEADER_SIZE + 16 * (length - 1))
+                    last = np.frombuffer(f.read(8), dtype='<f8')[0]
+                if not times[0] > last:
+                    raise ValueError('Appended time points must be greater than the last time point.')
+            self._append_points(fname, length, times, data)
+        self._cache_discard(ident)
+        self._cache_discard(str(ident))
+
+    def _append_points(self, fname, length, times, data):
+        # Writes the points after the first `length` ones, then records the new length
+        points = np.empty((len(times), 2))
+        points[:, 0] = times
+        points[:, 1] = data
+        with open(fname, 'r+b') as f:
+            f.seek(self._APPEND_HEADER_SIZE + 16 * length)
+            f.write(points.tobytes())
+            f.truncate()
+            f.seek(0)
+            f.write(self._append_header(length + len(times)))
+
+    def _append_header(self, length):
+        # A version 1.0 .npy header for a Fortran-ordered (2, length) float64 array
+        header = "{{'descr': '<f8', 'fortran_order': True, 'shape': (2, {}), }}".format(length)
+        header = header.ljust(self._APPEND_HEADER_SIZE - 11) + '\n'
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+    def _appendable_length(self, fname):
+        # The length of a time series stored by `append`, or None if the file has another layout
+        try:
+            with open(fname, 'rb') as f:
+                if np.lib.format.read_magic(f) != (1, 0):
+                    return None
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                if f.tell() != self._APPEND_HEADER_SIZE or not fortran_order or len(shape) != 2:
+                    return None
+                return shape[1]
+        except (OSError, ValueError):
+            return None
+
+    def _cache_discard(self, ident):
+        '''Removes the time series stored under the given identifier from the cache, if present.'''
+
+        if ident in self._cache:
+            self._cache_size -= sys.getsizeof(self._cache.pop(ident))
+            self._cache_order.remove(ident)
+
     def _cache_get(self, ident):
         '''Returns the time series stored under the given identifier in the cache.
 
@@ -0,0 +1,195 @@
+import math
+import numpy as np
+
+from .sink import _chunks
+
+JOIN_HOWS = ('asof', 'outer')
+
+class StreamJoin:
+    '''A streaming, time-aligned join of several stream time series.
+
+    The streams are read incrementally and merged by time. Each output row holds a time
+    and, for every stream, its last value at or before that time (as-of semantics). With
+    `how='asof'` a row is emitted for every point of the first stream; with `how='outer'`
+    a row is emitted for every distinct time point of any stream.
+
+    Streams may deliver points out of order by at most `lateness`: after a stream has
+    produced time t, its later points are expected no earlier than `t - lateness`, and
+    points that arrive later than that are dropped and counted in `late`. A row at time t
+    is emitted once every stream has advanced past `t + lateness` or ended, so only the
+    points within the lateness window of the slowest stream are buffered. A stream that
+    stalls without ending therefore holds back every row, and the other streams' points
+    accumulate, unless `max_buffer` bounds the buffers.
+
+    The join is driven by `push` and `close`, which return the rows they complete, or by
+    iterating it: `iterchunks` and iteration read SimulatedTimeSeries and other stream time
+    series, and `achunks` and `async for` read AsyncStreamTimeSeries. The readers always
+    pull from the stream that holds back the join, so the buffers stay small.'''
+
+    __slots__ = ('_streams', '_how', '_lateness', '_tolerance', '_chunk',
+                 '_max_buffer', '_times', '_values', '_last', '_max', '_done', '_late', '_floor')
+
+    def __init__(self, streams, how='asof', lateness=0.0, tolerance=None, chunk=256, max_buffer=None):
+        '''Creates a join.
+
+            Args:
+                `streams` (sequence): The stream time series to join. They are only needed by
+                    the readers; a join driven by `push` may be given placeholders such as
+                    `[None] * k`.
+                `how` (str): 'asof' for a row per point of the first stream, or 'outer' for a
+                    row per distinct time point of any stream.
+                `lateness` (numbers.Real): How far out of order, in time, points may arrive.
+                `tolerance` (numbers.Real): The largest age of a value in a row; older values
+                    are NaN. By default a stream's last value is used however old it is.
+                `chunk` (int): The number of points read from a stream at a time.
+                `max_buffer` (int): The most points kept buffered for a stream. A stream with
+                    more emits its earliest rows without waiting for the streams behind it,
+                    whose points before those rows are then dropped as late. By default the
+                    buffers are unbounded.
+
+            Raises:
+                ValueError: No streams are given, `how` is not recognized, `lateness` is
+                            negative or `max_buffer` is not positive.'''
+
+        self._streams = list(streams)
+        k = len(self._streams)
+        if not k:
+            raise ValueError('At least one stream is required.')
+        if how not in JOIN_HOWS:
+            raise ValueError('`how` must be one of {}'.format(', '.join(JOIN_HOWS)))
+        if lateness < 0:
+            raise ValueError('`lateness` must not be negative')
+        if max_buffer is not None and max_buffer < 1:
+            raise ValueError('`max_buffer` must be positive')
+        self._how = how
+        self._lateness = lateness
+        self._tolerance = tolerance
+        self._chunk = chunk
+        self._max_buffer = max_buffer
+        self._times = [np.empty(0) for i in range(k)]
+        self._values = [np.empty(0) for i in range(k)]
+        self._last = [(-math.inf, math.nan)] * k
+        self._max = [-math.inf] * k
+        self._done = [False] * k
+        self._late = [0] * k
+        # Rows before this time have been emitted, so later points before it are late
+        self._floor = -math.inf
+
+    @property
+    def late(self):
+        '''The number of points of each stream dropped for arriving too late.'''
+        return list(self._late)
+
+    def _frontier(self):
+        # Rows before this time are emitted: those that can no longer change, and the
+        # earliest rows of a stream buffering more than `max_buffer` points (the buffers
+        # are sorted by `_emit`)
+        frontier = min(math.inf if done else top - self._lateness for top, done in zip(self._max, self._done))
+        if self._max_buffer is not None:
+            for times in self._times:
+                if len(times) > self._max_buffer:
+                    frontier = max(frontier, times[len(times) - self._max_buffer])
+        return frontier
+
+    def push(self, i, times, values):
+        '''Adds points of stream `i` and returns the rows they complete.
+
+            Args:
+                `i` (int): The index of the stream.
+                `times`, `values` (array_like): The points, in time order up to the lateness.
+
+            Returns:
+                tuple: The `(times, values)` ndarrays of the completed rows, where `values`
+                    has one row per stream and one column per time point.'''
+
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if len(times):
+            before = np.maximum.accumulate(np.concatenate(([self._max[i]], times)))
+            ok = times >= np.maximum(before[:-1] - self._lateness, self._floor)
+            self._late[i] += int(len(times) - ok.sum())
+            self._times[i] = np.concatenate((self._times[i], times[ok]))
+            self._values[i] = np.concatenate((self._values[i], values[ok]))
+            self._max[i] = float(before[-1])
+        return self._emit()
+
+    def close(self, i):
+        '''Marks stream `i` as ended and returns the rows this completes (see `push`).'''
+        self._done[i] = True
+        return self._emit()
+
+    def _emit(self):
+        # Joins the buffered points before the frontier and keeps the rest
+        for i in range(len(self._streams)):
+            order = np.argsort(self._times[i], kind='mergesort')
+            self._times[i], self._values[i] = self._times[i][order], self._values[i][order]
+        frontier = self._frontier()
+        self._floor = max(self._floor, frontier)
+        ready = []
+        for i in range(len(self._streams)):
+            times, values = self._times[i], self._values[i]
+            split = np.searchsorted(times, frontier)
+            ready.append((times[:split], values[:split]))
+            self._times[i], self._values[i] = times[split:], values[split:]
+        if self._how == 'asof':
+            rows = ready[0][0]
+        else:
+            rows = np.unique(np.concatenate([times for times, values in ready]))
+        matrix = np.empty((len(ready), len(rows)))
+        for i, (times, values) in enumerate(ready):
+            last_time, last_value = self._last[i]
+            times = np.concatenate(([last_time], times))
+            values = np.concatenate(([last_value], values))
+            idx = np.searchsorted(times, rows, side='right') - 1
+            matrix[i] = values[idx]
+            if self._tolerance is not None:
+                matrix[i, rows - times[idx] > self._tolerance] = np.nan
+            self._last[i] = (times[-1], values[-1])
+        return rows, matrix
+
+    def _lagging(self):
+        # The open stream holding back the frontier
+        return min((top, i) for i, (top, done) in enumerate(zip(self._max, self._done)) if not done)[1]
+
+    def iterchunks(self):
+        '''Reads the streams and yields the rows as they are completed.
+
+            Returns:
+                generator: `(times, values)` ndarrays as returned by `push`, never empty.'''
+
+        readers = [_chunks(stream, self._chunk, None) for stream in self._streams]
+        while not all(self._done):
+            i = self._lagging()
+            piece = next(readers[i], None)
+            times, values = self.close(i) if piece is None else self.push(i, *piece)
+            if len(times):
+                yield times, values
+
+    def __iter__(self):
+        '''Returns an iterator over the rows as `(time, value1, ..., valuek)` tuples.'''
+        for times, values in self.iterchunks():
+            yield from zip(times.tolist(), *values.tolist())
+
+    async def achunks(self):
+        '''Reads AsyncStreamTimeSeries streams and yields the rows as they are completed.
+
+            Returns:
+                async generator: `(times, values)` ndarrays as returned by `push`, never empty.'''
+
+        while not all(self._done):
+            i = self._lagging()
+            items = await self._streams[i].produce(self._chunk)
+            points = np.array(items, dtype=float).reshape(len(items), 2)
+            times, values = self.push(i, points[:, 0], points[:, 1])
+            if len(items) < self._chunk:
+                more_times, more_values = self.close(i)
+                times = np.concatenate((times, more_times))
+                values = np.concatenate((values, more_values), axis=1)
+            if len(times):
+                yield times, values
+
+    async def __aiter__(self):
+        '''An async iterator over the rows as `(time, value1, ..., valuek)` tuples.'''
+        async for times, values in self.achunks():
+            for row in zip(times.tolist(), *values.tolist()):
+                yield row
@@ -0,0 +1,534 @@
+import collections
+import math
+import numbers
+import operator
+import numpy as np
+
+class RunningStats:
+    '''Count, mean, sample variance and extrema of a stream of values in constant memory.
+
+    Values are accumulated with Welford's update, and accumulators over different parts
+    of a stream (chunks, threads or shards) are combined exactly with Chan's parallel
+    formula, so `a.merge(b)` has the statistics of the concatenated streams.'''
+
+    __slots__ = ('count', '_mean', '_m2', '_min', '_max')
+
+    def __init__(self, values=()):
+        '''Creates an accumulator, optionally over initial values.
+
+            Args:
+                `values` (array_like): Values to accumulate.'''
+
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self.update_many(values)
+
+    def update(self, value):
+        '''Adds one value in constant time.'''
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+
+    def update_many(self, values):
+        '''Adds an array of values with vectorized reductions.'''
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values):
+            chunk = RunningStats()
+            chunk.count = len(values)
+            chunk._mean = float(values.mean())
+            chunk._m2 = float(((values - chunk._mean) ** 2).sum())
+            chunk._min = float(values.min())
+            chunk._max = float(values.max())
+            self.merge(chunk)
+
+    def merge(self, other):
+        '''Combines the statistics of another accumulator into this one.
+
+            Args:
+                `other` (RunningStats): The accumulator to combine. It is not modified.
+
+            Returns:
+                RunningStats: The instance.'''
+
+        if other.count:
+            count = self.count + other.count
+            delta = other._mean - self._mean
+            self._mean += delta * other.count / count
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+            self.count = count
+            self._min = min(self._min, other._min)
+            self._max = max(self._max, other._max)
+        return self
+
+    def __add__(self, other):
+        '''Returns a new accumulator with the statistics of both.'''
+        if not isinstance(other, RunningStats):
+            return NotImplemented
+        return self.copy().merge(other)
+
+    def copy(self):
+        '''Returns an independent copy of the accumulator.'''
+        return RunningStats().merge(self)
+
+    @property
+    def mean(self):
+        '''The mean, or NaN before any value.'''
+        return self._mean if self.count else math.nan
+
+    @property
+    def var(self):
+        '''The sample variance, or NaN for fewer than two values.'''
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        '''The sample standard deviation, or NaN for fewer than two values.'''
+        return math.sqrt(self.var)
+
+    @property
+    def min(self):
+        '''The smallest value, or NaN before any value.'''
+        return self._min if self.count else math.nan
+
+    @property
+    def max(self):
+        '''The largest value, or NaN before any value.'''
+        return self._max if self.count else math.nan
+
+    def __repr__(self):
+        return '{}(count={}, mean={}, std={})'.format(type(self).__name__, self.count, self.mean, self.std)
+
+class WindowStats:
+    '''Mean, sample variance and extrema of the last `window` values of a stream.
+
+    Each update costs amortized O(1) whatever the window length. The mean and variance
+    are updated by adding the new value and removing the expired one. They are recomputed
+    from the window once every `window` updates, which bounds the accumulated rounding
+    error. The extrema are the fronts of monotonic deques of candidate values.'''
+
+    __slots__ = ('window', '_values', '_index', '_updates', '_mean', '_m2', '_mins', '_maxs')
+
+    def __init__(self, window):
+        '''Creates an empty sliding window.
+
+            Args:
+                `window` (int): The positive number of most recent values to summarize.
+
+            Raises:
+                ValueError: `window` is not a positive integer.'''
+
+        if not isinstance(window, numbers.Integral) or window < 1:
+            raise ValueError('`window` must be a positive integer')
+        self.window = window
+        self._values = collections.deque(maxlen=window)
+        self._index = 0
+        self._updates = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        # (index, value) pairs with increasing values (_mins) or decreasing values (_maxs)
+        self._mins = collections.deque()
+        self._maxs = collections.deque()
+
+    @property
+    def count(self):
+        '''The number of values in the window.'''
+        return len(self._values)
+
+    def update(self, value):
+        '''Adds a value, dropping the oldest one once the window is full.'''
+        if len(self._values) == self.window:
+            old = self._values[0]
+            n = self.window - 1
+            if n:
+                mean = self._mean - (old - self._mean) / n
+                self._m2 -= (old - self._mean) * (old - mean)
+                self._mean = mean
+            else:
+                self._mean = self._m2 = 0.0
+        self._values.append(value)
+        n = len(self._values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+        self._updates += 1
+        if self._updates >= self.window:
+            self._updates = 0
+            values = np.fromiter(self._values, dtype=float, count=n)
+            self._mean = float(values.mean())
+            self._m2 = float(((values - self._mean) ** 2).sum())
+
+        expired = self._index - self.window
+        for extremes, dominates in ((self._mins, operator.le), (self._maxs, operator.ge)):
+            while extremes and dominates(value, extremes[-1][1]):
+                extremes.pop()
+            extremes.append((self._index, value))
+            if extremes[0][0] <= expired:
+                extremes.popleft()
+        self._index += 1
+
+    def update_many(self, values):
+        '''Adds each of an array of values in turn.'''
+        for value in np.asarray(values, dtype=float).ravel().tolist():
+            self.update(value)
+
+    @property
+    def mean(self):
+        '''The mean of the window, or NaN if it is empty.'''
+        return self._mean if self._values else math.nan
+
+    @property
+    def var(self):
+        '''The sample variance of the window, or NaN for fewer than two values.'''
+        return max(self._m2, 0.0) / (len(self._values) - 1) if len(self._values) > 1 else math.nan
+
+    @property
+    def std(self):
+        '''The sample standard deviation of the window, or NaN for fewer than two values.'''
+        return math.sqrt(self.var)
+
+    @property
+    def min(self):
+        '''The smallest value in the window, or NaN if it is empty.'''
+        return self._mins[0][1] if self._mins else math.nan
+
+    @property
+    def max(self):
+        '''The largest value in the window, or NaN if it is empty.'''
+        return self._maxs[0][1] if self._maxs else math.nan
+
+class EWStats:
+    '''Exponentially weighted mean, variance and extrema of a stream, in constant time per value.
+
+    Each value is given weight `alpha` and older values decay by `1 - alpha` per update.
+    The mean and variance use the incremental exponentially weighted formulas. The extrema
+    are envelopes that jump to new extreme values and otherwise decay toward the latest
+    value at rate `alpha`.'''
+
+    __slots__ = ('alpha', 'count', '_mean', '_var', '_min', '_max')
+
+    def __init__(self, alpha=None, halflife=None):
+        '''Creates an accumulator from a smoothing factor or a half-life.
+
+            Args:
+                `alpha` (numbers.Real): The weight of each new value, in (0, 1].
+                `halflife` (numbers.Real): Alternatively, the positive number of updates
+                                           after which a value's weight has halved.
+
+            Raises:
+                ValueError: Neither or both parameters are given, or one is out of range.'''
+
+        if (alpha is None) == (halflife is None):
+            raise ValueError('Exactly one of `alpha` and `halflife` must be given')
+        if halflife is not None:
+            if not halflife > 0:
+                raise ValueError('`halflife` must be positive')
+            alpha = 1 - math.exp(-math.log(2) / halflife)
+        if not 0 < alpha <= 1:
+            raise ValueError('`alpha` must be in (0, 1]')
+        self.alpha = alpha
+        self.count = 0
+        self._mean = self._var = 0.0
+        self._min = self._max = math.nan
+
+    def update(self, value):
+        '''Adds one value in constant time.'''
+        if not self.count:
+            self._mean = self._min = self._max = value
+        else:
+            delta = value - self._mean
+            increment = self.alpha * delta
+            self._mean += increment
+            self._var = (1 - self.alpha) * (self._var + delta * increment)
+            self._min = min(value, self._min + self.alpha * (value - self._min))
+            self._max = max(value, self._max + self.alpha * (value - self._max))
+        self.count += 1
+
+    def update_many(self, values):
+        '''Adds each of an array of values in turn.'''
+        for value in np.asarray(values, dtype=float).ravel().tolist():
+            self.update(value)
+
+    @property
+    def mean(self):
+        '''The exponentially weighted mean, or NaN before any value.'''
+        return self._mean if self.count else math.nan
+
+    @property
+    def var(self):
+        '''The exponentially weighted variance, or NaN before any value.'''
+        return self._var if self.count else math.nan
+
+    @property
+    def std(self):
+        '''The exponentially weighted standard deviation, or NaN before any value.'''
+        return math.sqrt(self.var)
+
+    @property
+    def min(self):
+        '''The decaying minimum envelope, or NaN before any value.'''
+        return self._min
+
+    @property
+    def max(self):
+        '''The decaying maximum envelope, or NaN before any value.'''
+        return self._max
+
+class P2Quantile:
+    '''Estimates one quantile of a stream in constant memory with the P² algorithm
+    (Jain and Chlamtac, 1985).
+
+    Five markers track the minimum, the maximum, the target quantile and two quantiles
+    halfway to it. Each update adjusts their heights with piecewise-parabolic
+    interpolation in constant time. The estimate is exact for up to five values. For
+    continuous distributions it converges as the stream grows: with 10,000 or more
+    values from a smooth distribution, the rank error of the estimate is typically
+    well under 1%. The estimator cannot be merged; use QuantileSketch for that.'''
+
+    __slots__ = ('q', 'count', '_heights', '_positions', '_desired', '_increments')
+
+    def __init__(self, q):
+        '''Creates an estimator of the `q`-quantile.
+
+            Raises:
+                ValueError: `q` is not in [0, 1].'''
+
+        if not 0 <= q <= 1:
+            raise ValueError('`q` must be in [0, 1]')
+        self.q = q
+        self.count = 0
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * q, 4 * q, 2 + 2 * q, 4]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def update(self, value):
+        '''Adds one value in constant time.'''
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Locate the cell containing the value, extending the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+        positions, desired = self._positions, self._desired
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            desired[i] += self._increments[i]
+
+        # Move the middle markers toward their desired positions
+        for i in range(1, 4):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d):
+        # The piecewise-parabolic prediction of marker i moved by d positions
+        h, n = self._heights, self._positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                                                   + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def update_many(self, values):
+        '''Adds each of an array of values in turn.'''
+        for value in np.asarray(values, dtype=float).ravel().tolist():
+            self.update(value)
+
+    @property
+    def value(self):
+        '''The estimated quantile, or NaN before any value.'''
+        if not self.count:
+            return math.nan
+        if self.count <= 5:
+            return float(np.quantile(self._heights, self.q))
+        return self._heights[2]
+
+    def quantile(self, q):
+        '''Returns the estimated quantile; `q` must be the quantile being estimated.
+
+            Raises:
+                ValueError: `q` differs from the estimated quantile.'''
+
+        if q != self.q:
+            raise ValueError('This estimator only tracks the {}-quantile'.format(self.q))
+        return self.value
+
+class QuantileSketch:
+    '''A mergeable sketch of the distribution of a stream, in the style of the merging t-digest
+    (Dunning and Ertl, 2019), from which any quantile can be estimated.
+
+    Values are buffered and periodically merged into at most about `compression` weighted
+    centroids. The arcsine scale function keeps centroids near the tails small, so
+    extreme quantiles are estimated most accurately. Memory is O(compression) however
+    long the stream is. Sketches of different shards merge into a sketch of the
+    combined stream. With the default compression of 100, the rank error is typically
+    below 1% near the median and below 0.1% for the 1st and 99th percentiles.'''
+
+    __slots__ = ('compression', 'count', '_means', '_weights', '_buffer', '_min', '_max')
+
+    def __init__(self, compression=100, values=()):
+        '''Creates an empty sketch, optionally over initial values.
+
+            Args:
+                `compression` (numbers.Real): The accuracy parameter, at least 20.
+                                              Higher values use more memory and are more accurate.
+                `values` (array_like): Values to add.
+
+            Raises:
+                ValueError: `compression` is less than 20.'''
+
+        if not compression >= 20:
+            raise ValueError('`compression` must be at least 20')
+        self.compression = compression
+        self.count = 0
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer = []
+        self._min = math.inf
+        self._max = -math.inf
+        self.update_many(values)
+
+    def update(self, value):
+        '''Adds one value in amortized constant time.'''
+        self._buffer.append(value)
+        self.count += 1
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def update_many(self, values):
+        '''Adds an array of values.'''
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values):
+            self.count += len(values)
+            self._min = min(self._min, float(values.min()))
+            self._max = max(self._max, float(values.max()))
+            self._compress(values, np.ones(len(values)))
+
+    def merge(self, other):
+        '''Combines another sketch into this one.
+
+            Args:
+                `other` (QuantileSketch): The sketch to combine. Its statistics are not changed.
+
+            Returns:
+                QuantileSketch: The instance.'''
+
+        if other.count:
+            other._compress()
+            self.count += other.count
+            self._min = min(self._min, other._min)
+            self._max = max(self._max, other._max)
+            self._compress(other._means, other._weights)
+        return self
+
+    def __add__(self, other):
+        '''Returns a new sketch of both streams.'''
+        if not isinstance(other, QuantileSketch):
+            return NotImplemented
+        return QuantileSketch(self.compression).merge(self).merge(other)
+
+    def _compress(self, means=None, weights=None):
+        '''Merges the buffer and the given weighted values into the centroids.'''
+        parts_m, parts_w = [self._means], [self._weights]
+        if self._buffer:
+            parts_m.append(np.array(self._buffer, dtype=float))
+            parts_w.append(np.ones(len(self._buffer)))
+            self._buffer = []
+        if means is not None:
+            parts_m.append(means)
+            parts_w.append(weights)
+        means, weights = np.concatenate(parts_m), np.concatenate(parts_w)
+        if len(means) <= 1:
+            self._means, self._weights = means, weights
+            return
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order].tolist(), weights[order].tolist()
+
+        # Greedily merge neighbours while each centroid spans at most one unit of the scale
+        # function k(q) = compression / (2 pi) * asin(2q - 1)
+        total = sum(weights)
+        scale = self.compression / (2 * math.pi)
+        merged_m, merged_w = [], []
+        mean, weight, before = means[0], weights[0], 0.0
+        limit = self._limit(0.0, scale) * total
+        for m, w in zip(means[1:], weights[1:]):
+            if before + weight + w <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged_m.append(mean)
+                merged_w.append(weight)
+                before += weight
+                limit = self._limit(before / total, scale) * total
+                mean, weight = m, w
+        merged_m.append(mean)
+        merged_w.append(weight)
+        self._means, self._weights = np.array(merged_m), np.array(merged_w)
+
+    @staticmethod
+    def _limit(q, scale):
+        # The quantile one unit of the scale function beyond q
+        k = scale * math.asin(min(max(2 * q - 1, -1.0), 1.0)) + 1
+        return 1.0 if k >= scale * math.pi / 2 else (math.sin(k / scale) + 1) / 2
+
+    def quantile(self, q):
+        '''Estimates the `q`-quantile by interpolating between centroids.
+
+            Returns:
+                float: The estimate, or NaN for an empty sketch.
+
+            Raises:
+                ValueError: `q` is not in [0, 1].'''
+
+        if not 0 <= q <= 1:
+            raise ValueError('`q` must be in [0, 1]')
+        if not self.count:
+            return math.nan
+        self._compress()
+        means, weights = self._means, self._weights
+        if len(means) == 1:
+            return float(means[0])
+        # Each centroid is centred on the middle of its weight; the extremes bound the ends
+        centers = np.cumsum(weights) - weights / 2
+        target = q * self.count
+        if target <= centers[0]:
+            lo_pos, lo_val, hi_pos, hi_val = 0.0, self._min, centers[0], means[0]
+        elif target >= centers[-1]:
+            lo_pos, lo_val, hi_pos, hi_val = centers[-1], means[-1], float(self.count), self._max
+        else:
+            i = int(np.searchsorted(centers, target, side='right')) - 1
+            lo_pos, lo_val, hi_pos, hi_val = centers[i], means[i], centers[i + 1], means[i + 1]
+        if hi_pos <= lo_pos:
+            return float(lo_val)
+        return float(lo_val + (hi_val - lo_val) * (target - lo_pos) / (hi_pos - lo_pos))
+
+    def __len__(self):
+        '''The number of centroids held after merging the buffer.'''
+        self._compress()
+        return len(self._means)
@@ -5,11 +5,21 @@ import math
 import numbers
 import datetime
 import sys
+import operator
+import collections
+import itertools
 
 from .helpers import *
 from .interfaces import *
+from .interfaces import _as_real_array
+from .interpolation import interp_regular, regular_positions
+from . import serialization
+from .streamstats import RunningStats, P2Quantile
 
 class TimeSeries(SizedContainerTimeSeriesInterface):
+
+    __slots__ = ('_times', '_data', '_summary')
+
     def __init__(self, time_points, data_points):
         '''Implements the SizedContainerTimeSeriesInterface using Python lists for storage.
 
@@ -21,8 +31,8 @@ class TimeSeries(SizedContainerTimeSeriesInterface):
                 TimeSeries: A time series containing time and data points.'''
 
         super().__init__(time_points, data_points)
-        self._times = list(time_points)
-        self._data = list(data_points)
+        self._times = self._times.tolist()
+        self._data = self._data.tolist()
 
     def __len__(self):
         '''The length of the time series.
@@ -42,44 +52,198 @@ class TimeSeries(SizedContainerTimeSeriesInterface):
         '''Returns an iterator over the TimeSeries times'''
         return iter(self._times)
 
+    def _times_array(self):
+        return np.asarray(self._times)
+
+    def _data_array(self):
+        return np.asarray(self._data)
+
+    def _with_data(self, data):
+        ts = type(self).__new__(type(self))
+        ts._times = self._times
+        ts._data = np.asarray(data).tolist()
+        return ts
+
     def __sizeof__(self):
-        '''Returns the size in bytes of the time series storage.'''
-        return sys.getsizeof(self.time_points) + sys.getsizeof(self.data_points)
+        '''Returns the size in bytes of the time series storage, including the boxed points.'''
+        return (object.__sizeof__(self) + sys.getsizeof(self._times) + sys.getsizeof(self._data)
+                + sum(map(sys.getsizeof, self._times)) + sum(map(sys.getsizeof, self._data)))
 
 class ArrayTimeSeries(TimeSeries):
 
-    def __init__(self, time_points, data_points):
+    __slots__ = ('_length', '_adopted')
+
+    def __init__(self, time_points, data_points, dtype=None):
         '''Implements the SizedContainerTimeSeriesInterface using NumPy arrays for storage.
 
             Args:
-                `time_points` (sequence): A sequence of time points. Must have length equal to `data_points.`
+                `time_points` (sequence): A sequence of distinct time points. Must have length equal to `data_points.`
+                                          Unsorted points are stored sorted by time.
                 `data_points` (sequence): A sequence of data points. Must have length equal to `time_points.`
+                Sorted float64 ndarrays are stored without copying and remain shared with the caller.
+                `dtype` (numpy floating dtype): The dtype of the data points, float64 by default.
+                                                Time points are always stored as float64.
 
             Returns:
                 ArrayTimeSeries: A time series containing time and data points.'''
 
-        super().__init__(time_points, data_points)
-
-        self._length = len(time_points)
-        self._times = np.empty(self._length * 2)
-        self._data = np.empty(self._length * 2)
-        self._times[:self._length] = time_points
-        self._data[:self._length] = data_points
+        dtype = np.dtype(float if dtype is None else dtype)
+        if dtype.kind != 'f':
+            raise ValueError('`dtype` must be a floating point dtype')
+        times, data = self._validate(time_points, data_points)
+        times = np.asarray(times, dtype=float)
+        data = np.asarray(data, dtype=dtype)
+        # Binary searches and appends rely on the time points being sorted
+        if len(times) > 1 and not (np.diff(times) > 0).all():
+            order = np.argsort(times, kind='mergesort')
+            times, data = times[order], data[order]
+
+        self._length = len(times)
+        # Float arrays supplied by the caller are adopted without copying. The caller
+        # can still change them, so derived values are not memoized until they are replaced.
+        self._adopted = times is time_points and data is data_points
+        if self._adopted:
+            self._times = times
+            self._data = data
+        else:
+            self._times = np.empty(self._length * 2)
+            self._data = np.empty(self._length * 2, dtype=dtype)
+            self._times[:self._length] = times
+            self._data[:self._length] = data
 
     def __len__(self):
         return self._length
 
     def __getitem__(self, key):
-        '''Returns the data point from the TimeSeries with index = key'''
-        if key >= self._length:
-            raise IndexError('ArrayTimeSeries index out of range.')
-        return self._data[key]
+        '''Returns the data point from the TimeSeries with index = key.
+        A slice with a positive step returns an ArrayTimeSeries view sharing this instance's buffers.'''
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step < 0:
+                raise ValueError('ArrayTimeSeries slices must have a positive step.')
+            return self._view(slice(start, max(start, stop), step))
+        return self._data[self._index(key)]
 
     def __setitem__(self, key, value):
         '''Sets the data point from the TimeSeries with index = key to value'''
-        if key >= self._length:
-            raise IndexError('ArrayTimeSeries index out of range.')
+        # Raise exception if a value is not a real number
+        if not isinstance(value, numbers.Real):
+            raise ValueError('`value` must be a real number')
+        key = self._index(key)
+        self._own_data()
         self._data[key] = value
+        self._summary = None
+
+    def _index(self, key):
+        # Normalizes an integer index against the length rather than the capacity.
+        key = operator.index(key)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError('ArrayTimeSeries index out of range.')
+        return key
+
+    def between(self, start, stop):
+        '''Selects the points whose times lie in the closed interval [start, stop].
+        The bounds are found by binary search and no data is copied.
+
+            Args:
+                `start` (numbers.Real): The earliest time point to include.
+                `stop` (numbers.Real): The latest time point to include.
+
+            Returns:
+                ArrayTimeSeries: A view sharing this instance's buffers.'''
+
+        times = self._times[:self._length]
+        lo = np.searchsorted(times, start, side='left')
+        hi = np.searchsorted(times, stop, side='right')
+        return self._view(slice(lo, max(lo, hi)))
+
+    def _view(self, key):
+        # Views are read-only; writing to one first copies its data (see _own_data).
+        times = self._times[key]
+        data = self._data[key]
+        times.flags.writeable = False
+        data.flags.writeable = False
+        return self._from_arrays(times, data)
+
+    def append(self, time, value):
+        '''Appends a point after the last time point, in amortized constant time.
+
+            Args:
+                `time` (numbers.Real): A finite time point greater than the last time point.
+                `value` (numbers.Real): The data point associated with `time`.
+
+            Raises:
+                ValueError: `time` or `value` is not a real number, or `time` is not
+                    greater than the last time point.'''
+
+        if not isinstance(time, numbers.Real) or not isinstance(value, numbers.Real):
+            raise ValueError('`time` and `value` must be real numbers')
+        if not math.isfinite(time):
+            raise ValueError('`time` must be finite')
+        self._check_after_last(time)
+        self._reserve(1)
+        self._times[self._length] = time
+        self._data[self._length] = value
+        self._length += 1
+        self._summary = None
+
+    def extend(self, time_points, data_points):
+        '''Appends points after the last time point, in time proportional to the number of new points.
+
+            Args:
+                `time_points` (sequence): An increasing sequence of time points, all greater than the
+                                          last time point. Must have length equal to `data_points.`
+                `data_points` (sequence): A sequence of data points. Must have length equal to `time_points.`
+
+            Raises:
+                ValueError: The new points are invalid or do not come after the last time point.'''
+
+        times, data = self._validate(time_points, data_points, monotonic=True)
+        count = len(times)
+        if count == 0:
+            return
+        self._check_after_last(times[0])
+        self._reserve(count)
+        self._times[self._length:self._length + count] = times
+        self._data[self._length:self._length + count] = data
+        self._length += count
+        self._summary = None
+
+    def _check_after_last(self, time):
+        # Raise exception if `time` would break the increasing order of the time points
+        if self._length and not time > self._times[self._length - 1]:
+            raise ValueError('Appended time points must be greater than the last time point.')
+
+    def _reserve(self, count):
+        '''Ensures that `count` more points fit in writable buffers owned by this instance.
+        When they do not, the buffers are reallocated with at least double the capacity.'''
+
+        needed = self._length + count
+        capacity = len(self._times)
+        if needed <= capacity and self._times.flags.writeable and self._data.flags.writeable:
+            return
+        capacity = max(needed, 2 * capacity, 8)
+        times = np.empty(capacity, dtype=self._times.dtype)
+        data = np.empty(capacity, dtype=self._data.dtype)
+        times[:self._length] = self._times[:self._length]
+        data[:self._length] = self._data[:self._length]
+        self._times = times
+        self._data = data
+        self._adopted = False
+
+    def _memoizable(self):
+        # Read-only views may be changed through the series they were taken from,
+        # and adopted arrays by the caller who supplied them
+        return self._data.flags.writeable and not self._adopted
+
+    def _own_data(self):
+        '''Copies the data points into a private buffer if they are a read-only view,
+        so that writes never reach the series the view was taken from.'''
+        if not self._data.flags.writeable:
+            self._data = self._data[:self._length].copy()
+            self._adopted = False
 
     def __iter__(self):
         return iter(self._data[:self._length])
@@ -88,17 +252,363 @@ class ArrayTimeSeries(TimeSeries):
         '''Returns an iterator over the time indices for the ArrayTimeSeries.'''
         return iter(self._times[:self._length])
 
+    def _times_array(self):
+        return self._times[:self._length]
+
+    def _data_array(self):
+        return self._data[:self._length]
+
+    @classmethod
+    def _from_arrays(cls, times, data):
+        '''Creates an ArrayTimeSeries around already validated arrays without copying them.
+
+            Args:
+                `times` (ndarray): Increasing, finite float time points.
+                `data` (ndarray): Data points with the same length as `times`.
+
+            Returns:
+                ArrayTimeSeries: A time series storing `times` and `data` directly.'''
+
+        ts = cls.__new__(cls)
+        ts._length = len(times)
+        ts._adopted = False
+        ts._times = times
+        ts._data = data
+        return ts
+
+    @classmethod
+    def from_bytes(cls, buf, **kwargs):
+        # Keep float32 data in the dtype it was encoded with rather than widening it
+        times, data = serialization.decode(buf)
+        kwargs.setdefault('dtype', data.dtype)
+        return cls(times, data, **kwargs)
+
+    def _with_data(self, data):
+        # Results share a read-only view of the time points, so appending to
+        # either series can never overwrite the other's times.
+        times = self._times[:self._length]
+        times.flags.writeable = False
+        return self._from_arrays(times, data)
+
+    @SizedContainerTimeSeriesInterface._check_time_values
+    def __iadd__(self, other):
+        '''Adds a real number or another time series to the data points in place.'''
+        self._own_data()
+        self._summary = None
+        np.add(self._data_array(), self._operand(other), out=self._data_array())
+        return self
+
+    @SizedContainerTimeSeriesInterface._check_time_values
+    def __isub__(self, other):
+        '''Subtracts a real number or another time series from the data points in place.'''
+        self._own_data()
+        self._summary = None
+        np.subtract(self._data_array(), self._operand(other), out=self._data_array())
+        return self
+
+    @SizedContainerTimeSeriesInterface._check_time_values
+    def __imul__(self, other):
+        '''Multiplies the data points by a real number or another time series in place.'''
+        self._own_data()
+        self._summary = None
+        np.multiply(self._data_array(), self._operand(other), out=self._data_array())
+        return self
+
+    @SizedContainerTimeSeriesInterface._check_time_values
+    def __itruediv__(self, other):
+        '''Divides the data points by a real number or another time series in place.'''
+        self._own_data()
+        self._summary = None
+        np.true_divide(self._data_array(), self._operand(other), out=self._data_array())
+        return self
+
     def iteritems(self):
         '''Returns an iterator over the tuples (time, value) for each item in the ArrayTimeSeries.'''
         return iter(zip(self._times[:self._length], self._data[:self._length]))
 
+    def compact(self):
+        '''Releases the spare capacity by copying the points into buffers of exactly their length.
+
+            Returns:
+                ArrayTimeSeries: The instance.'''
+
+        if len(self._times) > self._length or len(self._data) > self._length:
+            self._times = self._times[:self._length].copy()
+            self._data = self._data[:self._length].copy()
+        return self
+
+    def __sizeof__(self):
+        '''Returns the size in bytes of the time series, including the capacity of its buffers.'''
+        return object.__sizeof__(self) + self._times.nbytes + self._data.nbytes
+
+class RegularTimeSeries(SizedContainerTimeSeriesInterface):
+    '''A time series sampled at the regular time points `start + step * i`.
+
+    Only the start and step of the time axis are stored, so the time points take no
+    memory and the index of a time point is found in constant time.'''
+
+    __slots__ = ('_start', '_step', '_data', '_summary', '_adopted')
+
+    def __init__(self, data_points, start=0.0, step=1.0, dtype=None):
+        '''Implements the SizedContainerTimeSeriesInterface for regularly sampled data.
+
+            Args:
+                `data_points` (sequence): A sequence of data points. Float ndarrays of `dtype`
+                                          are stored without copying and remain shared with the caller.
+                `start` (numbers.Real): The finite time of the first data point.
+                `step` (numbers.Real): The finite, positive time between consecutive data points.
+                `dtype` (numpy floating dtype): The dtype of the data points, float64 by default.
+                                                Series derived from this one (arithmetic, resampling,
+                                                rolling aggregates, interpolation) keep this dtype.
+
+            Returns:
+                RegularTimeSeries: A time series containing time and data points.
+
+            Raises:
+                TypeError: `data_points` is not a sequence.
+                ValueError: The data points are not real numbers, or `start` or `step` is invalid.'''
+
+        dtype = np.dtype(float if dtype is None else dtype)
+        if dtype.kind != 'f':
+            raise ValueError('`dtype` must be a floating point dtype')
+        if not isinstance(start, numbers.Real) or not math.isfinite(start):
+            raise ValueError('`start` must be a finite real number')
+        if not isinstance(step, numbers.Real) or not math.isfinite(step) or not step > 0:
+            raise ValueError('`step` must be a finite, positive real number')
+        try:
+            iter(data_points)
+        except TypeError:
+            raise TypeError('Parameter `data_points` must be a sequence type.')
+        self._start = float(start)
+        self._step = float(step)
+        self._data = np.asarray(_as_real_array(data_points, 'data_points'), dtype=dtype)
+        # An adopted array may still be changed by the caller (see `_memoizable`)
+        self._adopted = self._data is data_points
+
+    @classmethod
+    def from_times(cls, time_points, data_points):
+        '''Creates a RegularTimeSeries from explicit time points.
+
+            Args:
+                `time_points` (sequence): Time points of the form `start + step * i`.
+                `data_points` (sequence): A sequence of data points. Must have length equal to `time_points.`
+
+            Returns:
+                RegularTimeSeries: A time series with the same time and data points.
+
+            Raises:
+                ValueError: The time points are not regularly spaced, or the lengths differ.'''
+
+        times, data = cls._validate(time_points, data_points, monotonic=True)
+        axis = _regular_axis(times)
+        if axis is None:
+            raise ValueError('`time_points` must be regularly spaced')
+        return cls(data, *axis)
+
+    @property
+    def start(self):
+        '''The time of the first data point.'''
+        return self._start
+
+    @property
+    def step(self):
+        '''The time between consecutive data points.'''
+        return self._step
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def itertimes(self):
+        '''Returns an iterator over the time points, computed from the start and step.'''
+        return iter(self._times_array())
+
+    def iteritems(self):
+        '''Returns an iterator over the tuples (time, value) for each item in the RegularTimeSeries.'''
+        return iter(zip(self._times_array(), self._data))
+
+    def _times_array(self):
+        return self._start + self._step * np.arange(len(self._data))
+
+    def _data_array(self):
+        return self._data
+
+    def time_at(self, index):
+        '''Returns the time point of the data point at `index`, in constant time.
+
+            Raises:
+                IndexError: `index` is out of range.'''
+
+        return self._start + self._step * self._index(index)
+
+    def index_of(self, time):
+        '''Returns the index of the data point at time `time`, in constant time.
+
+            Raises:
+                ValueError: `time` is not one of the time points.'''
+
+        pos = float(regular_positions(self._start, self._step, time))
+        if not pos.is_integer() or not 0 <= pos < len(self._data):
+            raise ValueError('{} is not a time point of the time series.'.format(time))
+        return int(pos)
+
+    def _index(self, key):
+        # Normalizes an integer index, allowing negative indices.
+        key = operator.index(key)
+        if key < 0:
+            key += len(self._data)
+        if not 0 <= key < len(self._data):
+            raise IndexError('RegularTimeSeries index out of range.')
+        return key
+
+    def __getitem__(self, key):
+        '''Returns the data point with index = key.
+        A slice with a positive step returns a RegularTimeSeries view sharing this instance's data.'''
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self._data))
+            if step < 0:
+                raise ValueError('RegularTimeSeries slices must have a positive step.')
+            data = self._data[start:max(start, stop):step]
+            data.flags.writeable = False
+            return self._from_axis(self._start + self._step * start, self._step * step, data)
+        return self._data[self._index(key)]
+
+    def __setitem__(self, key, value):
+        '''Sets the data point with index = key to value'''
+        if not isinstance(value, numbers.Real):
+            raise ValueError('`value` must be a real number')
+        key = self._index(key)
+        if not self._data.flags.writeable:
+            self._data = self._data.copy()
+            self._adopted = False
+        self._data[key] = value
+        self._summary = None
+
+    def between(self, start, stop):
+        '''Selects the points whose times lie in the closed interval [start, stop].
+        The bounds are computed in constant time and no data is copied.
+
+            Returns:
+                RegularTimeSeries: A view sharing this instance's data.'''
+
+        lo, hi = regular_positions(self._start, self._step, [start, stop])
+        lo = max(int(np.ceil(lo)), 0)
+        hi = min(int(np.floor(hi)) + 1, len(self._data))
+        return self[lo:max(lo, hi)]
+
+    def _memoizable(self):
+        # Read-only views may be changed through the series they were taken from,
+        # and adopted arrays by the caller who supplied them
+        return self._data.flags.writeable and not self._adopted
+
+    @classmethod
+    def _from_axis(cls, start, step, data):
+        # Creates a RegularTimeSeries around validated values without copying `data`
+        ts = cls.__new__(cls)
+        ts._start = start
+        ts._step = step
+        ts._data = data
+        ts._adopted = False
+        return ts
+
+    def _with_data(self, data):
+        return self._from_axis(self._start, self._step, data)
+
+    def _with_points(self, times, data):
+        # Regularly spaced results stay regular; others need explicit time points.
+        # Either way they keep the dtype of this series' data points.
+        axis = _regular_axis(times)
+        if axis is None:
+            return ArrayTimeSeries(times, data, dtype=self._data.dtype)
+        return self._from_axis(axis[0], axis[1], np.asarray(data, dtype=self._data.dtype))
+
+    def _same_times(self, other):
+        '''Determines whether `other` has the same time points as the instance.
+        Two RegularTimeSeries are compared by their start, step and length alone.'''
+
+        if isinstance(other, RegularTimeSeries):
+            if len(self) != len(other):
+                return False
+            return len(self) == 0 or (self._start == other._start and (self._step == other._step or len(self) == 1))
+        return super()._same_times(other)
+
+    def interpolate(self, pts, kind='linear'):
+        '''Generates new interpolated values for the RegularTimeSeries given unseen times.
+        Bounding points are found arithmetically rather than by binary search.
+
+        Args:
+            pts: a list of time values, or a two-dimensional batch of such lists
+            kind (str): 'linear', 'nearest' or 'previous' (see `interpolation.interp`)
+
+        Returns:
+            A RegularTimeSeries if `pts` is regularly spaced and an ArrayTimeSeries otherwise,
+            or a list of them if `pts` is a batch.'''
+
+        if not isinstance(pts, (np.ndarray, list, tuple, range)):
+            pts = list(pts)
+        pts = np.asarray(pts, dtype=float)
+        if pts.ndim == 2:
+            return [self.interpolate(p, kind) for p in pts]
+        return self._with_points(pts, interp_regular(self._start, self._step, self._data, pts, kind))
+
+    def interpolate_regular(self, start, step, count, kind='linear'):
+        '''Interpolates onto the regular time points `start + step * i` for i < `count`.
+        Neither time axis is materialized for a search, so the cost is O(count).
+
+        Returns:
+            RegularTimeSeries: The interpolated time series.'''
+
+        # Constructing the empty series validates the new axis
+        result = type(self)((), start, step)
+        pts = result._start + result._step * np.arange(count)
+        result._data = interp_regular(self._start, self._step, self._data, pts, kind).astype(self._data.dtype, copy=False)
+        return result
+
+    def to_bytes(self):
+        '''Encodes the time series with `serialization.encode_regular`, storing its start
+        and step in place of a time column.'''
+
+        return serialization.encode_regular(self._start, self._step, self._data)
+
+    @classmethod
+    def from_bytes(cls, buf, **kwargs):
+        # Only regular encodings can be decoded without checking every time point
+        start, step, data = serialization.decode_regular(buf)
+        kwargs.setdefault('dtype', data.dtype)
+        return cls(data, start, step, **kwargs)
+
     def __sizeof__(self):
-        '''Returns the size in bytes of the time series storage.'''
-        return sys.getsizeof(self._times) + sys.getsizeof(self._data)
+        '''Returns the size in bytes of the time series, which stores no time points.'''
+        return object.__sizeof__(self) + self._data.nbytes
+
+def _regular_axis(times):
+    # The (start, step) whose axis `start + step * i` reproduces `times` exactly, or None
+    times = np.asarray(times, dtype=float)
+    n = len(times)
+    if n < 2:
+        return (float(times[0]) if n else 0.0), 1.0
+    start = times[0]
+    for step in (times[1] - start, (times[-1] - start) / (n - 1)):
+        if step > 0 and np.array_equal(start + step * np.arange(n), times):
+            return float(start), float(step)
+    return None
+
+# The default time offset between consecutive points stamped by `produce_arrays`
+STAMP_STEP = 1e-6
+
+# Marks the end of a generator, which may itself yield None
+_END = object()
 
 class SimulatedTimeSeries(StreamTimeSeriesInterface):
     '''A time series with no internal storage.
-    Yields data from a supplied generator, either with or without times provided.'''
+    Yields data from a supplied generator, either with or without times provided.
+    The generator may yield single values, (time, value) tuples, ndarray blocks of values,
+    or (times, values) tuples of ndarray blocks.'''
+
+    __slots__ = ('_gen', '_index', '_pending', '_stamp')
 
 
     def __init__(self, generator):
@@ -108,6 +618,10 @@ class SimulatedTimeSeries(StreamTimeSeriesInterface):
             self._index = 0
         except:
             raise TypeError('Parameter `generator` must be a sequence type.')
+        # Points pulled from the generator but not yet produced, as (times or None, values) arrays
+        self._pending = collections.deque()
+        # The last time stamped by `produce_arrays`
+        self._stamp = -math.inf
 
 
     def __iter__(self):
@@ -116,17 +630,20 @@ class SimulatedTimeSeries(StreamTimeSeriesInterface):
 
     def __next__(self):
         '''An iterator that gets a new data point from produce'''
-        return self.produce()[0][1]
+        return self._next_item()[1]
 
     def iteritems(self):
         '''An iterator that gets a new (time,value) tuple from produce'''
         while True:
-            yield self.produce()[0]
+            try:
+                yield self._next_item()
+            except StopIteration:
+                return
 
     def itertimes(self):
         '''An iterator that gets a new time from produce'''
-        while True:
-            yield self.produce()[0][0]
+        for time, value in self.iteritems():
+            yield time
 
     def __repr__(self):
         format_str = '{}([{}])'
@@ -143,46 +660,197 @@ class SimulatedTimeSeries(StreamTimeSeriesInterface):
         Returns:
             list: list of (time, value) tuples.'''
 
-        values = []
-        for i in range(chunk):
+        return [self._next_item() for i in range(chunk)]
+
+    def _next_item(self):
+        '''Returns the next (time, value) tuple, stamping values without a time.
+
+        Raises:
+            StopIteration: The generator is exhausted.'''
+
+        while not self._pending:
             value = next(self._gen)
-            if type(value) == tuple:
-                values.append(value)
-            else:
-                values.append((int(datetime.datetime.now().timestamp()), value))
-        return values
+            if not _is_block(value):
+                if type(value) == tuple:
+                    return value
+                return (int(datetime.datetime.now().timestamp()), value)
+            self._pending.extend(_segments([value]))
+        times, values = self._pending.popleft()
+        if len(values) > 1:
+            self._pending.appendleft((None if times is None else times[1:], values[1:]))
+        if times is None:
+            return (int(datetime.datetime.now().timestamp()), values[0].item())
+        return (times[0].item(), values[0].item())
+
+    def produce_arrays(self, chunk=1, step=STAMP_STEP, after=-math.inf):
+        '''Generates up to `chunk` points at once as a pair of float ndarrays.
+
+        Values are pulled from the generator in bulk, and ndarray blocks are used as they are.
+        Values without a time are stamped from a single read of the clock per call: the
+        i-th point of the chunk is given the Unix time, at full resolution, plus `i * step`.
+        With a positive `step` the stamps also increase across calls, and start after
+        `after`: a chunk read before the clock has passed the previous stamp continues
+        from it. A `step` of 0 gives all the points of a chunk the same stamp.
+
+        Args:
+            chunk (int): the maximum number of points to produce
+            step (numbers.Real): the time offset between consecutive stamped points, STAMP_STEP by default
+            after (numbers.Real): a time the stamps must follow, such as the last time
+                                  already recorded from an earlier stream
+
+        Returns:
+            tuple: the (times, values) ndarrays, shorter than `chunk` only when the
+                generator is exhausted.'''
+
+        times_parts, value_parts = [], []
+        stamp = None
+        count = 0
+        while count < chunk:
+            if not self._pending:
+                first = next(self._gen, _END)
+                if first is _END:
+                    break
+                items = [first]
+                if not _is_block(first):
+                    items.extend(itertools.islice(self._gen, chunk - count - 1))
+                self._pending.extend(_segments(items))
+                continue
+            times, values = self._pending.popleft()
+            take = chunk - count
+            if len(values) > take:
+                self._pending.appendleft((None if times is None else times[take:], values[take:]))
+                times, values = (None if times is None else times[:take]), values[:take]
+            if times is None:
+                if stamp is None:
+                    stamp = datetime.datetime.now().timestamp()
+                    if step > 0:
+                        stamp = max(stamp, self._stamp + step, after + step)
+                times = stamp + step * np.arange(count, count + len(values), dtype=float)
+                self._stamp = times[-1]
+            times_parts.append(times)
+            value_parts.append(values)
+            count += len(values)
+        if not value_parts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(times_parts), np.concatenate(value_parts)
+
+    def iterchunks(self, chunk, step=STAMP_STEP, after=-math.inf):
+        '''Returns an iterator over successive (times, values) ndarray pairs of `produce_arrays`
+        until the generator is exhausted.'''
+
+        while True:
+            times, values = self.produce_arrays(chunk, step, after)
+            if not len(values):
+                return
+            yield times, values
 
     def online_std(self, chunk=1)->StreamTimeSeriesInterface:
         "Online standard deviation"
         def gen():
-            n = 0
-            mu = 0
-            dev_accum = 0
-            for i in range(chunk):
-                tmp = next(self._gen)
-                (time, value) = (tmp[0], tmp[1])
-                n += 1
-                delta = value - mu
-                dev_accum=dev_accum+(value-mu)*(value-mu-delta/n)
-                mu = mu + delta/n
-                if n==1:
-                    stddev = 0
-                    yield (time, stddev)
-                elif n > 1:
-                    stddev = math.sqrt(dev_accum/(n-1))
-                    yield (time, stddev)
+            for time, std in self.online_stats(RunningStats(), 'std', chunk).iteritems():
+                # A single value has no spread
+                yield (time, 0 if math.isnan(std) else std)
         return SimulatedTimeSeries(gen())
 
     def online_mean(self, chunk=1)->StreamTimeSeriesInterface:
         "Online mean"
+        return self.online_stats(RunningStats(), 'mean', chunk)
+
+    def online_quantile(self, q, chunk=None, sketch=None)->StreamTimeSeriesInterface:
+        '''Streams an estimate of the `q`-quantile of the values produced so far, in bounded memory.
+
+        Args:
+            q (float): The quantile to estimate, in [0, 1], e.g. 0.99 for the 99th percentile.
+            chunk (int): The number of values to consume, or None to consume them all.
+            sketch: The estimator to update. By default a P2Quantile, which costs constant
+                time and memory per value. A `streamstats.QuantileSketch` can estimate other
+                quantiles afterwards and be merged with the sketches of other streams.
+
+        Returns:
+            SimulatedTimeSeries: A stream of (time, estimate) tuples.'''
+
+        if sketch is None:
+            sketch = P2Quantile(q)
         def gen():
-            n = 0
-            mu = 0
-            for i in range(chunk):
-                tmp = next(self._gen)
-                (time, value) = (tmp[0], tmp[1])
-                n += 1
-                delta = value - mu
-                mu = mu + delta/n
-                yield (time, mu)
+            count = 0
+            while chunk is None or count < chunk:
+                try:
+                    (time, value) = self._next_item()
+                except StopIteration:
+                    return
+                sketch.update(value)
+                count += 1
+                yield (time, sketch.quantile(q))
         return SimulatedTimeSeries(gen())
+
+    def online_stats(self, accumulator, stat='mean', chunk=None)->StreamTimeSeriesInterface:
+        '''Streams a statistic of the values produced so far, updated in constant time per value.
+
+        Args:
+            accumulator: A `streamstats` accumulator, e.g. RunningStats for all values so far,
+                WindowStats for the most recent values or EWStats for exponential weighting.
+                It is updated as the stream is consumed and can be merged or inspected afterwards.
+            stat (str): The accumulator property to stream: 'mean', 'var', 'std', 'min' or 'max'.
+            chunk (int): The number of values to consume, or None to consume them all.
+
+        Returns:
+            SimulatedTimeSeries: A stream of (time, statistic) tuples.'''
+
+        def gen():
+            count = 0
+            while chunk is None or count < chunk:
+                try:
+                    (time, value) = self._next_item()
+                except StopIteration:
+                    return
+                accumulator.update(value)
+                count += 1
+                yield (time, getattr(accumulator, stat))
+        return SimulatedTimeSeries(gen())
+
+
+def _is_block(item):
+    # Whether a generator item is an ndarray block or a (times, values) tuple of blocks
+    if isinstance(item, np.ndarray):
+        return item.ndim > 0
+    return type(item) == tuple and len(item) == 2 and np.ndim(item[1]) > 0
+
+def _segments(items):
+    '''Converts generator items to a list of (times or None, values) float ndarray pairs,
+    converting runs of scalar items with one array conversion each.'''
+
+    if not _is_block(items[0]):
+        try:
+            arr = np.array(items, dtype=float)
+        except (TypeError, ValueError):
+            arr = None
+        if arr is not None and arr.shape == (len(items),) and type(items[0]) != tuple:
+            return [(None, arr)]
+        if arr is not None and arr.shape == (len(items), 2) and type(items[0]) == tuple:
+            return [(arr[:, 0], arr[:, 1])]
+    # Mixed items are split into blocks and runs of the same kind of scalar item
+    segments, run = [], []
+    for item in items:
+        if _is_block(item):
+            if run:
+                segments.append(_run_segment(run))
+                run = []
+            if type(item) == tuple:
+                segments.append((np.asarray(item[0], dtype=float).ravel(), np.asarray(item[1], dtype=float).ravel()))
+            else:
+                segments.append((None, np.asarray(item, dtype=float).ravel()))
+        else:
+            if run and (type(item) == tuple) != (type(run[0]) == tuple):
+                segments.append(_run_segment(run))
+                run = []
+            run.append(item)
+    if run:
+        segments.append(_run_segment(run))
+    return segments
+
+def _run_segment(run):
+    # Converts a run of values, or of (time, value) tuples, to a segment
+    arr = np.array(run, dtype=float)
+    if type(run[0]) == tuple:
+        return arr[:, 0], arr[:, 1]
+    return None, arr
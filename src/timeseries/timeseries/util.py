@@ -21,9 +21,8 @@ def stand(x, m, s):
     Output:
     A timeseries with mean 0 and standard deviation 1
     '''
-    vals = np.array(list(iter(x)))
-    vals = (vals - m)/s
-    return TimeSeries(list(x.itertimes()),vals)
+    vals = (np.asarray(x) - m)/s
+    return TimeSeries(x._times_array(), vals)
 
 def ccor(ts1, ts2):
     '''Given two standardized time series, compute their cross-correlation using FFT.
@@ -34,8 +33,8 @@ def ccor(ts1, ts2):
     Returns: 
         float: The dot product of the timeseries for different shift of `ts2`'''
 
-    f1 = nfft.fft(list(iter(ts1)))
-    f2 = nfft.fft(np.flipud(list(iter(ts2))))
+    f1 = nfft.fft(np.asarray(ts1))
+    f2 = nfft.fft(np.flipud(np.asarray(ts2)))
     cc = np.real(nfft.ifft(f1 * f2))/(abs(ts1)*abs(ts2))
     return cc
 
@@ -72,7 +71,7 @@ def kernel_corr(ts1, ts2, mult=1):
     exp_ccorts = np.exp(mult*ccorts)
     exp_ts1 = np.exp(mult*cc1)
     exp_ts2 = np.exp(mult*cc2)
-    return sum(exp_ccorts)/np.sqrt(sum(exp_ts1)*sum(exp_ts2))
+    return np.sum(exp_ccorts)/np.sqrt(np.sum(exp_ts1)*np.sum(exp_ts2))
 
 def generate_timeseries(count, path):
     '''Generates `count` random time series in `path`.'''
@@ -82,8 +81,10 @@ def generate_timeseries(count, path):
         s = np.random.random()
         times = np.arange(0.0, 1.0, 0.01)
         vals = norm.pdf(times, m, s) + 0.1*np.random.randn(100)
-        # This will store the time series data as an .npy file in `path`
-        ts = SMTimeSeries(time_points=times, data_points=vals, sm=fsm)
+        # This will store the time series data as an .npy file in `path`,
+        # without a time column since the time points are regularly spaced
+        ident = abs(hash((tuple(times), tuple(vals))))
+        fsm.store(ident, RegularTimeSeries(vals, start=0.0, step=0.01))
 
 def generate_vantage_points(db_count, timeseries_path, db_path):
     '''Generates `db_count` databases in `db_path` from the time series files in `timeseries_path`.'''
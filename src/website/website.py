@@ -178,8 +178,8 @@ def create_entry():
     msg = sock.recv(65000)
     ts = TimeSeries(req['time_points'], req['data_points'])
     
-    mean = ts.mean()  # Get mean and standard deviation from object
-    std = ts.std()
+    summary = ts.summary()  # Get mean and standard deviation from object
+    mean, std = summary.mean, summary.std
     blarg = random.random()
     level = random.choice(["A", "B", "C", "D", "E", "F"])
     fpath = ''
@@ -24,6 +24,7 @@ from os.path import isfile
 from sys import getsizeof
 from operator import neg, sub, add
 from itertools import combinations as combos
+import asyncio
 
 from context import *
 
@@ -124,6 +125,34 @@ def test_SMTimeSeries():
     for i in range(10):
         assert SMTimeSeries.from_db(i) == fsm.get(i)
 
+'''
+Functions being tested: SMTimeSeries, store
+Summary: Unsorted points are stored sorted, and the cache does not share the caller's arrays
+'''
+def test_SMTimeSeries_unsorted():
+    fsm = FileStorageManager()
+    times, values = np.array([3.0, 1.0, 2.0]), np.array([30.0, 10.0, 20.0])
+    sm = SMTimeSeries(times, values, ident='unsorted', sm=fsm)
+    assert list(sm.itertimes()) == [1, 2, 3] and list(sm) == [10, 20, 30]
+    times, values = np.arange(3.0), np.arange(3.0)
+    fsm.store('adopted', ArrayTimeSeries(times, values))
+    values[0] = 100
+    assert list(fsm.get('adopted')) == [0, 1, 2]
+
+'''
+Functions being tested: get, SMTimeSeries summary
+Summary: Series loaded from storage memoize their summary
+'''
+def test_summary_loaded():
+    fsm = FileStorageManager()
+    fsm.store('summarized', ArrayTimeSeries([1.0, 2.0, 4.0], [1.0, 5.0, 3.0]))
+    fsm.store('summarized_regular', RegularTimeSeries([1.0, 5.0, 3.0]))
+    fsm._cache.clear()
+    fsm._cache_order.clear()
+    for ident in ('summarized', 'summarized_regular'):
+        sm = SMTimeSeries(ident=ident, sm=fsm)
+        assert sm.summary() is sm.summary() and sm.summary().max == 5
+
 '''
 Functions being tested: caching of time series operations
 Summary: Tests whether the FileStorageManager is caching the results of operations on SMTimeSeries
@@ -154,3 +183,154 @@ def test_cache_ops():
     t = -SMTimeSeries.from_db(0)
     assert -tseries[0] == fsm._cache[t._ident]
     
+
+'''
+Functions being tested: store, get with RegularTimeSeries
+Summary: Regular time series are stored without a time column and restored as such
+'''
+def test_store_regular():
+    fsm = FileStorageManager()
+    rts = RegularTimeSeries(np.arange(1000.0), start=5, step=0.25)
+    fsm.store('regular', rts)
+    stored = np.load('{}/regular.npy'.format(fsm._storage))
+    assert stored['data'].shape == (1000,)
+    fsm._cache.clear()
+    fsm._cache_order.clear()
+    restored = fsm.get('regular')
+    assert isinstance(restored, RegularTimeSeries)
+    assert restored.start == 5 and restored.step == 0.25 and restored == rts
+    rts = RegularTimeSeries(np.arange(10.0) / 3, start=0.1, step=0.1, dtype=np.float32)
+    fsm.store('regular32', rts)
+    fsm._cache.clear()
+    fsm._cache_order.clear()
+    assert fsm.size('regular32') == 10
+    times, data = next(fsm.iter_blocks('regular32', 4))
+    assert data.dtype == np.float32 and np.allclose(times, [0.1, 0.2, 0.3, 0.4])
+    restored = fsm.get('regular32')
+    assert restored._data_array().dtype == np.float32 and restored.start == 0.1 and restored == rts
+
+'''
+Functions being tested: size, iter_blocks, store_blocks
+Summary: Stored time series are measured and streamed in blocks without being loaded
+'''
+def test_blocks():
+    fsm = FileStorageManager()
+    ats = ArrayTimeSeries(np.arange(2500.0), np.random.randn(2500))
+    fsm.store('blocks', ats)
+    fsm.store('regular_blocks', RegularTimeSeries(np.arange(2500.0), start=1, step=2))
+    fsm._cache.clear()
+    fsm._cache_order.clear()
+    assert fsm.size('blocks') == fsm.size('regular_blocks') == 2500
+    assert 'blocks' not in fsm._cache
+    blocks = list(fsm.iter_blocks('blocks', 1000))
+    assert [len(t) for t, d in blocks] == [1000, 1000, 500]
+    assert np.array_equal(np.concatenate([d for t, d in blocks]), ats._data_array())
+    times = np.concatenate([t for t, d in fsm.iter_blocks('regular_blocks', 999)])
+    assert np.array_equal(times, 1 + 2 * np.arange(2500.0))
+    fsm.store_blocks('blocks', ((t, d * 2) for t, d in fsm.iter_blocks('blocks', 700)), 2500)
+    assert fsm.get('blocks') == 2 * ats
+    with raises(ValueError):
+        fsm.store_blocks('blocks', fsm.iter_blocks('blocks', 700), 2499)
+    assert not isfile('{}/blocks.npy.part'.format(fsm._storage))
+    assert fsm.get('blocks') == 2 * ats
+
+'''
+Functions being tested: LazyTimeSeries eval_into
+Summary: Lazy expressions over stored series are evaluated block by block into storage
+'''
+def test_eval_into():
+    fsm = FileStorageManager()
+    a = ArrayTimeSeries(np.arange(5000.0), np.random.randn(5000))
+    b = ArrayTimeSeries(np.arange(5000.0), np.random.randn(5000))
+    sa = SMTimeSeries(a._times_array(), a._data_array(), ident='lazy_a', sm=fsm)
+    sb = SMTimeSeries(b._times_array(), b._data_array(), ident='lazy_b', sm=fsm)
+    fsm._cache.clear()
+    fsm._cache_order.clear()
+    result = ((sa.lazy + sb) * 2 - a).eval_into(fsm, 'lazy_result', chunk_size=777)
+    assert isinstance(result, SMTimeSeries)
+    assert np.allclose(result._data_array(), ((a + b) * 2 - a)._data_array())
+    sa.lazy.eval_into(fsm, 'lazy_copy', chunk_size=1000)
+    assert fsm.get('lazy_copy') == a
+    (sa.lazy * 0).eval_into(fsm, 'lazy_a')
+    assert fsm.get('lazy_a') == 0
+    with raises(ValueError):
+        (sb.lazy + ArrayTimeSeries(np.arange(1.0, 5001.0), np.zeros(5000))).eval_into(fsm, 'lazy_bad', chunk_size=1000)
+
+'''
+Functions being tested: FileStorageManager append, StreamSink
+Summary: Points are appended to stored series and streams are recorded through a sink
+'''
+def test_append_sink():
+    fsm = FileStorageManager()
+    fsm.store('appended', RegularTimeSeries([1.0, 2.0], start=0.0, step=1.0))
+    fsm.append('appended', [2.0, 3.0], [3.0, 4.0])
+    fsm.append('appended', [], [])
+    fsm.append('appended', [4.0], [5.0])
+    assert fsm.get('appended') == ArrayTimeSeries(np.arange(5.0), np.arange(1.0, 6.0))
+    assert fsm.size('appended') == 5
+    with raises(ValueError):
+        fsm.append('appended', [4.0], [0.0])
+    assert len(fsm.get('appended')) == 5
+    fsm.store('converted', ArrayTimeSeries([1.0, 2.0], [1.0, 2.0]))
+    original = fsm._append_points
+    def fail(*args):
+        raise OSError('disk full')
+    fsm._append_points = fail
+    with raises(OSError):
+        fsm.append('converted', [3.0], [3.0])
+    fsm._append_points = original
+    assert fsm.get('converted') == ArrayTimeSeries([1.0, 2.0], [1.0, 2.0])
+    assert not isfile('{}/converted.npy.part'.format(fsm._storage))
+
+    fsm.store('sunk', ArrayTimeSeries([-1.0], [-1.0]))
+    ticks = iter(range(1000))
+    sink = StreamSink(fsm, 'sunk', chunk=100, flush_size=250, flush_interval=None, clock=lambda: next(ticks))
+    stats = sink.drain(SimulatedTimeSeries((t, float(t)) for t in range(1000)), limit=900)
+    assert stats.points == 900 and stats.flushes == 3
+    assert stats.throughput == 900 / stats.seconds
+    with StreamSink(fsm, 'sunk', chunk=64) as sink:
+        sink.drain(SimulatedTimeSeries((t, float(t)) for t in range(900, 1000)))
+    ts = fsm.get('sunk')
+    assert ts == ArrayTimeSeries(np.arange(-1.0, 1000.0), np.arange(-1.0, 1000.0))
+    async def record():
+        stream = AsyncStreamTimeSeries((t, float(t)) for t in range(1000, 1300))
+        return await StreamSink(fsm, 'sunk', chunk=128).drain_async(stream)
+    assert asyncio.run(record()).points == 300
+
+    fsm.store('stamped', ArrayTimeSeries([0.0], [0.0]))
+    stats = StreamSink(fsm, 'stamped', chunk=7).drain(SimulatedTimeSeries(iter(range(50))))
+    assert stats.points == 50 and np.all(np.diff(fsm.get('stamped')._times_array()) > 0)
+    fsm.store('restamped', ArrayTimeSeries([0.0], [0.0]))
+    with StreamSink(fsm, 'restamped', chunk=1000) as sink:
+        for i in range(3):
+            sink.drain(SimulatedTimeSeries(iter(np.zeros(300000))))
+    assert fsm.size('restamped') == 900001 and np.all(np.diff(fsm.get('restamped')._times_array()) > 0)
+    sink = StreamSink(fsm, 'stamped', chunk=5, flush_size=5)
+    with raises(ValueError):
+        sink.drain(SimulatedTimeSeries(zip([3, 2, 1, 4, 5, 6], range(6))))
+    sink.close()
+    assert sink.stats.rejected == 5 and sink.stats.points == 0
+    assert fsm.get('sunk') == ArrayTimeSeries(np.arange(-1.0, 1300.0), np.arange(-1.0, 1300.0))
+
+'''
+Functions being tested: StreamMatcher
+Summary: Streams are matched incrementally against stored reference series
+'''
+def test_stream_matcher():
+    fsm = FileStorageManager()
+    rng = np.random.RandomState(0)
+    pattern = np.sin(np.arange(80) / 5.0)
+    fsm.store('pattern', RegularTimeSeries(pattern))
+    fsm.store('noise', ArrayTimeSeries(np.arange(50.0), rng.randn(50)))
+    values = rng.randn(1000) * 5 + 100
+    values[500:580] = 3 * pattern + 100
+    matcher = StreamMatcher.from_storage(fsm, ['pattern', 'noise'], threshold=0.99, block=37)
+    matches = list(matcher.match(SimulatedTimeSeries(zip(range(1000), values))))
+    assert [(m.ident, m.time) for m in matches] == [('pattern', 579.0)]
+    assert abs(matches[0].corr - 1) < 1e-9
+    matcher = StreamMatcher({'noise': fsm.get('noise')})
+    corr = np.concatenate([matcher.correlate(values[i:i + 7]) for i in range(0, 1000, 7)], axis=1)[0]
+    expected = [np.corrcoef(values[j - 49:j + 1], fsm.get('noise')._data_array())[0, 1] for j in range(49, 1000)]
+    assert np.isnan(corr[:49]).all() and np.allclose(corr[49:], expected)
+    with raises(ValueError):
+        StreamMatcher({'flat': [1.0, 1.0, 1.0]})
@@ -630,3 +630,902 @@ def test_kernel_corr3():
     t1 = random_ts(2)
     t2 = random_ts(3)
     assert kernel_corr(t1,t2) != 1
+
+'''
+Functions Being Tested: Init
+Summary: Value error if a time value is not finite
+'''
+def test_init_valueError_nonfinite():
+    with raises(ValueError):
+        ts = TimeSeries([1, 2, float('nan'), 4], [100, 101, 102, 103])
+
+'''
+Functions Being Tested: Init
+Summary: Generators and exotic real number types are accepted
+'''
+def test_init_generator_fraction():
+    from fractions import Fraction
+    ts = TimeSeries((t for t in range(3)), [Fraction(1, 2), 1, 2.5])
+    assert list(ts.itertimes()) == [0, 1, 2]
+    assert list(ts) == [0.5, 1.0, 2.5]
+
+'''
+Functions Being Tested: Init ATS
+Summary: Float arrays are adopted without copying
+'''
+def test_init_ndarray_nocopy_ats():
+    times = np.arange(0.0, 1.0, 0.01)
+    vals = np.random.randn(100)
+    ats = ArrayTimeSeries(times, vals)
+    assert ats._times is times
+    assert ats._data is vals
+    assert len(ats) == 100
+
+'''
+Functions Being Tested: Init ATS
+Summary: Unsorted time points are stored sorted together with their data points
+'''
+def test_init_unsorted_ats():
+    times = np.array([3.0, 1.0, 2.0])
+    ats = ArrayTimeSeries(times, [100, 101, 102])
+    assert list(ats.itertimes()) == [1, 2, 3] and list(ats) == [101, 102, 100]
+    assert list(times) == [3, 1, 2] and not ats._adopted
+    assert list(ats.between(1.5, 3)) == [102, 100]
+    with raises(ValueError):
+        ArrayTimeSeries([3, 1, 3], [100, 101, 102])
+
+'''
+Functions Being Tested: interpolate
+Summary: Nearest and previous value interpolation with stationary boundaries
+'''
+def test_interpolate_kinds():
+    a = ArrayTimeSeries([0, 5, 10], [1, 2, 3])
+    assert list(a.interpolate([-1, 1, 3, 7, 12], kind='nearest')) == [1, 1, 2, 2, 3]
+    assert list(a.interpolate([-1, 1, 5, 7, 12], kind='previous')) == [1, 1, 2, 2, 3]
+    with raises(ValueError):
+        a.interpolate([1], kind='cubic')
+
+'''
+Functions Being Tested: interpolate
+Summary: Unsorted time series interpolate like their sorted counterparts
+'''
+def test_interpolate_unsorted():
+    a = TimeSeries([10, 0, 5], [3, 1, 2])
+    assert a.interpolate([1, 7.5, 100]) == TimeSeries([1, 7.5, 100], [1.2, 2.5, 3])
+
+'''
+Functions Being Tested: interpolate
+Summary: A batch of grids returns one time series per grid
+'''
+def test_interpolate_batch():
+    a = ArrayTimeSeries([0, 5, 10], [1, 2, 3])
+    grids = np.array([[0, 2.5], [7.5, 10]])
+    b1, b2 = a.interpolate(grids)
+    assert b1 == ArrayTimeSeries([0, 2.5], [1, 1.5])
+    assert b2 == ArrayTimeSeries([7.5, 10], [2.5, 3])
+
+'''
+Functions Being Tested: interp
+Summary: Many series resampled onto one grid in a single call
+'''
+def test_interp_matrix():
+    times = np.arange(0.0, 1.0, 0.1)
+    data = np.vstack([times, 2 * times])
+    grid = np.arange(0.0, 1.0, 0.01)
+    out = interp(times, data, grid)
+    assert out.shape == (2, 100)
+    assert np.allclose(out[1], 2 * np.minimum(grid, 0.9))
+
+'''
+Functions Being Tested: add, sub, mul, truediv ATS
+Summary: Results share the time points of the operands
+'''
+def test_ops_share_times_ats():
+    a = ArrayTimeSeries([1, 2, 3, 4], [100, 101, 102, 103])
+    b = a * 2
+    c = b / a - 1
+    assert np.shares_memory(b._times, a._times)
+    assert c == ArrayTimeSeries([1, 2, 3, 4], [1, 1, 1, 1])
+    assert (b + a)._same_times(c)
+
+'''
+Functions Being Tested: reflected operators
+Summary: Real numbers on the left of an operator
+'''
+def test_reflected_ops():
+    ts = TimeSeries([1, 2, 3, 4], [1, 2, 4, 5])
+    assert 10 - ts == TimeSeries([1, 2, 3, 4], [9, 8, 6, 5])
+    assert 2 * ts == ts + ts
+    assert 1 + ts == ts + 1
+    assert 20 / ts == TimeSeries([1, 2, 3, 4], [20, 10, 5, 4])
+
+'''
+Functions Being Tested: iadd, isub, imul, itruediv ATS
+Summary: In-place operators update the data buffer
+'''
+def test_inplace_ops_ats():
+    a = ArrayTimeSeries([1, 2, 3, 4], [100, 101, 102, 103])
+    data = a._data
+    a += 1
+    a *= a
+    a -= 1
+    a /= 2
+    assert a._data is data
+    assert list(a) == [(x ** 2 - 1) / 2 for x in [101, 102, 103, 104]]
+    with raises(ValueError):
+        a += ArrayTimeSeries([1, 2, 3], [1, 2, 3])
+
+'''
+Functions Being Tested: getitem ATS
+Summary: Slices are views sharing the underlying buffers
+'''
+def test_getItem_slice_ats():
+    ats = ArrayTimeSeries(range(10), range(100, 110))
+    view = ats[2:5]
+    assert view == ArrayTimeSeries([2, 3, 4], [102, 103, 104])
+    assert np.shares_memory(view._data, ats._data)
+    assert list(ats[::4].itertimes()) == [0, 4, 8]
+    assert ats[-1] == 109
+    assert len(ats[8:2]) == 0
+
+'''
+Functions Being Tested: setitem ATS
+Summary: Writing to a view copies its data instead of modifying the parent
+'''
+def test_setItem_view_ats():
+    ats = ArrayTimeSeries(range(10), range(100, 110))
+    view = ats[2:5]
+    view[0] = 0
+    view += 1
+    assert view[0] == 1 and view[1] == 104
+    assert ats[2] == 102 and ats[3] == 103
+    for value in (1j, 'hello', None):
+        with raises(ValueError):
+            ats[0] = value
+    assert ats[0] == 100
+
+'''
+Functions Being Tested: between ATS
+Summary: Closed time-range selection by binary search
+'''
+def test_between_ats():
+    ats = ArrayTimeSeries(np.arange(10) / 10, np.arange(10.0))
+    window = ats.between(0.25, 0.6)
+    assert list(window) == [3.0, 4.0, 5.0, 6.0]
+    assert np.shares_memory(window._times, ats._times)
+    assert len(ats.between(2, 3)) == 0
+
+'''
+Functions Being Tested: append ATS
+Summary: Appending fills the spare capacity before growing the buffers
+'''
+def test_append_ats():
+    ats = ArrayTimeSeries([1, 2], [10, 20])
+    buffer = ats._times
+    ats.append(3, 30)
+    ats.append(4.5, 45)
+    assert ats._times is buffer
+    ats.append(5, 50)
+    assert len(ats._times) >= 2 * len(buffer)
+    assert ats == ArrayTimeSeries([1, 2, 3, 4.5, 5], [10, 20, 30, 45, 50])
+    with raises(ValueError):
+        ats.append(5, 60)
+
+'''
+Functions Being Tested: extend ATS
+Summary: Extending views and operation results never alters shared buffers
+'''
+def test_extend_shared_ats():
+    ats = ArrayTimeSeries(range(10), range(10))
+    view = ats[:5]
+    view.extend([20, 21], [0, 0])
+    doubled = ats * 2
+    doubled.extend([30], [0])
+    ats.extend([10, 11], [10, 11])
+    assert list(view.itertimes()) == [0, 1, 2, 3, 4, 20, 21]
+    assert list(ats.itertimes()) == list(range(12))
+    assert doubled[-1] == 0 and len(doubled) == 11
+    with raises(ValueError):
+        ats.extend([11, 12], [0, 0])
+
+'''
+Functions Being Tested: summary
+Summary: Summary statistics match NumPy
+'''
+def test_summary():
+    vals = [3, 1, 4, 1, 5, 9, 2, 6]
+    s = TimeSeries(range(8), vals).summary()
+    assert s.count == 8 and s.sum == 31
+    assert s.min == 1 and s.max == 9
+    assert np.isclose(s.mean, np.mean(vals))
+    assert np.isclose(s.std, np.std(vals, ddof=1))
+    assert np.isclose(s.norm, np.linalg.norm(vals))
+
+'''
+Functions Being Tested: summary
+Summary: Memoized statistics are invalidated by modifications
+'''
+def test_summary_invalidation():
+    ts = TimeSeries([1, 2, 3], [1, 2, 3])
+    ats = ArrayTimeSeries([1, 2, 3], [1, 2, 3])
+    assert ts.summary() is ts.summary()
+    assert ts.mean() == 2 and ats.mean() == 2
+    ts[0] = 4
+    ats[0] = 4
+    assert ts.mean() == 3 and ats.mean() == 3
+    ats += 1
+    assert ats.summary().max == 5
+    ats.append(4, 8)
+    assert ats.mean() == 5
+
+'''
+Functions Being Tested: summary
+Summary: Views are not memoized since their parent may change them
+'''
+def test_summary_view():
+    ats = ArrayTimeSeries([1, 2, 3], [1, 2, 3])
+    view = ats[1:]
+    assert view.mean() == 2.5
+    ats[2] = 5
+    assert view.mean() == 3.5
+    times, values = np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 3.0])
+    adopted = ArrayTimeSeries(times, values)
+    assert adopted.mean() == 2.0
+    values[0] = 100.0
+    assert adopted.mean() == 35.0
+    adopted.append(4.0, 4.0)
+    assert adopted.mean() == 27.25 and adopted._memoizable()
+
+'''
+Functions Being Tested: TimeSeriesBatch
+Summary: Rows are ArrayTimeSeries views sharing one time vector
+'''
+def test_batch_rows():
+    times = np.arange(0.0, 1.0, 0.01)
+    data = np.random.randn(5, 100)
+    batch = TimeSeriesBatch(times, data)
+    assert len(batch) == 5 and batch.shape == (5, 100)
+    row = batch[2]
+    assert isinstance(row, ArrayTimeSeries)
+    assert list(row) == list(data[2])
+    assert all(r._times is batch[0]._times for r in batch)
+    assert batch[1:3].shape == (2, 100)
+    assert np.isclose(batch.mean()[0], data[0].mean())
+    data[0] += 1
+    assert np.isclose(batch.mean()[0], data[0].mean())
+    copied = TimeSeriesBatch(times, data.tolist())
+    assert copied.summary() is copied.summary()
+
+'''
+Functions Being Tested: TimeSeriesBatch
+Summary: Arithmetic, statistics and standardization over all rows
+'''
+def test_batch_ops():
+    ts1 = ArrayTimeSeries([1, 2, 3, 4], [1, 2, 3, 4])
+    ts2 = ArrayTimeSeries([1, 2, 3, 4], [2, 4, 6, 9])
+    batch = TimeSeriesBatch.from_series([ts1, ts2])
+    assert np.allclose(batch.mean(), [ts1.mean(), ts2.mean()])
+    assert np.allclose(batch.std(), [ts1.std(), ts2.std()])
+    assert (batch * 2 - ts1)[1] == ts2 * 2 - ts1
+    assert (1 + batch)[0] == ts1 + 1
+    stand = batch.standardize()
+    assert np.allclose(stand.mean(), 0) and np.allclose(stand.std(), 1)
+    with raises(ValueError):
+        batch + ArrayTimeSeries([1, 2, 3], [1, 2, 3])
+
+'''
+Functions Being Tested: TimeSeriesBatch
+Summary: Series on different time points interpolated onto a common grid
+'''
+def test_batch_interpolate():
+    ts1 = ArrayTimeSeries([0, 5, 10], [1, 2, 3])
+    ts2 = TimeSeries([0, 10], [0, 10])
+    batch = TimeSeriesBatch.from_series([ts1, ts2], grid=[0, 2.5, 10])
+    assert batch[0] == ArrayTimeSeries([0, 2.5, 10], [1, 1.5, 3])
+    assert batch[1] == ArrayTimeSeries([0, 2.5, 10], [0, 2.5, 10])
+    resampled = batch.interpolate([5])
+    assert list(resampled[0]) == [2] and list(resampled[1]) == [5]
+
+'''
+Functions Being Tested: add, sub, mul with align
+Summary: Inner, outer and as-of aligned arithmetic on different time points
+'''
+def test_aligned_ops():
+    a = ArrayTimeSeries([1, 2, 3, 4], [10, 20, 30, 40])
+    b = TimeSeries([2, 4, 5], [1, 2, 3])
+    assert a.add(b, align='inner') == ArrayTimeSeries([2, 4], [21, 42])
+    outer = a.sub(b, align='outer', fill=0)
+    assert outer == ArrayTimeSeries([1, 2, 3, 4, 5], [10, 19, 30, 38, -3])
+    asof = a.mul(b, align='asof')
+    assert list(asof.itertimes()) == [1, 2, 3, 4]
+    assert np.isnan(asof[0]) and list(asof)[1:] == [20, 30, 80]
+    with raises(ValueError):
+        a + b
+
+'''
+Functions Being Tested: align
+Summary: Fill policies and as-of tolerance
+'''
+def test_align_fill():
+    from timeseries.timeseries.alignment import align
+    t, v1, v2 = align([0, 1, 2, 3], [0, 1, 2, 3], [0.5, 2.5], [5, 25], how='outer', fill='linear')
+    assert list(t) == [0, 0.5, 1, 2, 2.5, 3]
+    assert np.allclose(v1, [0, 0.5, 1, 2, 2.5, 3])
+    assert np.isnan(v2[0]) and np.allclose(v2[1:5], [5, 10, 20, 25]) and np.isnan(v2[5])
+    t, v1, v2 = align([0, 1, 2, 3], [0, 1, 2, 3], [0.5, 2.5], [5, 25], how='outer', fill='previous')
+    assert np.allclose(v1, [0, 0, 1, 2, 2, 3])
+    t, v1, v2 = align([1, 3], [1, 3], [0.5, 2.5], [5, 25], how='asof', tolerance=0.25)
+    assert np.isnan(v2[0]) and np.isnan(v2[1])
+    for fill in ('previous', 'linear'):
+        t, v1, v2 = align([1, 2.7, 4], [1, 2, 3], [0.5, 2.5], [5, 25], how='asof', fill=fill, tolerance=0.25)
+        assert np.isnan(v2[0]) and v2[1] == 25 and np.isnan(v2[2])
+    t, v1, v2 = align([1, 2.7], [1, 2], [0.5, 2.5], [5, 25], how='asof', fill=-1, tolerance=0.25)
+    assert list(v2) == [-1, 25]
+
+'''
+Functions Being Tested: resample
+Summary: Bucketed aggregates match per-bucket NumPy reductions
+'''
+def test_resample():
+    times = np.arange(0, 100, 0.5)
+    vals = np.random.randn(200)
+    ats = ArrayTimeSeries(times, vals)
+    for agg, func in [('mean', np.mean), ('sum', np.sum), ('min', np.min), ('max', np.max),
+                      ('std', lambda x: np.std(x, ddof=1)), ('count', len),
+                      ('first', lambda x: x[0]), ('last', lambda x: x[-1])]:
+        out = ats.resample(10, agg)
+        assert list(out.itertimes()) == list(range(0, 100, 10))
+        assert np.allclose(list(out), [func(vals[i:i + 20]) for i in range(0, 200, 20)])
+    sparse = TimeSeries([0, 1, 25, 26, 27], [1, 2, 3, 4, 5]).resample(10, 'sum')
+    assert sparse == TimeSeries([0, 20], [3, 12])
+    with raises(ValueError):
+        ats.resample(0)
+
+'''
+Functions Being Tested: rolling
+Summary: Rolling aggregates match per-window NumPy reductions
+'''
+def test_rolling():
+    vals = np.random.randn(103)
+    ats = ArrayTimeSeries(np.arange(103.0), vals)
+    windows = np.lib.stride_tricks.sliding_window_view(vals, 7)
+    for agg, func in [('mean', np.mean), ('sum', np.sum), ('min', np.min), ('max', np.max),
+                      ('std', lambda x: np.std(x, ddof=1))]:
+        out = ats.rolling(7, agg)
+        assert list(out.itertimes()) == list(np.arange(6.0, 103.0))
+        assert np.allclose(list(out), [func(w) for w in windows])
+    assert len(ats.rolling(200)) == 0
+    with raises(ValueError):
+        ats.rolling(0)
+
+'''
+Functions Being Tested: rolling
+Summary: Rolling standard deviations stay accurate on long trending series
+'''
+def test_rolling_long():
+    times = np.arange(50000.0)
+    vals = 1e7 + times + np.random.RandomState(0).randn(len(times))
+    out = ArrayTimeSeries(times, vals).rolling(60, 'std')._data_array()
+    starts = np.arange(0, len(vals) - 59, 7)
+    expected = np.array([np.std(vals[i:i + 60], ddof=1) for i in starts])
+    assert len(out) == len(vals) - 59 and np.max(np.abs(out[starts] - expected) / expected) < 1e-9
+
+'''
+Functions Being Tested: to_bytes, from_bytes
+Summary: Binary round trip for every sized time series class
+'''
+def test_bytes_roundtrip():
+    ts = TimeSeries([1, 2, 3, 4], [100, 101, 102, 103.5])
+    buf = ts.to_bytes()
+    assert len(buf) == 16 + 2 * 4 * 8
+    assert TimeSeries.from_bytes(buf) == ts
+    ats = ArrayTimeSeries.from_bytes(buf)
+    assert ats == ArrayTimeSeries([1, 2, 3, 4], [100, 101, 102, 103.5])
+    assert np.shares_memory(ats._data, np.frombuffer(buf, dtype=np.uint8))
+    sm = SMTimeSeries.from_bytes(ats.to_bytes(), ident='bytes_roundtrip')
+    assert sm.to_bytes() == buf
+
+'''
+Functions Being Tested: from_bytes
+Summary: Value error for buffers that are not encoded time series
+'''
+def test_from_bytes_valueError():
+    buf = ArrayTimeSeries([1, 2, 3], [1, 2, 3]).to_bytes()
+    with raises(ValueError):
+        ArrayTimeSeries.from_bytes(buf[:-1])
+    with raises(ValueError):
+        ArrayTimeSeries.from_bytes(b'JSON' + buf[4:])
+
+'''
+Functions Being Tested: str
+Summary: Long series are truncated and show their length and time range
+'''
+def test_str_truncated():
+    ats = ArrayTimeSeries(np.arange(1000.0), np.arange(1000.0))
+    assert str(ats) == ('ArrayTimeSeries([' + ''.join('[{0},{0}]\n'.format(float(i)) for i in range(10)) + '...\n' +
+                        ''.join('[{0},{0}]\n'.format(float(i)) for i in range(990, 1000)) +
+                        '], length=1000, start=0.0, stop=999.0)')
+    assert ats.to_string().count('\n') == 1000
+    assert str(TimeSeries([1, 2], [3, 4])) == 'TimeSeries([[1,3]\n[2,4]\n])'
+
+'''
+Functions Being Tested: to_json, iter_json, write_json
+Summary: Streamed JSON matches json.dumps of the time and data points
+'''
+def test_json_streaming():
+    import io, json
+    ts = TimeSeries(list(range(10)), [x * 1.5 for x in range(10)])
+    expected = json.dumps({'time_points': list(range(10)), 'data_points': [x * 1.5 for x in range(10)]})
+    assert ts.to_json() == expected
+    chunks = list(ts.iter_json(chunk_size=3))
+    assert len(chunks) > 8 and ''.join(chunks) == expected
+    out = io.StringIO()
+    ArrayTimeSeries([], []).write_json(out)
+    assert json.loads(out.getvalue()) == {'time_points': [], 'data_points': []}
+
+'''
+Functions Being Tested: slots
+Summary: Concrete time series classes do not carry an instance dict
+'''
+def test_slots():
+    for ts in [TimeSeries([1], [1]), ArrayTimeSeries([1], [1]), SimulatedTimeSeries(iter([1])),
+               TimeSeriesBatch([1], [[1]])]:
+        assert not hasattr(ts, '__dict__')
+
+'''
+Functions Being Tested: dtype, compact, sizeof ATS
+Summary: float32 storage, trimmed capacity and exact size reporting
+'''
+def test_dtype_compact_sizeof_ats():
+    ats = ArrayTimeSeries(np.arange(1000.0), np.arange(1000.0), dtype=np.float32)
+    assert ats._data.dtype == np.float32
+    base = object.__sizeof__(ats)
+    assert ats.__sizeof__() == base + 2000 * 8 + 2000 * 4
+    ats.compact()
+    assert ats.__sizeof__() == base + 1000 * 8 + 1000 * 4
+    assert ats == ArrayTimeSeries(np.arange(1000.0), np.arange(1000.0))
+    decoded = ArrayTimeSeries.from_bytes(ats.to_bytes())
+    assert decoded._data.dtype == np.float32
+    with raises(ValueError):
+        ArrayTimeSeries([1], [1], dtype=int)
+
+'''
+Functions Being Tested: RegularTimeSeries, time_at, index_of, between, getitem
+Summary: Implicit time axis with constant-time lookups and views
+'''
+def test_regular_axis():
+    rts = RegularTimeSeries([1, 2, 3, 4, 5], start=10, step=0.5)
+    assert list(rts.itertimes()) == [10, 10.5, 11, 11.5, 12]
+    assert rts == ArrayTimeSeries([10, 10.5, 11, 11.5, 12], [1, 2, 3, 4, 5])
+    assert rts.time_at(-1) == 12 and rts.index_of(11.5) == 3
+    with raises(ValueError):
+        rts.index_of(11.25)
+    with raises(IndexError):
+        rts.time_at(5)
+    view = rts.between(10.4, 11.5)
+    assert isinstance(view, RegularTimeSeries) and list(view.iteritems()) == [(10.5, 2), (11, 3), (11.5, 4)]
+    view[0] = 100
+    assert rts[1] == 2 and view[0] == 100
+    assert list(rts[::2].itertimes()) == [10, 11, 12]
+    assert rts.__sizeof__() == object.__sizeof__(rts) + 5 * 8
+    with raises(ValueError):
+        RegularTimeSeries([1, 2], step=0)
+    with raises(ValueError):
+        RegularTimeSeries.from_times([0, 1, 3], [1, 2, 3])
+    assert RegularTimeSeries.from_times(np.arange(0.0, 1.0, 0.01), np.zeros(100)).step == 0.01
+
+'''
+Functions Being Tested: RegularTimeSeries arithmetic and interpolate
+Summary: Results keep the regular axis where possible and match ArrayTimeSeries
+'''
+def test_regular_ops_interpolate():
+    data = np.sin(np.arange(50.0))
+    rts = RegularTimeSeries(data, start=1, step=2)
+    ats = ArrayTimeSeries(1 + 2 * np.arange(50.0), data)
+    total = rts + RegularTimeSeries(data, start=1, step=2)
+    assert isinstance(total, RegularTimeSeries) and total == 2 * ats
+    with raises(ValueError):
+        rts + RegularTimeSeries(data, start=0, step=2)
+    pts = [0, 1, 2.5, 4, 60, 99, 200]
+    for kind in ('linear', 'nearest', 'previous'):
+        assert np.allclose(list(rts.interpolate(pts, kind)), list(ats.interpolate(pts, kind)))
+    grid = rts.interpolate(np.arange(1.0, 99.0, 1.0))
+    assert isinstance(grid, RegularTimeSeries) and grid.step == 1
+    assert isinstance(rts.interpolate([1, 2, 4]), ArrayTimeSeries)
+    fast = rts.interpolate_regular(0.5, 0.25, 400)
+    assert np.allclose(list(fast), list(ats.interpolate(0.5 + 0.25 * np.arange(400))))
+    assert isinstance(rts.rolling(3), RegularTimeSeries)
+    single = RegularTimeSeries(data, start=1, step=2, dtype=np.float32)
+    derived = [single + 1, single.rolling(3, 'std'), single.resample(4), single.interpolate([2.0, 4.0]),
+               single.interpolate([2.0, 3.0, 7.0]), single.interpolate_regular(1, 0.5, 4), np.sqrt(single * single)]
+    assert all(ts._data_array().dtype == np.float32 for ts in derived)
+    values = np.arange(3.0)
+    adopted = RegularTimeSeries(values)
+    assert adopted.mean() == 1.0
+    values[0] = 30.0
+    assert adopted.mean() == 11.0
+
+'''
+Functions Being Tested: RegularTimeSeries to_bytes, from_bytes
+Summary: The binary encoding stores the start and step instead of a time column
+'''
+def test_regular_bytes():
+    rts = RegularTimeSeries(np.arange(100.0), start=-3, step=0.1)
+    buf = rts.to_bytes()
+    assert len(buf) == 16 + 16 + 100 * 8
+    decoded = RegularTimeSeries.from_bytes(buf)
+    assert decoded.start == -3 and decoded.step == 0.1 and decoded == rts
+    assert ArrayTimeSeries.from_bytes(buf) == rts
+    with raises(ValueError):
+        RegularTimeSeries.from_bytes(ArrayTimeSeries([1, 2], [1, 2]).to_bytes())
+
+'''
+Functions Being Tested: LazyOperation eval, node_count, estimated_cost
+Summary: Identical nodes are evaluated once and keyword arguments are evaluated
+'''
+def test_lazy_cse():
+    calls = []
+    @lazy
+    def square(x):
+        calls.append(x)
+        return x * x
+    @lazy
+    def scaled(x, factor=1):
+        return x * factor
+    a = square(3)
+    b = square(3)
+    expr = lazy_add(lazy_mul(a, b), scaled(a, factor=lazy_add(1, 1)))
+    assert expr.node_count == 5
+    assert expr.estimated_cost == 5
+    assert expr.eval() == 81 + 18
+    assert calls == [3]
+    assert expr.nodes()[-1] is expr
+    sign = lazy(math.copysign)
+    assert lazy_add(sign(1, 0.0), sign(1, -0.0)).eval() == 0.0
+    kind = lazy(lambda t: type(t[0]).__name__)
+    assert lazy_add(kind((1,)), kind((1.0,))).eval() == 'intfloat'
+    assert lazy_add(sign(1, 2.0), sign(1, 2.0)).node_count == 2
+
+'''
+Functions Being Tested: LazyOperation eval
+Summary: Deep graphs are evaluated without recursion
+'''
+def test_lazy_deep():
+    expr = 0
+    for i in range(100000):
+        expr = lazy_add(expr, 1)
+    assert expr.eval() == 100000
+    assert expr.node_count == 100000
+
+'''
+Functions Being Tested: lazy, LazyTimeSeries eval
+Summary: Fused lazy expressions match eager arithmetic and check the time grid once
+'''
+def test_lazy_fused():
+    a = ArrayTimeSeries(np.arange(100.0), np.random.randn(100))
+    b = TimeSeries(list(range(100)), list(range(100)))
+    c = RegularTimeSeries(np.random.randn(100))
+    expected = (a + b) * c - a / 2
+    for chunk_size in (7, 100, 1000):
+        result = ((a.lazy + b) * c - a.lazy / 2).eval(chunk_size=chunk_size)
+        assert isinstance(result, ArrayTimeSeries)
+        assert np.allclose(result._data_array(), expected._data_array())
+    assert (-(2 - a.lazy * a.lazy)).node_count == 4
+    assert a.lazy.eval() is a
+    assert lazy_add(a.lazy, a.lazy).eval() == 2 * a
+    with raises(ValueError):
+        (a.lazy + ArrayTimeSeries(np.arange(1.0, 101.0), np.zeros(100))).eval()
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    timings = []
+    with ThreadPoolExecutor(2) as pool:
+        assert np.allclose(((a.lazy + b) * c).eval(executor=pool, timings=timings)._data_array(),
+                           ((a + b) * c)._data_array())
+    assert len(timings) == 5
+    with ProcessPoolExecutor(2) as pool:
+        assert (a.lazy * 2 + a).eval(executor=pool) == 3 * a
+
+'''
+Functions Being Tested: LazyOperation eval with an executor, critical_path
+Summary: Thread and process pools evaluate independent branches and record timings
+'''
+def test_lazy_executor():
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    branches = [lazy_mul(lazy_add(i, 1), lazy_add(i, 2)) for i in range(8)]
+    expr = branches[0]
+    for branch in branches[1:]:
+        expr = lazy_add(expr, branch)
+    expected = sum((i + 1) * (i + 2) for i in range(8))
+    timings = []
+    with ThreadPoolExecutor(4) as pool:
+        assert expr.eval(executor=pool, timings=timings) == expected
+    assert len(timings) == expr.node_count
+    assert all(t.duration >= 0 for t in timings)
+    path = critical_path(timings)
+    assert path[-1].node is expr
+    assert all(path[i + 1].inputs.count(timings.index(path[i])) for i in range(len(path) - 1))
+    with ProcessPoolExecutor(2) as pool:
+        assert expr.eval(executor=pool) == expected
+    with ThreadPoolExecutor(2) as pool:
+        with raises(ZeroDivisionError):
+            lazy_add(1, LazyOperation(lambda: 1 / 0)).eval(executor=pool)
+
+'''
+Functions Being Tested: lazy
+Summary: Builtins, partials and library functions can be made lazy without being modified
+'''
+def test_lazy_wrapping():
+    import functools, pickle
+    from concurrent.futures import ProcessPoolExecutor
+    qualname = np.fft.fft.__qualname__
+    assert np.allclose(lazy(np.fft.fft)(np.ones(2)).eval(), [2, 0])
+    assert np.fft.fft.__qualname__ == qualname
+    assert lazy(len)([1, 2]).eval() == 2
+    assert lazy(functools.partial(max, 0))(-3).eval() == 0
+    twice = lazy(lazy_add.__wrapped__)
+    assert twice(1, 2).eval() == 3 and pickle.loads(pickle.dumps(lazy_add)) is lazy_add
+    with ProcessPoolExecutor(2) as pool:
+        assert lazy_add(lazy(math.copysign)(1, -0.0), lazy_mul(2, 3)).eval(executor=pool) == 5
+
+'''
+Functions Being Tested: produce_arrays, iterchunks
+Summary: Chunks of values, (time, value) tuples and ndarray blocks are produced as arrays
+'''
+def test_produce_arrays_sts():
+    sts = SimulatedTimeSeries(zip(range(10), range(10, 20)))
+    times, values = sts.produce_arrays(4)
+    assert times.tolist() == [0, 1, 2, 3] and values.tolist() == [10, 11, 12, 13]
+    assert sts.produce(1) == [(4, 14)]
+    stamp = datetime.datetime.now().timestamp()
+    times, values = SimulatedTimeSeries(iter(range(5))).produce_arrays(5, step=0.5)
+    assert values.tolist() == [0, 1, 2, 3, 4]
+    assert stamp <= times[0] < stamp + 1 and np.allclose(np.diff(times), 0.5)
+    assert SimulatedTimeSeries(iter(range(5))).produce_arrays(5, after=stamp + 100)[0][0] > stamp + 100
+    times, values = SimulatedTimeSeries(iter(range(5))).produce_arrays(5)
+    assert np.all(np.diff(times) > 0) and times[-1] - times[0] < 1e-3
+    times, values = SimulatedTimeSeries(iter([None, 1.0])).produce_arrays(5)
+    assert len(values) == 2 and np.isnan(values[0]) and values[1] == 1
+    blocks = [np.arange(3.0), (np.arange(3.0, 7.0), np.arange(10.0, 14.0)), 7.0, (8, 8.5)]
+    sts = SimulatedTimeSeries(iter(blocks))
+    chunks = list(sts.iterchunks(2))
+    assert [len(v) for t, v in chunks] == [2, 2, 2, 2, 1]
+    assert np.concatenate([v for t, v in chunks]).tolist() == [0, 1, 2, 10, 11, 12, 13, 7, 8.5]
+    assert chunks[1][0][1] == 3 and chunks[-1][0].tolist() == [8]
+    sts = SimulatedTimeSeries(iter([np.arange(3.0), np.arange(3.0, 5.0)]))
+    assert next(sts) == 0 and list(sts) == [1, 2, 3, 4]
+    assert len(sts.produce_arrays(3)[1]) == 0
+
+'''
+Functions Being Tested: RunningStats update, update_many, merge
+Summary: Merged accumulators match the statistics of the concatenated values
+'''
+def test_running_stats_merge():
+    values = np.random.randn(1000) * 10 + 1e6
+    stats = RunningStats()
+    for value in values[:10]:
+        stats.update(value)
+    shards = [stats, RunningStats(values[10:400]), RunningStats(), RunningStats(values[400:])]
+    merged = shards[0] + shards[1] + shards[2]
+    merged.merge(shards[3])
+    assert merged.count == 1000 and stats.count == 10
+    assert np.isclose(merged.mean, values.mean(), rtol=1e-12)
+    assert np.isclose(merged.var, values.var(ddof=1), rtol=1e-9)
+    assert merged.min == values.min() and merged.max == values.max()
+    assert math.isnan(RunningStats([1.0]).var) and math.isnan(RunningStats().mean)
+
+'''
+Functions Being Tested: WindowStats, EWStats
+Summary: Sliding-window and exponentially weighted statistics match direct computation
+'''
+def test_window_ew_stats():
+    values = np.random.randn(500)
+    window = WindowStats(7)
+    ew = EWStats(alpha=0.1)
+    mean = values[0]
+    var = 0.0
+    for i, value in enumerate(values):
+        window.update(value)
+        ew.update(value)
+        recent = values[max(0, i - 6):i + 1]
+        assert window.count == len(recent)
+        assert window.min == recent.min() and window.max == recent.max()
+        assert np.isclose(window.mean, recent.mean())
+        if len(recent) > 1:
+            assert np.isclose(window.var, recent.var(ddof=1))
+        if i:
+            delta = value - mean
+            mean += 0.1 * delta
+            var = 0.9 * (var + 0.1 * delta * delta)
+        assert np.isclose(ew.mean, mean) and np.isclose(ew.var, var)
+        assert ew.min <= ew.mean <= ew.max
+    assert np.isclose(EWStats(halflife=1).alpha, 0.5)
+    with raises(ValueError):
+        WindowStats(0)
+    with raises(ValueError):
+        EWStats()
+
+'''
+Functions Being Tested: online_stats
+Summary: Streams statistics of a SimulatedTimeSeries with any accumulator
+'''
+def test_online_stats_sts():
+    sts = SimulatedTimeSeries(zip(range(6), [5, 1, 4, 2, 8, 0]))
+    window = WindowStats(3)
+    assert list(sts.online_stats(window, 'max').iteritems()) == [(0, 5), (1, 5), (2, 5), (3, 4), (4, 8), (5, 8)]
+    assert window.min == 0
+    sts = SimulatedTimeSeries(zip(range(6), range(6)))
+    assert [v for t, v in sts.online_stats(RunningStats(), 'mean', chunk=3).iteritems()] == [0, 0.5, 1]
+
+'''
+Functions Being Tested: P2Quantile, QuantileSketch
+Summary: Quantile estimates stay within their documented rank error, also after merging shards
+'''
+def test_quantile_sketches():
+    rng = np.random.RandomState(207)
+    for values in (rng.standard_normal(50000), rng.exponential(size=50000)):
+        ordered = np.sort(values)
+        rank_error = lambda estimate, q: abs(np.searchsorted(ordered, estimate) / len(ordered) - q)
+        shards = [QuantileSketch(values=values[:20000]), QuantileSketch()]
+        for value in values[20000:]:
+            shards[1].update(value)
+        merged = shards[0] + shards[1]
+        assert merged.count == 50000 and len(merged) <= 100
+        assert rank_error(merged.quantile(0.5), 0.5) < 0.01
+        for q in (0.01, 0.95, 0.99, 0.999):
+            assert rank_error(merged.quantile(q), q) < 0.001 + 0.01 * q * (1 - q)
+        assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+        for q in (0.5, 0.95, 0.99):
+            p2 = P2Quantile(q)
+            p2.update_many(values)
+            assert rank_error(p2.value, q) < 0.01
+    small = P2Quantile(0.5)
+    small.update_many([3, 1, 2])
+    assert small.value == 2
+    with raises(ValueError):
+        small.quantile(0.9)
+
+'''
+Functions Being Tested: online_quantile
+Summary: Streams quantile estimates of a SimulatedTimeSeries
+'''
+def test_online_quantile_sts():
+    values = np.random.RandomState(0).standard_normal(20000)
+    sts = SimulatedTimeSeries(zip(range(20000), values))
+    estimates = list(sts.online_quantile(0.95).iteritems())
+    assert len(estimates) == 20000 and estimates[-1][0] == 19999
+    assert abs(np.mean(values <= estimates[-1][1]) - 0.95) < 0.01
+    sketch = QuantileSketch()
+    sts = SimulatedTimeSeries(zip(range(1000), values))
+    assert len(list(sts.online_quantile(0.5, chunk=500, sketch=sketch).iteritems())) == 500
+    assert sketch.count == 500 and abs(np.mean(values[:500] <= sketch.quantile(0.9)) - 0.9) < 0.02
+
+'''
+Functions Being Tested: AsyncStreamTimeSeries aiter, produce, online_mean, online_std
+Summary: Async streams produce values and statistics from async and blocking sources
+'''
+def test_async_stream():
+    import asyncio
+    async def source():
+        for t, v in zip([1, 2, 3, 4], [10, 11, 12, 13]):
+            await asyncio.sleep(0)
+            yield (t, v)
+    async def run():
+        stream = AsyncStreamTimeSeries(source())
+        assert await stream.produce(2) == [(1, 10), (2, 11)]
+        assert [v async for v in stream] == [12, 13]
+        assert await stream.produce(1) == []
+        means = [v async for v in AsyncStreamTimeSeries(source()).online_mean()]
+        stds = await AsyncStreamTimeSeries(source()).online_std(2).produce(5)
+        times = [t async for t in AsyncStreamTimeSeries(iter(range(5, 8)), blocking=True).itertimes()]
+        return means, stds, times
+    means, stds, times = asyncio.run(run())
+    assert means == [10, 10.5, 11, 11.5]
+    assert stds == [(1, 0), (2, np.std([10, 11], ddof=1))]
+    assert len(times) == 3
+    with raises(TypeError):
+        iter(AsyncStreamTimeSeries([]))
+
+'''
+Functions Being Tested: AsyncStreamTimeSeries subscribe
+Summary: Fan-out delivers every value to each subscriber, and bounded queues throttle the source
+'''
+def test_async_fan_out():
+    import asyncio
+    pulled = []
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield (i, float(i))
+    async def consume(stream, lags=None):
+        values = []
+        async for v in stream:
+            if lags is not None:
+                lags.append(len(pulled) - len(values))
+                await asyncio.sleep(0.001)
+            values.append(v)
+        return values
+    async def run():
+        stream = AsyncStreamTimeSeries(source(), maxsize=4)
+        lags = []
+        fast_values, slow_values = await asyncio.gather(consume(stream.subscribe()), consume(stream.subscribe(), lags))
+        return fast_values, slow_values, lags
+    fast_values, slow_values, lags = asyncio.run(run())
+    assert fast_values == slow_values == list(range(100))
+    assert max(lags) <= 6
+
+'''
+Functions Being Tested: StreamJoin iter, iterchunks, push, close, aiter
+Summary: Streams are joined by time incrementally, in and out of order, sync and async
+'''
+def test_stream_join():
+    import asyncio
+    rng = np.random.RandomState(1)
+    t1, v1 = np.cumsum(rng.rand(500)), rng.randn(500)
+    t2, v2 = np.cumsum(rng.rand(700) * 0.8), rng.randn(700)
+    streams = lambda: [SimulatedTimeSeries(zip(t1, v1)), SimulatedTimeSeries(zip(t2, v2))]
+    rows = np.array(list(StreamJoin(streams(), chunk=33, tolerance=0.5)))
+    before = np.searchsorted(t2, t1, side='right') - 1
+    expected = np.where((before >= 0) & (t1 - t2[before] <= 0.5), v2[before], np.nan)
+    assert np.array_equal(rows[:, 0], t1) and np.array_equal(rows[:, 1], v1)
+    assert np.allclose(rows[:, 2], expected, equal_nan=True)
+    chunks = list(StreamJoin(streams(), how='outer').iterchunks())
+    assert np.array_equal(np.concatenate([t for t, v in chunks]), np.union1d(t1, t2))
+    assert all(v.shape == (2, len(t)) for t, v in chunks)
+
+    times = np.arange(100.0)
+    shuffled = times.copy()
+    shuffled[[10, 12, 40, 50]] = shuffled[[12, 10, 50, 40]]
+    join = StreamJoin([None, None], lateness=2.5)
+    pushed = [join.push(0, shuffled, shuffled), join.push(1, times, -times), join.close(0), join.close(1)]
+    assert join.late == [8, 0]
+    rows, values = np.concatenate([t for t, v in pushed]), np.concatenate([v for t, v in pushed], axis=1)
+    assert len(rows) == 92 and np.array_equal(values[1], -rows)
+    join = StreamJoin([None, None], how='outer')
+    join.push(0, [0.0], [0.0])
+    assert len(join.push(1, times, times)[0]) == 0 and len(join._times[1]) == 100
+    join = StreamJoin([None, None], how='outer', max_buffer=10)
+    join.push(0, [0.0, 5.0], [0.0, 5.0])
+    rows, values = join.push(1, times, times)
+    assert np.array_equal(rows, times[:90]) and len(join._times[1]) == 10
+    assert np.array_equal(values[0, :10], [0, 0, 0, 0, 0, 5, 5, 5, 5, 5])
+    pushed = [join.push(0, [50.0, 95.0], [50.0, 95.0]), join.close(0), join.close(1)]
+    assert join.late == [1, 0]
+    rows = np.concatenate([t for t, v in pushed])
+    assert np.array_equal(rows, times[90:])
+    with raises(ValueError):
+        StreamJoin([None], how='inner')
+    with raises(ValueError):
+        StreamJoin([None], max_buffer=0)
+
+    async def run():
+        streams = [AsyncStreamTimeSeries(zip(t1, v1)), AsyncStreamTimeSeries(zip(t2, v2))]
+        return [row async for row in StreamJoin(streams, chunk=50)]
+    assert np.allclose(np.array(asyncio.run(run()))[:, 2], np.where(before >= 0, v2[before], np.nan), equal_nan=True)
+
+'''
+Functions Being Tested: __array__, __array_ufunc__, __array_function__
+Summary: Time series work with NumPy functions and ufuncs without iteration
+'''
+def test_numpy_protocols():
+    ts = ArrayTimeSeries([1.0, 2.0, 3.0], [4.0, 9.0, 16.0])
+    view = np.asarray(ts)
+    assert np.shares_memory(view, ts._data_array()) and not view.flags.writeable
+    assert np.array(ts, dtype=np.float32).dtype == np.float32
+    with raises(ValueError):
+        np.array(ts, dtype=np.float32, copy=False)
+    root = np.sqrt(ts)
+    assert isinstance(root, ArrayTimeSeries) and root == ArrayTimeSeries([1.0, 2.0, 3.0], [2.0, 3.0, 4.0])
+    assert root._times_array().base is not None
+    assert np.float64(2) * ts == ts * np.float64(2) == ts + ts
+    regular = RegularTimeSeries([4.0, 9.0, 16.0], start=1.0, step=1.0)
+    assert isinstance(np.negative(regular), RegularTimeSeries) and np.add(ts, regular) == 2 * ts
+    fractional, whole = np.modf(ts / 3)
+    assert whole == ArrayTimeSeries([1.0, 2.0, 3.0], [1.0, 3.0, 5.0])
+    with raises(ValueError):
+        np.add(ts, ArrayTimeSeries([1.0, 2.0, 4.0], [0.0, 0.0, 0.0]))
+    with raises(TypeError):
+        np.add(ts, np.ones(3))
+    assert np.mean(ts) == ts.mean() and np.dot(ts, regular) == 353.0
+    assert np.allclose(np.fft.fft(ts), np.fft.fft([4.0, 9.0, 16.0]))
+    assert np.clip(ts, 5, 10) == ArrayTimeSeries([1.0, 2.0, 3.0], [5.0, 9.0, 10.0])
+    assert np.array_equal(np.concatenate([ts, regular]), [4.0, 9.0, 16.0] * 2)
+    assert np.isclose(kernel_corr(ts, regular), 1.0)